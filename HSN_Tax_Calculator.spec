@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('HSN_SAC.xlsx', '.'), ('.env', '.')],
+    datas=[('HSN_SAC.xlsx', '.'), ('HSN_SAC.hsnc', '.'), ('HSN_SAC.hsnx', '.'), ('.env', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
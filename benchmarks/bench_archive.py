@@ -0,0 +1,108 @@
+"""Annual per-HSN summaries from the columnar archive against scanning the entries CSV.
+
+    python benchmarks/bench_archive.py --entries 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entry_archive import EntryArchive
+from storage import read_csv_entries, write_entries_csv
+from tax_logic import SLABS, calculate_tax_paise, format_paise, to_paise
+
+YEAR = 2025
+
+def synthetic_entries(count, codes=5000, seed=1):
+    rnd = random.Random(seed)
+    hsn = sorted({f"{rnd.randint(1, 98):02d}{rnd.randint(0, 999999):06d}" for _ in range(codes)})
+    for i in range(count):
+        base = rnd.randint(100, 10_000_000)
+        slab = rnd.choice(SLABS)
+        cgst, sgst = calculate_tax_paise(base, slab)
+        yield {
+            'HSN': rnd.choice(hsn), 'Description': 'SYNTHETIC', 'QtyType': 'Units',
+            'Qty': str(rnd.randint(1, 500)), 'BaseValue': format_paise(base), 'TaxSlab': slab,
+            'CGST': format_paise(cgst), 'SGST': format_paise(sgst),
+            'TotalTax': format_paise(cgst + sgst), 'FinalAmount': format_paise(base + cgst + sgst),
+            'UserEmail': f"user{i % 7}@example.com",
+            'Timestamp': f"{YEAR}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00",
+        }
+
+def csv_scan(path, chapter=None):
+    # What a report over the flat file has to do today: parse every row
+    totals = {}
+    for entry in read_csv_entries(path):
+        if not entry['Timestamp'].startswith(str(YEAR)):
+            continue
+        if chapter and not entry['HSN'].startswith(chapter):
+            continue
+        total = totals.setdefault(entry['HSN'], [0, 0])
+        total[0] += 1
+        total[1] += to_paise(entry['BaseValue'])
+    return totals
+
+def pandas_scan(path, chapter=None):
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype={'HSN': str, 'Timestamp': str},
+                     usecols=['HSN', 'BaseValue', 'CGST', 'SGST', 'Timestamp'])
+    df = df[df['Timestamp'].str.startswith(str(YEAR))]
+    if chapter:
+        df = df[df['HSN'].str.startswith(chapter)]
+    return df.groupby('HSN')[['BaseValue', 'CGST', 'SGST']].sum()
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500_000)
+    parser.add_argument("--chapter", default="39", help="chapter for the pruned query")
+    parser.add_argument("--skip-python-scan", action="store_true",
+                        help="skip the row-by-row csv module scan, which is the slowest")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "entries.csv")
+        _, elapsed = timed(write_entries_csv, synthetic_entries(args.entries), csv_path)
+        print(f"Wrote {args.entries:,} entries to CSV in {elapsed:.1f} s ({os.path.getsize(csv_path):,} bytes)")
+
+        archive = EntryArchive(os.path.join(tmp, "archive"))
+        _, elapsed = timed(lambda: archive._commit(add=archive.write_entries(read_csv_entries(csv_path))))
+        _, compact_elapsed = timed(archive.compact)
+        size = sum(record['bytes'] for record in archive.files)
+        print(f"Archived in {elapsed:.1f} s, compacted in {compact_elapsed:.1f} s "
+              f"({len(archive.files)} files, {size:,} bytes)")
+        print()
+
+        months = (f"{YEAR}-01", f"{YEAR}-12")
+        runs = [
+            ("archive, full year", archive.hsn_summary, months, {}),
+            (f"archive, chapter {args.chapter}", archive.hsn_summary, months, {'chapters': [args.chapter]}),
+            ("archive, one quarter", archive.hsn_summary, (f"{YEAR}-01", f"{YEAR}-03"), {}),
+            ("pandas CSV, full year", pandas_scan, (csv_path,), {}),
+            (f"pandas CSV, chapter {args.chapter}", pandas_scan, (csv_path, args.chapter), {}),
+        ]
+        if not args.skip_python_scan:
+            runs.append(("csv module scan, full year", csv_scan, (csv_path,), {}))
+        results = {}
+        for label, func, func_args, kwargs in runs:
+            result, elapsed = timed(func, *func_args, **kwargs)
+            results[label] = result
+            print(f"{label:32s} {elapsed * 1000:9.1f} ms  {len(result):7,} HSN codes")
+
+        archived = {row['HSN']: row['BaseValue'] for row in results["archive, full year"]}
+        frame = results["pandas CSV, full year"]
+        expected = {hsn: round(value * 100) for hsn, value in frame['BaseValue'].items()}
+        print()
+        print("Totals match the CSV scan" if archived == expected else "MISMATCH against the CSV scan")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Scaling of the bulk-invoice run across 1, 2, 4 and 8 worker processes.
+
+    python benchmarks/bench_bulk_parallel.py --rows 2000000
+
+Generates a synthetic line-item CSV from the HSN master, runs it through
+bulk_invoice with each worker count and checks that every run produces
+byte-identical output.
+"""
+import argparse
+import csv
+import hashlib
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_invoice
+from tax_logic import SLABS
+
+QTY_TYPES = ["Units", "Kilograms", "Liters", "Meters", "Pieces"]
+
+def make_input(path, rows, codes, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(bulk_invoice.INPUT_COLUMNS)
+        for _ in range(rows):
+            writer.writerow([rng.choice(codes), rng.choice(QTY_TYPES), rng.randint(1, 500),
+                             f"{rng.uniform(1, 500000):.2f}", rng.choice(SLABS)])
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=bulk_invoice.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    master = bulk_invoice.load_master()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "lines.csv")
+        make_input(input_path, args.rows, list(master))
+        size_mb = os.path.getsize(input_path) / 1e6
+        print(f"input: {args.rows:,} rows, {size_mb:.0f} MB; {os.cpu_count()} CPUs")
+
+        baseline_time = baseline_digest = None
+        for workers in args.workers:
+            output_path = os.path.join(tmp, f"out-{workers}.csv")
+            if workers == 1:
+                stats = bulk_invoice.run(input_path, output_path, args.chunk_size,
+                                         master=master, quiet=True)
+            else:
+                stats = bulk_invoice.run_parallel(input_path, output_path, workers,
+                                                  args.chunk_size, quiet=True)
+            digest = file_digest(output_path)
+            os.remove(output_path)
+            if baseline_time is None:
+                baseline_time, baseline_digest = stats['seconds'], digest
+            same = "same output" if digest == baseline_digest else "OUTPUT DIFFERS"
+            print(f"{workers:2d} workers: {stats['seconds']:7.2f} s  "
+                  f"{stats['rows_per_second']:12,.0f} rows/s  "
+                  f"{baseline_time / stats['seconds']:5.2f}x  {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Size and time to first window of frozen builds (see build_exe.py).
+
+Each target is started with HSN_STARTUP_PROBE set, which makes main.py
+write the time once its event loop runs with the window shown and then
+exit.  The first launch of each target is reported separately from the
+median of the rest, since a onefile build pays for unpacking every time
+but the page cache only helps from the second launch on.
+
+    python build_exe.py --profile fast
+    python build_exe.py --distpath dist/onefile
+    python benchmarks/bench_bundle.py dist/fast/HSN_Tax_Calculator dist/onefile/HSN_Tax_Calculator
+    python benchmarks/bench_bundle.py --source     # python main.py, for comparison
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAME = "HSN_Tax_Calculator"
+TIMEOUT = 120
+
+def executable_for(target):
+    """The program to run for a onedir folder, a onefile executable or a .exe"""
+    if os.path.isdir(target):
+        for name in (NAME + ".exe", NAME):
+            path = os.path.join(target, name)
+            if os.path.isfile(path):
+                return path
+        raise FileNotFoundError(f"No {NAME} executable in {target}")
+    return target
+
+def bundle_size(target):
+    """(bytes, files) of a onedir folder or a single executable"""
+    if os.path.isfile(target):
+        return os.path.getsize(target), 1
+    total = files = 0
+    for directory, _, names in os.walk(target):
+        for name in names:
+            path = os.path.join(directory, name)
+            if not os.path.islink(path):
+                total += os.path.getsize(path)
+                files += 1
+    return total, files
+
+def time_to_window(command, cwd):
+    """Seconds from launching command to its first window being up"""
+    env = dict(os.environ)
+    if sys.platform.startswith('linux') and not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = os.path.join(tmp, "shown")
+        env['HSN_STARTUP_PROBE'] = probe
+        started = time.time()
+        process = subprocess.Popen(command, cwd=cwd, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                if os.path.exists(probe):
+                    with open(probe) as f:
+                        text = f.read()
+                    if text:
+                        return float(text) - started
+                if process.poll() is not None and not os.path.exists(probe):
+                    raise RuntimeError(f"{command[0]} exited with status {process.returncode} before showing a window")
+                if time.time() - started > TIMEOUT:
+                    raise RuntimeError(f"{command[0]} showed no window within {TIMEOUT} s")
+                time.sleep(0.002)
+        finally:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", help="onedir folders or onefile executables")
+    parser.add_argument("--source", action="store_true", help="also time python main.py from the source tree")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="fail if a target's median is over this")
+    args = parser.parse_args()
+    if not args.targets and not args.source:
+        parser.error("give at least one build to measure, or --source")
+
+    runs = [(target, [os.path.abspath(executable_for(target))]) for target in args.targets]
+    if args.source:
+        runs.append(("source (python main.py)", [sys.executable, os.path.join(ROOT, "main.py")]))
+
+    failures = []
+    print(f"{'target':42s} {'size':>10s} {'files':>6s} {'first':>9s} {'median':>9s} {'min':>9s}")
+    for label, command in runs:
+        if label.startswith("source"):
+            size = files = None
+            cwd = ROOT
+        else:
+            size, files = bundle_size(label)
+            # A run directory of its own, so entries and caches don't land next to the build
+            cwd = tempfile.mkdtemp(prefix="hsn-bundle-")
+        times = [time_to_window(command, cwd) for _ in range(args.runs)]
+        first = times[0]
+        rest = times[1:] or times
+        median = statistics.median(rest)
+        size_text = f"{size / 2**20:8.1f} MB" if size is not None else f"{'-':>10s}"
+        files_text = f"{files:6d}" if files is not None else f"{'-':>6s}"
+        print(f"{label[-42:]:42s} {size_text} {files_text} {first * 1000:7.0f} ms {median * 1000:7.0f} ms "
+              f"{min(times) * 1000:7.0f} ms")
+        if args.budget_ms is not None and median * 1000 > args.budget_ms:
+            failures.append(f"{label}: median {median * 1000:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Hash-indexed merge of a downloaded entries CSV into the SQLite store,
+for two machines whose histories share most entries.
+
+    python benchmarks/bench_merge.py --entries 1000000 --diverged 0.01
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_archive import synthetic_entries
+from entry_merge import build_index, merge_csv
+from entry_reader import EntryReader
+from storage import SQLiteEntryStore, write_entries_csv
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def pandas_merge(local_path, remote_path):
+    # The obvious alternative: concatenate both files and drop repeated rows
+    import pandas as pd
+
+    frames = [pd.read_csv(path, dtype=str, keep_default_na=False) for path in (local_path, remote_path)]
+    return len(pd.concat(frames, ignore_index=True).drop_duplicates())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000, help="entries on each machine")
+    parser.add_argument("--diverged", type=float, default=0.01,
+                        help="fraction of each side's entries the other side lacks")
+    parser.add_argument("--skip-pandas", action="store_true")
+    args = parser.parse_args()
+
+    own = int(args.entries * args.diverged)
+    shared = args.entries - own
+    # One stream split three ways: shared history, local-only and remote-only entries
+    entries = synthetic_entries(shared + 2 * own)
+    shared_entries = list(itertools.islice(entries, shared))
+    local_only = list(itertools.islice(entries, own))
+    remote_only = list(itertools.islice(entries, own))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        remote_path = os.path.join(tmp, "remote.csv")
+        local_path = os.path.join(tmp, "local.csv")
+        write_entries_csv(itertools.chain(shared_entries, remote_only), remote_path)
+        write_entries_csv(itertools.chain(shared_entries, local_only), local_path)
+        store = SQLiteEntryStore(os.path.join(tmp, "entries.db"))
+        _, elapsed = timed(store.append_many, itertools.chain(shared_entries, local_only))
+        print(f"{args.entries:,} entries per side, {own:,} only on each; "
+              f"local store loaded in {elapsed:.1f} s, remote CSV {os.path.getsize(remote_path):,} bytes")
+        print()
+
+        index, elapsed = timed(build_index, store.iter_entries())
+        print(f"{'hash index of the local store':34s} {elapsed:8.2f} s  {args.entries / elapsed:11,.0f} rows/s")
+        _, elapsed = timed(lambda: sum(1 for _ in EntryReader(remote_path)))
+        print(f"{'EntryReader over the remote CSV':34s} {elapsed:8.2f} s  {args.entries / elapsed:11,.0f} rows/s")
+
+        result = merge_csv(remote_path, store)
+        print(f"{'merge_csv (index + stream + add)':34s} {result['seconds']:8.2f} s  "
+              f"{args.entries / result['seconds']:11,.0f} rows/s  "
+              f"added {result['added']:,}, local only {result['local_only']:,}")
+        result = merge_csv(remote_path, store)
+        print(f"{'merge_csv again (nothing new)':34s} {result['seconds']:8.2f} s  "
+              f"added {result['added']:,}, local only {result['local_only']:,}")
+        if not args.skip_pandas:
+            rows, elapsed = timed(pandas_merge, local_path, remote_path)
+            print(f"{'pandas concat + drop_duplicates':34s} {elapsed:8.2f} s  {rows:,} rows")
+
+        tracemalloc.start()
+        index = build_index(store.iter_entries())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print()
+        print(f"Hash index: {len(index):,} keys, peak {peak / 2**20:.0f} MiB traced")
+        expected = args.entries + own
+        print("Store has both histories once" if store.count() == expected
+              else f"MISMATCH: {store.count():,} entries, expected {expected:,}")
+        store.close()
+
+if __name__ == "__main__":
+    main()
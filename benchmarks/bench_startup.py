@@ -0,0 +1,144 @@
+"""Cold-start imports and time to first window, checked against a budget.
+
+Reports what `python -X importtime -c "import main_launcher"` spends its
+time on, then starts fresh interpreters that build and show the login
+window and the main window, timing each from process start to the
+window being shown.  Exits with status 1 if the median time goes over
+--budget-ms or a heavy module (pandas, msal, requests, ...) is imported
+before the window shows, so it can run as a regression check.
+
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported before the first window; they load on first use
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'pyarrow', 'msal', 'requests', 'dotenv',
+                 'cryptography', 'keyring', 'sqlite3')
+WINDOWS = ('login', 'main')
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def child_env():
+    env = dict(os.environ)
+    if sys.platform.startswith('linux') and not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+def importtime(module='main_launcher'):
+    """[(self us, cumulative us, depth, module)] from -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=child_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+def warm_hsn_cache():
+    """Build the HSN cache and search index before timing, as a second launch would find them.
+
+    On a fresh checkout they don't exist yet, and the main window's loader
+    would build them with pandas on its own thread during the measurement.
+    """
+    sys.path.insert(0, ROOT)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        from hsn_loader import load_hsn_search_index, load_hsn_table
+        _, descriptions = load_hsn_table()
+        load_hsn_search_index(descriptions)
+    finally:
+        os.chdir(cwd)
+
+def show_window(window):
+    """Child process: build and show one window, print what was imported, exit"""
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    if window == 'login':
+        from login import LoginWindow
+        shown = LoginWindow()
+    else:
+        from main import HSNApp
+        shown = HSNApp()
+    shown.show()
+    app.processEvents()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+    print("shown", ",".join(heavy), flush=True)
+    # Skip teardown; the main window has a loader thread running
+    os._exit(0)
+
+def time_to_window(window):
+    """Seconds from starting a fresh interpreter to window shown, and the heavy modules it had loaded"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', window],
+                               cwd=ROOT, env=child_env(), stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.startswith("shown"):
+            elapsed = time.perf_counter() - started
+            process.wait()
+            heavy = line.split(None, 1)[1].strip() if len(line.split()) > 1 else ""
+            return elapsed, [name for name in heavy.split(",") if name]
+    process.wait()
+    raise RuntimeError(f"{window} window did not show (exit status {process.returncode})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500,
+                        help="maximum median time from process start to window shown")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--child", choices=WINDOWS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        show_window(args.child)
+        return
+
+    warm_hsn_cache()
+    rows = importtime()
+    total = sum(self_us for self_us, _, _, _ in rows)
+    print(f"import main_launcher: {len(rows)} modules, {total / 1000:.1f} ms")
+    for self_us, cumulative_us, depth, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:7.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+    top_level = sorted((row for row in rows if row[2] == 0), key=lambda row: -row[1])
+    print("Top-level imports: " + ", ".join(f"{name} {cumulative_us / 1000:.0f} ms"
+                                           for _, cumulative_us, _, name in top_level[:8]))
+    print()
+
+    failures = []
+    for window in WINDOWS:
+        times = []
+        for _ in range(args.runs):
+            elapsed, heavy = time_to_window(window)
+            times.append(elapsed)
+            if heavy:
+                failures.append(f"{window} window: imported {', '.join(heavy)} before showing")
+        median = statistics.median(times) * 1000
+        print(f"{window:6s} window: median {median:7.1f} ms, min {min(times) * 1000:7.1f} ms, "
+              f"max {max(times) * 1000:7.1f} ms over {args.runs} runs")
+        if median > args.budget_ms:
+            failures.append(f"{window} window: {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    print()
+    for failure in sorted(set(failures)):
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: both windows within {args.budget_ms:.0f} ms, no heavy imports before the first window")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Append throughput of storage.EntryWriter under each flush policy,
+against the old one-DataFrame-per-entry save.
+
+    python benchmarks/bench_storage.py --entries 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import EntryWriter, FLUSH_EACH, FLUSH_GROUP, FLUSH_INTERVAL
+
+ENTRY = {
+    'HSN': '39174000', 'Description': 'FITTINGS', 'QtyType': 'Units', 'Qty': 50.0,
+    'BaseValue': '10000.00', 'TaxSlab': '28%', 'CGST': '1400.00', 'SGST': '1400.00',
+    'TotalTax': '2800.00', 'FinalAmount': '12800.00', 'UserEmail': 'bench@example.com'
+}
+
+def pandas_save(path, entry):
+    # The save_entry implementation EntryWriter replaced
+    import pandas as pd
+    df = pd.DataFrame([entry])
+    if os.path.exists(path):
+        df.to_csv(path, mode='a', header=False, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def bench_pandas(path, entries):
+    start = time.perf_counter()
+    for _ in range(entries):
+        pandas_save(path, ENTRY)
+    return time.perf_counter() - start
+
+def bench_writer(path, entries, **kwargs):
+    start = time.perf_counter()
+    with EntryWriter(path, **kwargs) as writer:
+        for _ in range(entries):
+            writer.write(ENTRY)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50_000)
+    parser.add_argument("--fsync-entries", type=int, default=2_000,
+                        help="entries for the fsync-per-entry and pandas runs, which are much slower")
+    args = parser.parse_args()
+
+    runs = [
+        ("pandas DataFrame per entry", args.fsync_entries, bench_pandas, {}),
+        ("writer, fsync each entry", args.fsync_entries, bench_writer, {'policy': FLUSH_EACH}),
+        ("writer, group commit x100", args.entries, bench_writer, {'policy': FLUSH_GROUP, 'group_size': 100}),
+        ("writer, group commit x1000", args.entries, bench_writer, {'policy': FLUSH_GROUP, 'group_size': 1000}),
+        ("writer, fsync every 1 s", args.entries, bench_writer, {'policy': FLUSH_INTERVAL, 'interval': 1.0}),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (label, count, func, kwargs) in enumerate(runs):
+            elapsed = func(os.path.join(tmp, f"entries-{i}.csv"), count, **kwargs)
+            print(f"{label:30s} {count:8,} entries  {elapsed:7.2f} s  {count / elapsed:12,.0f} appends/s")
+
+if __name__ == "__main__":
+    main()
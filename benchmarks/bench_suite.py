@@ -0,0 +1,476 @@
+"""Benchmark suite for the HSN loader, the tax engine, entry storage and export,
+with results saved as JSON and compared against a baseline.
+
+Everything runs on synthetic data made from a fixed seed: an HSN master
+workbook in the HSN_SAC.xlsx layout (--master-rows, 20k to 100k) and an
+entry history (--entries, 10k to 10M) cycled from a pool of generated
+entries, so only the code under test is timed, never the generator.
+Each case runs in a scratch directory of its own, through the same
+functions the app calls (load_hsn_codes, storage.save_entry,
+export_engine.export, ...).
+
+Per case it reports the best wall time of --repeat runs, items per
+second, and the peak of Python allocations in one extra run under
+tracemalloc (allocations inside SQLite and numpy's C code are not
+traced).  Results go to --output; with a baseline present, a case whose
+throughput dropped or whose peak memory grew by more than --tolerance is
+flagged and the exit status is 1.
+
+    python benchmarks/bench_suite.py --save-baseline           # on the release you compare against
+    python benchmarks/bench_suite.py                           # later: compare with that baseline
+    python benchmarks/bench_suite.py --size large --only store export
+    python benchmarks/bench_suite.py --master-rows 100000 --entries 10000000 --no-memory
+
+Baselines are per machine: compare runs made on the same hardware with
+the same --size.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage
+from bench_archive import synthetic_entries
+from tax_logic import (SLABS, calculate_tax, calculate_tax_paise, calculate_tax_paise_batch,
+                       to_paise_batch)
+
+RESULTS_VERSION = 1
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, "latest.json")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+WORKBOOK = "HSN_SAC.xlsx"
+
+# master rows, entries, save_entry calls
+SIZES = {
+    'small': (20_000, 10_000, 1_000),
+    'medium': (50_000, 1_000_000, 2_000),
+    'large': (100_000, 10_000_000, 5_000),
+}
+ENTRY_POOL = 10_000
+APPEND_BATCH = 10_000
+SEARCH_QUERIES = 500
+# Differences smaller than this are noise whatever the ratio
+MIN_MEMORY_DELTA = 1 << 20
+
+WORDS = ("plastic steel cotton woven fabric tubes pipes fittings machines parts electric motors "
+         "pumps valves bottles paper printed books rubber tyres glass wood furniture fish frozen "
+         "fresh meat dried fruits vegetables wheat rice flour sugar tea coffee spices oils seeds "
+         "chemicals organic inorganic acids salts medicines surgical instruments optical lenses "
+         "copper aluminium iron alloy wire cables sheets plates bars rods tools knives vehicles "
+         "bicycles toys games footwear leather bags yarn silk wool synthetic knitted apparel "
+         "ceramic tiles cement stone marble jewellery silver gold watches clocks lamps batteries").split()
+
+
+# Synthetic data
+
+def synthetic_master(rows, seed=0):
+    """(codes, descriptions) shaped like the HSN master: chapters, headings, subheadings, tariff lines"""
+    rnd = random.Random(seed)
+    codes, descriptions = [], []
+
+    def add(code):
+        codes.append(code)
+        descriptions.append(" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 10))).upper())
+
+    # Each chapter gets an even share; headings and subheadings are nested under it
+    per_chapter = max(1, rows // 98)
+    for chapter in range(1, 99):
+        if len(codes) >= rows:
+            break
+        add(f"{chapter:02d}")
+        budget = min(per_chapter, rows - len(codes)) - 1
+        heading = 0
+        while budget > 0 and heading < 99:
+            heading += 1
+            head = f"{chapter:02d}{heading:02d}"
+            add(head)
+            budget -= 1
+            for sub in range(1, 10):
+                if budget <= 0:
+                    break
+                subheading = f"{head}{sub}0"
+                add(subheading)
+                budget -= 1
+                for line in range(1, min(budget, 9) + 1):
+                    add(f"{subheading}{line:02d}")
+                    budget -= 1
+    while len(codes) < rows:
+        # Very large masters run out of the nested scheme; fill with tariff lines
+        add(f"99{len(codes):06d}")
+    return codes, descriptions
+
+
+def write_master_xlsx(path, codes, descriptions):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("HSN_MSTR")
+    ws.append(["HSN_CD", "HSN_Description"])
+    for row in zip(codes, descriptions):
+        ws.append(row)
+    wb.save(path)
+
+
+def tax_lines(count, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.uniform(1, 500000, count), 2)
+    slabs = [SLABS[i] for i in rng.integers(0, len(SLABS), count)]
+    return values, slabs
+
+
+class Context:
+    """Synthetic inputs shared by the cases, made once per suite run"""
+
+    def __init__(self, workdir, master_rows, entries, save_entries, seed):
+        self.workdir = workdir
+        self.master_rows = master_rows
+        self.entries = entries
+        self.save_entries = save_entries
+        self.seed = seed
+        self._master = None
+        self._pool = None
+        self._lines = None
+        self.populated = None
+
+    def scratch(self, name):
+        return tempfile.mkdtemp(prefix=name + "-", dir=self.workdir)
+
+    def master(self):
+        """(workbook path, codes, descriptions)"""
+        if self._master is None:
+            codes, descriptions = synthetic_master(self.master_rows, self.seed)
+            path = os.path.join(self.scratch("master"), WORKBOOK)
+            write_master_xlsx(path, codes, descriptions)
+            self._master = (path, codes, descriptions)
+        return self._master
+
+    def entry_pool(self):
+        if self._pool is None:
+            self._pool = list(synthetic_entries(min(self.entries, ENTRY_POOL), seed=self.seed))
+        return self._pool
+
+    def history(self, count=None):
+        return itertools.islice(itertools.cycle(self.entry_pool()), count or self.entries)
+
+    def lines(self):
+        if self._lines is None:
+            self._lines = tax_lines(self.entries, self.seed)
+        return self._lines
+
+
+def use_store_dir(directory):
+    """Point storage's process-wide store at a fresh data/ under directory"""
+    if storage._store is not None:
+        storage._store.close()
+        storage._store = None
+    os.chdir(directory)
+
+
+# Cases: prepare(ctx) -> state, untimed; run(state) -> items processed
+
+def prepare_load_cold(ctx):
+    path, _, _ = ctx.master()
+    directory = ctx.scratch("load-cold")
+    shutil.copy2(path, directory)
+    os.chdir(directory)
+    return ctx.master_rows
+
+
+def prepare_load_warm(ctx):
+    expected = prepare_load_cold(ctx)
+    run_load(expected)
+    return expected
+
+
+def run_load(expected):
+    from hsn_loader import load_hsn_codes
+
+    codes, _ = load_hsn_codes()
+    if len(codes) != expected:
+        raise RuntimeError(f"load_hsn_codes returned {len(codes)} codes, expected {expected}")
+    return len(codes)
+
+
+def prepare_search_build(ctx):
+    return ctx.master()[2]
+
+
+def run_search_build(descriptions):
+    from hsn_search import DescriptionIndex
+
+    return len(DescriptionIndex(descriptions))
+
+
+def prepare_search_query(ctx):
+    from hsn_search import DescriptionIndex
+
+    rnd = random.Random(ctx.seed)
+    queries = [" ".join(rnd.sample(WORDS, rnd.randint(1, 3))) for _ in range(SEARCH_QUERIES)]
+    return DescriptionIndex(ctx.master()[2]), queries
+
+
+def run_search_query(state):
+    index, queries = state
+    for query in queries:
+        index.search(query, 20)
+    return len(queries)
+
+
+def run_tax_scalar(lines):
+    values, slabs = lines
+    for value, slab in zip(values.tolist(), slabs):
+        calculate_tax(value, slab)
+    return len(slabs)
+
+
+def prepare_paise_scalar(ctx):
+    values, slabs = ctx.lines()
+    return to_paise_batch(values).tolist(), slabs
+
+
+def run_paise_scalar(state):
+    paise, slabs = state
+    for base, slab in zip(paise, slabs):
+        calculate_tax_paise(base, slab)
+    return len(slabs)
+
+
+def run_paise_batch(lines):
+    values, slabs = lines
+    calculate_tax_paise_batch(to_paise_batch(values), slabs)
+    return len(slabs)
+
+
+def prepare_save_entry(ctx):
+    use_store_dir(ctx.scratch("save-entry"))
+    return list(ctx.history(ctx.save_entries))
+
+
+def run_save_entry(entries):
+    for entry in entries:
+        storage.save_entry(entry)
+    return len(entries)
+
+
+def prepare_append(ctx):
+    directory = ctx.scratch("store")
+    use_store_dir(directory)
+    return ctx, directory
+
+
+def run_append(state):
+    ctx, directory = state
+    store = storage.get_store()
+    entries = ctx.history()
+    count = 0
+    while True:
+        batch = list(itertools.islice(entries, APPEND_BATCH))
+        if not batch:
+            break
+        store.append_many(batch)
+        count += len(batch)
+    ctx.populated = directory
+    return count
+
+
+def prepare_export(ctx):
+    if ctx.populated is None:
+        run_append(prepare_append(ctx))
+    use_store_dir(ctx.populated)
+    return os.path.join(ctx.scratch("export"), "entries.csv")
+
+
+def run_export(dest):
+    from export_engine import export
+
+    rows, _ = export(dest)
+    os.remove(dest)
+    return rows
+
+
+# (name, what an item is, prepare, run)
+CASES = [
+    ("load_hsn_codes.cold", "codes", prepare_load_cold, run_load),
+    ("load_hsn_codes.warm", "codes", prepare_load_warm, run_load),
+    ("hsn_search.build", "descriptions", prepare_search_build, run_search_build),
+    ("hsn_search.query", "queries", prepare_search_query, run_search_query),
+    ("calculate_tax.scalar", "lines", Context.lines, run_tax_scalar),
+    ("calculate_tax_paise.scalar", "lines", prepare_paise_scalar, run_paise_scalar),
+    ("calculate_tax_paise.batch", "lines", Context.lines, run_paise_batch),
+    ("save_entry", "entries", prepare_save_entry, run_save_entry),
+    ("store.append_many", "entries", prepare_append, run_append),
+    ("export_csv", "rows", prepare_export, run_export),
+]
+
+
+def measure(ctx, prepare, run, repeat, memory=True):
+    times = []
+    for _ in range(repeat):
+        state = prepare(ctx)
+        started = time.perf_counter()
+        items = run(state)
+        times.append(time.perf_counter() - started)
+    peak = None
+    if memory:
+        state = prepare(ctx)
+        tracemalloc.start()
+        try:
+            run(state)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    best = min(times)
+    return {"items": items, "seconds": best, "runs": times,
+            "per_second": items / best if best > 0 else None, "peak_bytes": peak}
+
+
+# Results and baselines
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment():
+    import numpy as np
+
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count(), "numpy": np.__version__,
+            "sqlite": sqlite3.sqlite_version, "storage_backend": storage.STORAGE_BACKEND,
+            "commit": git_commit()}
+
+
+def write_results(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Not a version {RESULTS_VERSION} results file: {path}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """[(case, message)] for throughput drops and memory growth beyond tolerance"""
+    regressions = []
+    for name, case in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if not old:
+            continue
+        if case.get("per_second") and old.get("per_second"):
+            ratio = case["per_second"] / old["per_second"]
+            if ratio < 1 / (1 + tolerance):
+                regressions.append((name, f"{old['per_second']:,.0f} -> {case['per_second']:,.0f} "
+                                          f"{case['unit']}/s ({(1 - ratio) * 100:.0f}% lower)"))
+        if case.get("peak_bytes") is not None and old.get("peak_bytes") is not None:
+            grown = case["peak_bytes"] - old["peak_bytes"]
+            if grown > MIN_MEMORY_DELTA and case["peak_bytes"] > old["peak_bytes"] * (1 + tolerance):
+                regressions.append((name, f"peak {old['peak_bytes'] / 2**20:.1f} -> "
+                                          f"{case['peak_bytes'] / 2**20:.1f} MiB"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="small",
+                        help="small: 20k codes, 10k entries; medium: 50k, 1M; large: 100k, 10M")
+    parser.add_argument("--master-rows", type=int, help="HSN master rows (overrides --size)")
+    parser.add_argument("--entries", type=int, help="entry history and tax lines (overrides --size)")
+    parser.add_argument("--save-entries", type=int, help="save_entry calls, each one a commit")
+    parser.add_argument("--only", nargs="+", metavar="PREFIX", help="run the cases starting with these")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best counts")
+    parser.add_argument("--no-memory", action="store_true", help="skip the extra tracemalloc run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed throughput drop / memory growth before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    master_rows, entries, save_entries = SIZES[args.size]
+    master_rows = args.master_rows or master_rows
+    entries = args.entries or entries
+    save_entries = min(args.save_entries or save_entries, entries)
+    cases = [case for case in CASES
+             if not args.only or any(case[0].startswith(prefix) for prefix in args.only)]
+    if not cases:
+        parser.error("--only matched no case; cases are " + ", ".join(case[0] for case in CASES))
+
+    params = {"size": args.size, "master_rows": master_rows, "entries": entries,
+              "save_entries": save_entries, "repeat": args.repeat, "seed": args.seed}
+    results = {"version": RESULTS_VERSION, "created": datetime.now().isoformat(timespec="seconds"),
+               "environment": environment(), "params": params, "cases": {}}
+    print(f"{master_rows:,} HSN codes, {entries:,} entries, {save_entries:,} save_entry calls, "
+          f"best of {args.repeat}")
+    print()
+    print(f"{'case':28s} {'items':>11s} {'best':>10s} {'throughput':>12s} {'':15s} {'peak':>10s}")
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="hsn-bench-")
+    try:
+        ctx = Context(workdir, master_rows, entries, save_entries, args.seed)
+        for name, unit, prepare, run in cases:
+            case = measure(ctx, prepare, run, args.repeat, memory=not args.no_memory)
+            case["unit"] = unit
+            results["cases"][name] = case
+            peak = f"{case['peak_bytes'] / 2**20:7.1f} MiB" if case["peak_bytes"] is not None else f"{'-':>10s}"
+            print(f"{name:28s} {case['items']:11,} {case['seconds']:8.3f} s "
+                  f"{case['per_second']:12,.0f} {unit + '/s':15s} {peak}", flush=True)
+    finally:
+        use_store_dir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_results(args.output, results)
+    print()
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        write_results(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to store one")
+        return
+
+    baseline = load_results(args.baseline)
+    print(f"Compared with baseline of {baseline['created']} (commit {baseline['environment'].get('commit')})")
+    sizes = {key: value for key, value in params.items() if key != "repeat"}
+    if {key: baseline["params"].get(key) for key in sizes} != sizes:
+        print(f"Note: baseline was run with {baseline['params']}")
+    regressions = compare(results, baseline, args.tolerance)
+    for name, message in regressions:
+        print(f"REGRESSION {name}: {message}")
+    if regressions:
+        sys.exit(1)
+    print(f"OK: no case more than {args.tolerance:.0%} slower or larger than the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Throughput of the scalar calculate_tax loop against calculate_tax_batch,
+and of the fixed-point paise engine against a decimal.Decimal loop.
+
+    python benchmarks/bench_tax.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from tax_logic import (SLABS, SLAB_RATES, calculate_tax, calculate_tax_batch, slab_codes,
+                       calculate_tax_paise_batch, to_paise_batch)
+
+def make_lines(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.uniform(1, 500000, rows), 2)
+    slabs = [SLABS[i] for i in rng.integers(0, len(SLABS), rows)]
+    return values, slabs
+
+def bench_scalar(values, slabs):
+    start = time.perf_counter()
+    out = [calculate_tax(v, s) for v, s in zip(values.tolist(), slabs)]
+    return time.perf_counter() - start, out
+
+def bench_batch(values, slabs):
+    start = time.perf_counter()
+    out = calculate_tax_batch(values, slabs)
+    return time.perf_counter() - start, out
+
+def bench_decimal(values, slabs):
+    rates = {slab: Decimal(str(cgst)) / 100 for slab, (cgst, _) in SLAB_RATES.items()}
+    paisa = Decimal("0.01")
+    start = time.perf_counter()
+    out = [(Decimal(v) * rates[s]).quantize(paisa, rounding=ROUND_HALF_UP)
+           for v, s in zip(map(str, values.tolist()), slabs)]
+    return time.perf_counter() - start, out
+
+def bench_paise(values, slabs):
+    start = time.perf_counter()
+    out = calculate_tax_paise_batch(to_paise_batch(values), slabs)
+    return time.perf_counter() - start, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    values, slabs = make_lines(args.rows)
+    scalar_time, scalar_out = min((bench_scalar(values, slabs) for _ in range(args.repeat)), key=lambda r: r[0])
+    batch_time, batch_out = min((bench_batch(values, slabs) for _ in range(args.repeat)), key=lambda r: r[0])
+    series = pd.Series(slabs)
+    series_time, _ = min((bench_batch(values, series) for _ in range(args.repeat)), key=lambda r: r[0])
+    codes = slab_codes(series)
+    codes_time, _ = min((bench_batch(values, codes) for _ in range(args.repeat)), key=lambda r: r[0])
+
+    # The batch engine must agree with the scalar function bit for bit
+    cgst = np.array([c for c, _ in scalar_out])
+    assert np.array_equal(cgst, batch_out['cgst']), "batch CGST differs from scalar"
+
+    print(f"rows: {args.rows}")
+    print(f"{'scalar loop:':24s}{scalar_time:8.3f} s  {args.rows / scalar_time:14,.0f} rows/s")
+    decimal_time, decimal_out = min((bench_decimal(values, slabs) for _ in range(args.repeat)), key=lambda r: r[0])
+    paise_time, paise_out = min((bench_paise(values, series) for _ in range(args.repeat)), key=lambda r: r[0])
+
+    # Integer paise must agree exactly with Decimal half-up rounding
+    assert [int(d * 100) for d in decimal_out] == paise_out['cgst'].tolist(), "paise CGST differs from Decimal"
+
+    for label, elapsed in (("batch (list of labels)", batch_time),
+                           ("batch (pandas Series)", series_time),
+                           ("batch (slab codes)", codes_time)):
+        print(f"{label + ':':24s}{elapsed:8.3f} s  {args.rows / elapsed:14,.0f} rows/s"
+              f"  {scalar_time / elapsed:6.1f}x")
+
+    print(f"{'decimal loop:':24s}{decimal_time:8.3f} s  {args.rows / decimal_time:14,.0f} rows/s")
+    print(f"{'paise batch:':24s}{paise_time:8.3f} s  {args.rows / paise_time:14,.0f} rows/s"
+          f"  {decimal_time / paise_time:6.1f}x")
+
+if __name__ == "__main__":
+    main()
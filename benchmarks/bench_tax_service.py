@@ -0,0 +1,180 @@
+"""Load test of tax_service.py on localhost.
+
+Starts the service in a child process (or uses one already running with
+--port), then opens --clients keep-alive connections that send requests
+back to back for --seconds per scenario:
+
+  single   POST /tax, one line item per request (coalesced by the service)
+  batch    POST /tax/batch with --batch-size line items per request
+  lookup   GET /hsn/<code>
+  search   GET /search?q=...
+
+and reports requests/s, line items/s and latency percentiles.  One result
+of each tax scenario is checked against tax_logic.  The client runs in
+one Python process, so on a small machine it competes with the service
+for CPU; the items/s it reports is a lower bound.
+
+    python benchmarks/bench_tax_service.py --clients 64 --batch-size 1000
+    python benchmarks/bench_tax_service.py --port 8765 --scenarios batch   # against a running service
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tax_logic import SLABS, calculate_tax_paise, format_paise, to_paise
+
+SCENARIOS = ('single', 'batch', 'lookup', 'search')
+SEARCH_WORDS = ['pipes', 'cotton', 'steel', 'bottles', 'paper', 'engine', 'fish', 'rubber tyres',
+                'plastic fittings', 'wheat']
+STARTUP_TIMEOUT = 120
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_service(port):
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "tax_service.py"), "--port", str(port)],
+                               cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    started = time.time()
+    for line in process.stdout:
+        if "listening on" in line:
+            print(line.strip())
+            return process
+        if time.time() - started > STARTUP_TIMEOUT:
+            break
+    process.kill()
+    raise RuntimeError(f"tax_service.py did not start (exit status {process.poll()})")
+
+async def request(reader, writer, method, path, body=None):
+    """(status, parsed JSON) over an open keep-alive connection"""
+    data = b"" if body is None else json.dumps(body, separators=(",", ":")).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+def line_item(codes, rng):
+    return {"hsn": rng.choice(codes), "base_value": f"{rng.randint(1, 10_000_000) / 100:.2f}",
+            "slab": rng.choice(SLABS)}
+
+def expected(item):
+    base = to_paise(item["base_value"])
+    cgst, sgst = calculate_tax_paise(base, item["slab"])
+    return {"cgst": format_paise(cgst), "sgst": format_paise(sgst),
+            "final_amount": format_paise(base + cgst + sgst)}
+
+def check(item, result):
+    want = expected(item)
+    got = {key: result.get(key) for key in want}
+    if got != want:
+        raise AssertionError(f"{item}: service returned {got}, expected {want}")
+
+def make_request(scenario, codes, rng, batch_size):
+    """(method, path, body, line items)"""
+    if scenario == 'single':
+        return "POST", "/tax", line_item(codes, rng), 1
+    if scenario == 'batch':
+        return "POST", "/tax/batch", {"items": [line_item(codes, rng) for _ in range(batch_size)]}, batch_size
+    if scenario == 'lookup':
+        return "GET", f"/hsn/{rng.choice(codes)}", None, 0
+    return "GET", f"/search?q={rng.choice(SEARCH_WORDS).replace(' ', '+')}&limit=10", None, 0
+
+async def client(port, scenario, codes, batch_size, deadline, seed, latencies, counts):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**26)
+    # Bodies are built before the clock starts on each request so the
+    # latency is the service's, not the JSON encoder's
+    method, path, body, items = make_request(scenario, codes, rng, batch_size)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, response = await request(reader, writer, method, path, body)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f"{method} {path}: HTTP {status} {response}")
+            if counts[0] == 0 and scenario in ('single', 'batch'):
+                check(body if scenario == 'single' else body["items"][0],
+                      response if scenario == 'single' else response["results"][0])
+            counts[0] += 1
+            counts[1] += items
+            if scenario == 'single':
+                method, path, body, items = make_request(scenario, codes, rng, batch_size)
+    finally:
+        writer.close()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+async def run(port, scenarios, clients, batch_size, seconds):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**26)
+    _, health = await request(reader, writer, "GET", "/health")
+    _, listing = await request(reader, writer, "GET", "/hsn?prefix=&limit=1000")
+    writer.close()
+    # Real codes, so every line item is valid
+    codes = [row["code"] for row in listing["results"]] if listing.get("results") else []
+    if not codes:
+        raise RuntimeError("service returned no HSN codes")
+    print(f"Service has {health['codes']:,} HSN codes; {clients} clients, {seconds:g} s per scenario")
+    print()
+    print(f"{'scenario':10s} {'requests/s':>11s} {'items/s':>11s} {'p50':>9s} {'p99':>9s} {'max':>9s}")
+    for scenario in scenarios:
+        latencies, counts = [], [0, 0]
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(*(client(port, scenario, codes, batch_size, deadline, seed, latencies, counts)
+                               for seed in range(clients)))
+        elapsed = time.perf_counter() - started
+        items = f"{counts[1] / elapsed:11,.0f}" if counts[1] else f"{'-':>11s}"
+        print(f"{scenario:10s} {counts[0] / elapsed:11,.0f} {items} "
+              f"{percentile(latencies, 0.5) * 1000:6.2f} ms {percentile(latencies, 0.99) * 1000:6.2f} ms "
+              f"{max(latencies, default=0) * 1000:6.1f} ms")
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, health = await request(reader, writer, "GET", "/health")
+    writer.close()
+    if health.get("tax_batches"):
+        print()
+        print(f"Service coalesced /tax requests into {health['tax_batches']:,} batches, "
+              f"largest {health['largest_batch']:,}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, help="use a service already running on this port")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent keep-alive connections")
+    parser.add_argument("--batch-size", type=int, default=1000, help="line items per /tax/batch request")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        process = start_service(port)
+    try:
+        asyncio.run(run(port, args.scenarios, args.clients, args.batch_size, args.seconds))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
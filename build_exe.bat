@@ -1,5 +1,7 @@
 @echo off
 echo Building HSN Tax Calculator executable...
-pyinstaller --onefile --windowed --icon=NONE --add-data "HSN_SAC.xlsx;." --add-data ".env;." --name "HSN_Tax_Calculator" main.py
+python hsn_cache.py HSN_SAC.xlsx
+python hsn_search.py HSN_SAC.xlsx
+pyinstaller --onefile --windowed --icon=NONE --add-data "HSN_SAC.xlsx;." --add-data "HSN_SAC.hsnc;." --add-data "HSN_SAC.hsnx;." --add-data ".env;." --name "HSN_Tax_Calculator" main.py
 echo Build complete! Executable is in the dist folder.
 pause
\ No newline at end of file
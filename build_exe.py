@@ -1,21 +1,90 @@
+"""Build the HSN Tax Calculator executable with PyInstaller.
+
+Profiles:
+  onefile  one self-extracting executable; every launch unpacks the Python
+           runtime, the libraries and the workbook to a temporary directory
+  fast     onedir bundle that starts in place: ships the precompiled HSN
+           cache and search index (.hsnc/.hsnx) instead of HSN_SAC.xlsx and
+           leaves out pandas and the modules the app never imports
+
+    python build_exe.py                  # onefile, dist/HSN_Tax_Calculator(.exe)
+    python build_exe.py --profile fast   # dist/fast/HSN_Tax_Calculator/
+    python build_exe.py --profile fast --no-archive   # also without pyarrow/numpy
+
+Measure the result with benchmarks/bench_bundle.py.
+"""
 import PyInstaller.__main__
+import argparse
 import os
 import sys
+from hsn_cache import build_cache, cache_path_for
+from hsn_search import index_path_for, load_index
+
+NAME = "HSN_Tax_Calculator"
+WORKBOOK = "HSN_SAC.xlsx"
+
+# pandas only parses the workbook when the cache is rebuilt, and the fast
+# bundle ships the cache without the workbook.  openpyxl stays for XLSX
+# export, minus the pandas/numpy adapters that pull pandas back in.
+FAST_EXCLUDES = [
+    'pandas', 'tkinter', 'unittest', 'pydoc', 'doctest', 'xmlrpc', 'lib2to3', 'pdb',
+    'IPython', 'matplotlib', 'scipy', 'pytest',
+    'numpy.tests', 'numpy.f2py', 'numpy.distutils', 'pyarrow.tests',
+    'openpyxl.utils.dataframe', 'openpyxl.utils.inference',
+    'PyQt5.QtNetwork', 'PyQt5.QtQml', 'PyQt5.QtQuick', 'PyQt5.QtSql', 'PyQt5.QtWebEngineWidgets',
+]
+# Only needed to read months rolled into data/archive (see entry_archive)
+ARCHIVE_MODULES = ['pyarrow', 'numpy']
+
+def add_data(path):
+    # PyInstaller separates source and destination with ';' on Windows and ':' elsewhere
+    return f"--add-data={os.path.abspath(path)}{os.pathsep}."
+
+def precompile(workbook=WORKBOOK):
+    """Build the HSN cache and search index so the bundled app never parses the workbook"""
+    build_cache(workbook)
+    load_index(workbook)
+    cache = cache_path_for(workbook)
+    return [cache, index_path_for(cache)]
+
+def pyinstaller_args(profile, compiled, distpath=None, workpath=None, archive=True):
+    args = ['main.py', f'--name={NAME}', '--windowed', '--clean', '--noconfirm']
+    if os.path.exists('.env'):
+        args.append(add_data('.env'))
+    args += [add_data(path) for path in compiled]
+    if profile == 'fast':
+        distpath = distpath or os.path.join('dist', 'fast')
+        workpath = workpath or os.path.join('build', 'fast')
+        # Keep the generated spec out of the way of the checked-in onefile spec
+        args += ['--onedir', f'--distpath={distpath}', f'--workpath={workpath}',
+                 f'--specpath={workpath}']
+        excludes = FAST_EXCLUDES if archive else FAST_EXCLUDES + ARCHIVE_MODULES
+        args += [f'--exclude-module={module}' for module in excludes]
+    else:
+        args += ['--onefile', '--icon=NONE', add_data(WORKBOOK)]
+        if distpath:
+            args.append(f'--distpath={distpath}')
+        if workpath:
+            args.append(f'--workpath={workpath}')
+        if sys.platform == 'win32':
+            args += ['--target-architecture=x86_64', '--uac-admin']
+    return args, distpath or 'dist'
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the HSN Tax Calculator executable")
+    parser.add_argument("--profile", choices=['onefile', 'fast'], default='onefile')
+    parser.add_argument("--distpath", help="output directory (default: dist, or dist/fast)")
+    parser.add_argument("--workpath", help="PyInstaller work directory")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="fast profile: leave out pyarrow, so archived months can't be read")
+    args = parser.parse_args()
+
+    args_list, distpath = pyinstaller_args(args.profile, precompile(), args.distpath, args.workpath,
+                                           archive=not args.no_archive)
+    PyInstaller.__main__.run(args_list)
 
-# Create the spec file first
-PyInstaller.__main__.run([
-    'main.py',
-    '--name=HSN_Tax_Calculator',
-    '--windowed',  # No console window
-    '--onefile',   # Single executable file
-    '--icon=NONE', # Replace with path to your icon if you have one
-    '--add-data=HSN_SAC.xlsx;.',  # Include the Excel file
-    '--add-data=.env;.',  # Include the .env file
-    '--target-architecture=x86_64',  # Target 64-bit Windows
-    '--clean',  # Clean PyInstaller cache
-    '--noconfirm',  # Replace output directory without asking
-    '--uac-admin'  # Request admin privileges (helps with compatibility)
-])
-
-print("Executable created successfully in the dist folder!")
-print(f"Path: {os.path.abspath('dist/HSN_Tax_Calculator.exe')}")
\ No newline at end of file
+    print("Executable created successfully!")
+    if args.profile == 'fast':
+        print(f"Path: {os.path.abspath(os.path.join(distpath, NAME))} (ship the whole folder)")
+    else:
+        print(f"Path: {os.path.abspath(os.path.join(distpath, NAME + ('.exe' if sys.platform == 'win32' else '')))}")
@@ -0,0 +1,400 @@
+"""Headless bulk GST computation for invoice line items.
+
+Reads a CSV or XLSX of line items in fixed-size chunks, validates each HSN
+code against the HSN master, computes exact tax with the fixed-point engine
+in tax_logic and streams the results to a CSV (or .csv.gz) file, so memory
+use does not grow with the input.
+
+    python bulk_invoice.py lines.xlsx -o taxed.csv --chunk-size 50000
+
+Input columns (case-insensitive, common aliases accepted): HSN, QtyType,
+Qty, BaseValue, TaxSlab.
+
+With --workers N the work is spread over a process pool.  Plain CSV input
+is split into byte-range shards on line boundaries so parsing runs in the
+workers too (fields must not contain embedded newlines); other inputs are
+parsed here and handed out as row-range chunks.  Each worker maps the HSN
+cache read-only, and results are written in input order, so the output is
+identical to a single-process run.
+"""
+import argparse
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+
+from hsn_cache import load_table
+from hsn_index import normalize_code
+from hsn_loader import hsn_workbook_path
+from tax_logic import (ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_UP,
+                       calculate_tax_paise_batch, format_paise_batch, parse_paise, slab_codes)
+
+INPUT_COLUMNS = ['HSN', 'QtyType', 'Qty', 'BaseValue', 'TaxSlab']
+OUTPUT_COLUMNS = ['HSN', 'Description', 'QtyType', 'Qty', 'BaseValue', 'TaxSlab',
+                  'CGST', 'SGST', 'TotalTax', 'FinalAmount', 'Error']
+
+COLUMN_ALIASES = {
+    'hsn': 'HSN', 'hsn_cd': 'HSN', 'hsn code': 'HSN', 'hsn_code': 'HSN',
+    'qtytype': 'QtyType', 'qty type': 'QtyType', 'qty_type': 'QtyType', 'unit': 'QtyType', 'uqc': 'QtyType',
+    'qty': 'Qty', 'quantity': 'Qty',
+    'basevalue': 'BaseValue', 'base value': 'BaseValue', 'base_value': 'BaseValue',
+    'taxable value': 'BaseValue', 'taxable_value': 'BaseValue', 'value': 'BaseValue',
+    'taxslab': 'TaxSlab', 'tax slab': 'TaxSlab', 'tax_slab': 'TaxSlab', 'slab': 'TaxSlab', 'rate': 'TaxSlab',
+}
+
+DEFAULT_CHUNK_SIZE = 50_000
+# to_csv defaults to os.linesep; pin it so headers, serial and parallel runs agree on Windows
+LINE_TERMINATOR = '\n'
+# Upper bound on the bytes a worker reads into memory for one CSV shard
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+
+def load_master(xlsx_path=None):
+    """Return {code: description} for the HSN master, via the compiled cache"""
+    codes, descriptions = load_table(xlsx_path or hsn_workbook_path())
+    return dict(zip(codes, descriptions))
+
+
+def canonical_columns(columns):
+    """Map input headers to INPUT_COLUMNS names; unknown headers are kept as is"""
+    return [COLUMN_ALIASES.get(str(c).strip().lower(), str(c).strip()) for c in columns]
+
+
+def _number_text(value):
+    """12.0 -> "12", 0.25 -> "0.25" (never a float's ".0" or exponent noise)"""
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(round(value, 10))
+    return str(value)
+
+
+def cell_text(cell, column):
+    """Render an XLSX cell the way it reads in Excel, for column"""
+    value = cell.value
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)
+    if column == 'TaxSlab' and '%' in (cell.number_format or ''):
+        # A percent-formatted 0.18 shows as 18%
+        return _number_text(value * 100) + '%'
+    return _number_text(value)
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows, all values as strings"""
+    import pandas as pd
+
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows()
+            header = canonical_columns(cell.value for cell in next(rows, ()))
+            batch = []
+            for row in rows:
+                batch.append([cell_text(cell, column) for cell, column in zip(row, header)])
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            wb.close()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            chunk.columns = canonical_columns(chunk.columns)
+            yield chunk
+
+
+def _normalize_slabs(slabs):
+    """Accept "18", "18.0" and " 18 %" as well as "18%" """
+    slabs = slabs.str.replace(' ', '', regex=False)
+    bare = ~slabs.str.endswith('%')
+    slabs = slabs.where(~bare, slabs.str.replace(r'\.0+$', '', regex=True) + '%')
+    return slabs
+
+
+def parse_values(values):
+    """Exact paise of taxable value strings, as tax_logic.parse_paise reads them
+    (the same as the single-entry form), and a mask of the invalid ones"""
+    import numpy as np
+
+    paise = []
+    bad = []
+    for value in values.tolist():
+        try:
+            paise.append(parse_paise(value.strip()))
+        except (ValueError, AttributeError):
+            paise.append(0)
+            bad.append(len(paise) - 1)
+    mask = np.zeros(len(paise), dtype=bool)
+    mask[bad] = True
+    return np.array(paise, dtype=np.int64), mask
+
+
+def process_chunk(chunk, master, rounding=ROUND_HALF_UP):
+    """Validate and tax one chunk; returns a DataFrame with OUTPUT_COLUMNS"""
+    import numpy as np
+    import pandas as pd
+
+    missing = [c for c in INPUT_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+
+    out = pd.DataFrame(index=chunk.index)
+    hsn = chunk['HSN'].astype(str)
+    # Most codes are already bare digits; only clean up the rest
+    messy = ~hsn.str.isdigit()
+    if messy.any():
+        hsn = hsn.where(~messy, hsn[messy].map(normalize_code))
+    description = hsn.map(master)
+    # A numeric cell loses the leading zero of "0402"; put it back only where
+    # the master knows the padded code and not the code as written
+    unknown = description.isna() & hsn.str.isdigit() & (hsn.str.len() % 2 == 1)
+    if unknown.any():
+        padded = '0' + hsn[unknown]
+        found = padded.map(master).notna()
+        hsn = hsn.where(~unknown, padded.where(found, hsn[unknown]))
+        description = hsn.map(master)
+    out['HSN'] = hsn
+    out['Description'] = description
+    out['QtyType'] = chunk['QtyType']
+    out['Qty'] = chunk['Qty']
+    out['TaxSlab'] = _normalize_slabs(chunk['TaxSlab'].astype(str))
+
+    base, bad_values = parse_values(chunk['BaseValue'])
+    codes = slab_codes(out['TaxSlab'])
+
+    error = np.full(len(chunk), '', dtype=object)
+    error[codes < 0] = 'unknown tax slab'
+    if bad_values.any():
+        error[bad_values] = [f"invalid taxable value {v!r}" for v in chunk['BaseValue'][bad_values]]
+    error[out['Description'].isna().to_numpy()] = 'unknown HSN code'
+    ok = error == ''
+
+    base[~ok] = 0
+    taxed = calculate_tax_paise_batch(base, np.where(ok, codes, -1), rounding)
+
+    for column, key in (('BaseValue', None), ('CGST', 'cgst'), ('SGST', 'sgst'),
+                        ('TotalTax', 'total_tax'), ('FinalAmount', 'final_amount')):
+        paise = base if key is None else taxed[key]
+        out[column] = np.where(ok, np.array(format_paise_batch(paise), dtype=object), '')
+    out['Description'] = out['Description'].fillna('')
+    out['Error'] = error
+    return out[OUTPUT_COLUMNS]
+
+
+def open_output(path):
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'wt', compresslevel=6, newline='', encoding='utf-8')
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+class Progress:
+    """Rows and rows-per-second reporting on stderr"""
+
+    def __init__(self, stream=sys.stderr, quiet=False):
+        self.stream = stream
+        self.quiet = quiet
+        self.start = time.perf_counter()
+        self.rows = 0
+        self.invalid = 0
+
+    def update(self, rows, invalid):
+        self.rows += rows
+        self.invalid += invalid
+        if not self.quiet:
+            print(f"\r{self.rows:,} rows  {self.rate():,.0f} rows/s  {self.invalid:,} invalid",
+                  end='', file=self.stream, flush=True)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def finish(self):
+        if not self.quiet:
+            print(file=self.stream)
+        return {'rows': self.rows, 'invalid': self.invalid,
+                'seconds': self.elapsed(), 'rows_per_second': self.rate()}
+
+
+def run(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, rounding=ROUND_HALF_UP,
+        master=None, quiet=False):
+    """Stream input_path through the tax engine into output_path; returns run statistics"""
+    if master is None:
+        master = load_master()
+    progress = Progress(quiet=quiet)
+    with open_output(output_path) as f:
+        header = True
+        for chunk in read_chunks(input_path, chunk_size):
+            result = process_chunk(chunk, master, rounding)
+            result.to_csv(f, header=header, index=False, lineterminator=LINE_TERMINATOR)
+            header = False
+            progress.update(len(result), int((result['Error'] != '').sum()))
+        if header:
+            f.write(','.join(OUTPUT_COLUMNS) + LINE_TERMINATOR)
+    return progress.finish()
+
+
+# Per-process state of pool workers, set up by _init_worker
+_worker_master = None
+_worker_rounding = ROUND_HALF_UP
+
+
+def _init_worker(master_path, rounding):
+    global _worker_master, _worker_rounding
+    _worker_master = load_master(master_path)
+    _worker_rounding = rounding
+
+
+def csv_shards(path, shard_bytes):
+    """Yield (start, end) byte ranges covering the data rows of a CSV, split on line boundaries"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + shard_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def _process_shard(task):
+    """Worker: parse and tax one byte range of a CSV into a headerless part file"""
+    import pandas as pd
+
+    index, path, start, end, chunk_size, part_path = task
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+
+    rows = invalid = 0
+    with open(part_path, 'w', newline='', encoding='utf-8') as out:
+        for chunk in pd.read_csv(io.BytesIO(header + data), chunksize=chunk_size,
+                                 dtype=str, keep_default_na=False):
+            chunk.columns = canonical_columns(chunk.columns)
+            result = process_chunk(chunk, _worker_master, _worker_rounding)
+            result.to_csv(out, header=False, index=False, lineterminator=LINE_TERMINATOR)
+            rows += len(result)
+            invalid += int((result['Error'] != '').sum())
+    return index, part_path, rows, invalid
+
+
+def _process_rows(chunk):
+    """Worker: tax one row-range chunk"""
+    return process_chunk(chunk, _worker_master, _worker_rounding)
+
+
+def _run_csv_shards(pool, input_path, f, chunk_size, shard_bytes, workers, progress):
+    size = os.path.getsize(input_path)
+    # At least a few shards per worker so a slow shard does not idle the rest
+    shard_bytes = max(1, min(shard_bytes, size // (workers * 4) or 1))
+    part_dir = tempfile.mkdtemp(prefix='bulk_invoice_', dir=os.path.dirname(os.path.abspath(f.name)))
+    try:
+        futures = [pool.submit(_process_shard, (i, input_path, start, end, chunk_size,
+                                                os.path.join(part_dir, f'part-{i:06d}.csv')))
+                   for i, (start, end) in enumerate(csv_shards(input_path, shard_bytes))]
+        # Parts are appended strictly in shard order
+        for future in futures:
+            _, part_path, rows, invalid = future.result()
+            with open(part_path, 'r', newline='', encoding='utf-8') as part:
+                shutil.copyfileobj(part, f, 1 << 20)
+            os.remove(part_path)
+            progress.update(rows, invalid)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+
+def _run_row_chunks(pool, input_path, f, chunk_size, workers, progress):
+    pending = deque()
+
+    def write_oldest():
+        result = pending.popleft().result()
+        result.to_csv(f, header=False, index=False, lineterminator=LINE_TERMINATOR)
+        progress.update(len(result), int((result['Error'] != '').sum()))
+
+    for chunk in read_chunks(input_path, chunk_size):
+        pending.append(pool.submit(_process_rows, chunk))
+        # Bound the chunks in flight so memory stays constant
+        if len(pending) >= workers * 2:
+            write_oldest()
+    while pending:
+        write_oldest()
+
+
+def run_parallel(input_path, output_path, workers, chunk_size=DEFAULT_CHUNK_SIZE,
+                 rounding=ROUND_HALF_UP, master_path=None, quiet=False,
+                 shard_bytes=DEFAULT_SHARD_BYTES):
+    """Like run(), spread over a pool of worker processes; output is in input order"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Make sure the HSN cache exists before the workers try to map it
+    load_master(master_path)
+    progress = Progress(quiet=quiet)
+    with open_output(output_path) as f, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(master_path, rounding)) as pool:
+        f.write(','.join(OUTPUT_COLUMNS) + LINE_TERMINATOR)
+        if input_path.lower().endswith('.csv'):
+            _run_csv_shards(pool, input_path, f, chunk_size, shard_bytes, workers, progress)
+        else:
+            _run_row_chunks(pool, input_path, f, chunk_size, workers, progress)
+    return progress.finish()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compute GST for a file of invoice line items")
+    parser.add_argument("input", help="CSV or XLSX of line items")
+    parser.add_argument("-o", "--output", required=True, help="output CSV (.csv or .csv.gz)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows per chunk (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--rounding", choices=[ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_UP],
+                        default=ROUND_HALF_UP, help="rounding of each tax amount to paise")
+    parser.add_argument("--master", help="HSN master workbook (default: the bundled HSN_SAC.xlsx)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="worker processes (default 1: run in this process)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.input):
+        print(f"Input file not found: {args.input}", file=sys.stderr)
+        return 2
+    if args.chunk_size <= 0 or args.workers <= 0:
+        print("--chunk-size and --workers must be positive", file=sys.stderr)
+        return 2
+
+    try:
+        if args.workers > 1:
+            stats = run_parallel(args.input, args.output, args.workers, args.chunk_size,
+                                 args.rounding, args.master, args.quiet)
+        else:
+            master = load_master(args.master)
+            stats = run(args.input, args.output, args.chunk_size, args.rounding, master, args.quiet)
+    except Exception as e:
+        print(f"Bulk invoice run failed: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Processed {stats['rows']:,} rows ({stats['invalid']:,} invalid) in "
+          f"{stats['seconds']:.2f} s, {stats['rows_per_second']:,.0f} rows/s -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Cached access to the OS keyring for the encryption key and user PINs.
+
+Keyring backends (Windows Credential Manager, Secret Service) can take
+tens of milliseconds per call, and the login flow used to make several
+before any window showed.  CredentialService reads the encryption key
+once and keeps its Fernet, caches user lookups for USER_TTL seconds (the
+encrypted PIN, never the PIN itself), updates or drops cache entries when
+it writes, and times every keyring call.
+
+    python credentials.py          # keyring latency of a cold and a warm login check
+"""
+import threading
+import time
+
+KEY_SERVICE = "HSNAppService"
+KEY_NAME = "encryption_key"
+USER_SERVICE = "HSNApp"
+CURRENT_USER = "current_user"
+USER_TTL = 300
+
+_MISSING = object()
+
+
+class CredentialService:
+    """Keyring front end with an in-process cache; backend defaults to the keyring module"""
+
+    def __init__(self, backend=None, user_ttl=USER_TTL):
+        self._backend = backend
+        self.user_ttl = user_ttl
+        self._key = None
+        self._fernet = None
+        self._users = {}       # username -> (value or None, expires)
+        self._lock = threading.RLock()
+        self.timings = {}      # keyring operation -> [calls, total seconds, slowest]
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            import keyring
+            self._backend = keyring
+        return self._backend
+
+    def _call(self, operation, *args):
+        started = time.perf_counter()
+        try:
+            return getattr(self.backend, operation)(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = self.timings.setdefault(operation, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+    # Encryption key
+
+    def generate_key(self):
+        from cryptography.fernet import Fernet
+
+        key = Fernet.generate_key()
+        self._call("set_password", KEY_SERVICE, KEY_NAME, key.decode())
+        with self._lock:
+            self._key, self._fernet = key, None
+        return key
+
+    def get_key(self):
+        """The app's Fernet key, created on first use"""
+        with self._lock:
+            if self._key is None:
+                try:
+                    key = self._call("get_password", KEY_SERVICE, KEY_NAME)
+                except Exception:
+                    key = None
+                self._key = key.encode() if key else self.generate_key()
+            return self._key
+
+    def fernet(self):
+        with self._lock:
+            if self._fernet is None:
+                from cryptography.fernet import Fernet
+                self._fernet = Fernet(self.get_key())
+            return self._fernet
+
+    # Users
+
+    def _get(self, username, fresh=False):
+        now = time.monotonic()
+        with self._lock:
+            value, expires = self._users.get(username, (_MISSING, 0))
+            if fresh or value is _MISSING or expires <= now:
+                value = self._call("get_password", USER_SERVICE, username)
+                self._users[username] = (value, now + self.user_ttl)
+            return value
+
+    def _set(self, username, value):
+        with self._lock:
+            self._call("set_password", USER_SERVICE, username, value)
+            self._users[username] = (value, time.monotonic() + self.user_ttl)
+
+    def get_user_pin(self, email, fresh=False):
+        """Encrypted PIN stored for email, or None; fresh skips the cache"""
+        return self._get(email, fresh)
+
+    def set_user_pin(self, email, encrypted_pin):
+        self._set(email, encrypted_pin)
+
+    def delete_user(self, email):
+        with self._lock:
+            try:
+                self._call("delete_password", USER_SERVICE, email)
+            finally:
+                self.invalidate(email)
+
+    def current_user(self):
+        return self._get(CURRENT_USER)
+
+    def set_current_user(self, email):
+        self._set(CURRENT_USER, email)
+
+    def is_logged_in(self):
+        email = self.current_user()
+        return bool(email and self.get_user_pin(email))
+
+    def invalidate(self, username=None):
+        """Forget cached lookups of one user (or all), e.g. after another process changed them"""
+        with self._lock:
+            if username is None:
+                self._users.clear()
+            else:
+                self._users.pop(username, None)
+
+    def report(self):
+        """Keyring calls so far, one line per operation"""
+        return "\n".join(f"{operation}: {calls} calls, {total / calls * 1000:.2f} ms avg, "
+                         f"{slowest * 1000:.2f} ms max"
+                         for operation, (calls, total, slowest) in sorted(self.timings.items()))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """The process-wide CredentialService"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CredentialService()
+        return _service
+
+
+if __name__ == "__main__":
+    service = get_service()
+    for label in ("cold", "warm"):
+        started = time.perf_counter()
+        logged_in = service.is_logged_in()
+        service.fernet()
+        print(f"{label}: logged in={logged_in}, {(time.perf_counter() - started) * 1000:.2f} ms")
+    print(service.report())
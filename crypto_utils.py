@@ -1,25 +1,19 @@
-from cryptography.fernet import Fernet
-import keyring
-
-SERVICE = "HSNAppService"
+from credentials import KEY_SERVICE as SERVICE, get_service
 
 def generate_key():
-    key = Fernet.generate_key()
-    keyring.set_password(SERVICE, "encryption_key", key.decode())
+    get_service().generate_key()
 
 def get_key():
-    try:
-        key = keyring.get_password(SERVICE, "encryption_key")
-        if not key:
-            generate_key()
-            key = keyring.get_password(SERVICE, "encryption_key")
-        return key.encode()
-    except:
-        generate_key()
-        return keyring.get_password(SERVICE, "encryption_key").encode()
+    return get_service().get_key()
 
 def encrypt_pin(pin):
-    return Fernet(get_key()).encrypt(pin.encode()).decode()
+    return get_service().fernet().encrypt(pin.encode()).decode()
 
 def decrypt_pin(enc_pin):
-    return Fernet(get_key()).decrypt(enc_pin.encode()).decode()
\ No newline at end of file
+    return get_service().fernet().decrypt(enc_pin.encode()).decode()
+
+def encrypt_bytes(data):
+    return get_service().fernet().encrypt(data)
+
+def decrypt_bytes(token):
+    return get_service().fernet().decrypt(token)
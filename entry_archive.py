@@ -0,0 +1,402 @@
+"""Columnar archive of saved entries, partitioned by month.
+
+Closed months are rolled out of the hot entry store into Parquet files
+under ``data/archive/month=YYYY-MM/``.  A manifest records each file's row
+count and HSN/timestamp ranges, so a query only opens the months and HSN
+chapters it asks for; inside a file, rows are sorted by HSN after
+compaction so Parquet row-group statistics skip the rest.  Money columns are
+integer paise, as in the SQLite store.
+
+Needs pyarrow (``pip install pyarrow``).
+
+    python entry_archive.py roll            # archive every month before this one
+    python entry_archive.py compact
+    python entry_archive.py summary --year 2025 --chapter 39
+"""
+import json
+import os
+import uuid
+from datetime import date
+
+from storage import ARCHIVE_DIR, ENTRY_FIELDS, MONEY_FIELDS, get_store
+from tax_logic import format_paise, to_paise_batch
+
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_TARGET_ROWS = 250_000   # compaction merges files smaller than this
+DEFAULT_ROW_GROUP_SIZE = 64_000
+
+# Entries without a timestamp (the oldest CSV layouts) have no month and stay hot
+DATED = "0000-01-01"
+
+SUMMARY_FIELDS = ['Qty', 'BaseValue', 'CGST', 'SGST', 'TotalTax', 'FinalAmount']
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The entry archive needs pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def _schema():
+    pa = _require_pyarrow()
+    types = {'Qty': pa.float64()}
+    types.update((field, pa.int64()) for field in MONEY_FIELDS)
+    return pa.schema([(field, types.get(field, pa.string())) for field in ENTRY_FIELDS])
+
+
+def _prefix_end(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _number_array(pa, values, paise):
+    import numpy as np
+
+    present = np.fromiter((v not in ('', None) for v in values), dtype=bool, count=len(values))
+    numbers = np.fromiter((float(v) if ok else 0.0 for v, ok in zip(values, present)),
+                          dtype=np.float64, count=len(values))
+    if paise:
+        return pa.array(to_paise_batch(numbers), type=pa.int64(), mask=~present)
+    return pa.array(numbers, type=pa.float64(), mask=~present)
+
+
+def entries_to_table(entries):
+    """Arrow table (archive schema) from a list of entry dicts"""
+    pa = _require_pyarrow()
+    arrays = []
+    for field in ENTRY_FIELDS:
+        values = [entry.get(field, '') for entry in entries]
+        if field in MONEY_FIELDS or field == 'Qty':
+            arrays.append(_number_array(pa, values, paise=field != 'Qty'))
+        else:
+            arrays.append(pa.array(['' if v is None else str(v) for v in values], type=pa.string()))
+    return pa.Table.from_arrays(arrays, schema=_schema())
+
+
+def month_start(month):
+    """ISO timestamp at the start of a YYYY-MM month"""
+    return f"{month}-01"
+
+
+def next_month(month):
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+class _PartWriter:
+    """Streams one month's rows into a new part file, tracking its statistics"""
+
+    def __init__(self, root, month):
+        pa = _require_pyarrow()
+        self.month = month
+        self.name = f"month={month}/part-{uuid.uuid4().hex[:12]}.parquet"
+        self.final_path = os.path.join(root, self.name)
+        self.tmp_path = self.final_path + ".tmp"
+        os.makedirs(os.path.dirname(self.final_path), exist_ok=True)
+        self._writer = pa.parquet.ParquetWriter(self.tmp_path, _schema(), compression="zstd")
+        self.rows = 0
+        self.hsn_min = self.hsn_max = self.ts_min = self.ts_max = None
+
+    def write(self, table, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        pa = _require_pyarrow()
+        for field, low, high in (('HSN', 'hsn_min', 'hsn_max'), ('Timestamp', 'ts_min', 'ts_max')):
+            bounds = pa.compute.min_max(table[field])
+            lo, hi = bounds['min'].as_py(), bounds['max'].as_py()
+            if lo is not None:
+                setattr(self, low, lo if getattr(self, low) is None else min(getattr(self, low), lo))
+                setattr(self, high, hi if getattr(self, high) is None else max(getattr(self, high), hi))
+        self._writer.write_table(table, row_group_size=row_group_size)
+        self.rows += table.num_rows
+
+    def close(self, sorted_by_hsn=False):
+        """Finish the file and return its manifest record"""
+        self._writer.close()
+        os.replace(self.tmp_path, self.final_path)
+        return {
+            'path': self.name,
+            'month': self.month,
+            'rows': self.rows,
+            'bytes': os.path.getsize(self.final_path),
+            'hsn_min': self.hsn_min or '',
+            'hsn_max': self.hsn_max or '',
+            'ts_min': self.ts_min or '',
+            'ts_max': self.ts_max or '',
+            'sorted': sorted_by_hsn,
+        }
+
+
+class EntryArchive:
+    """Month-partitioned Parquet files plus a JSON manifest of their statistics"""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'version': MANIFEST_VERSION, 'files': [], 'pending_delete': None}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"Not a version {MANIFEST_VERSION} archive manifest: {self.manifest_path}")
+        return manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def files(self):
+        return list(self._manifest['files'])
+
+    def months(self):
+        return sorted({record['month'] for record in self._manifest['files']})
+
+    def row_count(self):
+        return sum(record['rows'] for record in self._manifest['files'])
+
+    def select_files(self, start_month=None, end_month=None, chapters=None, hsn_prefix=None):
+        """Manifest records of the files that can hold matching rows (months inclusive)"""
+        selected = []
+        for record in self._manifest['files']:
+            if start_month and record['month'] < start_month:
+                continue
+            if end_month and record['month'] > end_month:
+                continue
+            if chapters and not any(record['hsn_min'][:len(c)] <= c <= record['hsn_max'][:len(c)]
+                                    for c in chapters):
+                continue
+            if hsn_prefix and (record['hsn_max'] < hsn_prefix or record['hsn_min'] >= _prefix_end(hsn_prefix)):
+                continue
+            selected.append(record)
+        return sorted(selected, key=lambda record: record['month'])
+
+    def write_entries(self, entries, batch_size=DEFAULT_BATCH_SIZE):
+        """Write dated entries into new part files, one per month; returns their manifest records.
+
+        The files are not in the manifest (and so not visible to queries)
+        until the caller adds the records with _commit().
+        """
+        buffers = {}
+        writers = {}
+
+        def flush(month):
+            table = entries_to_table(buffers.pop(month))
+            if month not in writers:
+                writers[month] = _PartWriter(self.root, month)
+            writers[month].write(table)
+
+        try:
+            for entry in entries:
+                timestamp = entry.get('Timestamp') or ''
+                if timestamp < DATED:
+                    continue
+                month = timestamp[:7]
+                buffer = buffers.setdefault(month, [])
+                buffer.append(entry)
+                if len(buffer) >= batch_size:
+                    flush(month)
+            for month in list(buffers):
+                flush(month)
+        except BaseException:
+            for writer in writers.values():
+                writer._writer.close()
+                os.remove(writer.tmp_path)
+            raise
+        return [writers[month].close() for month in sorted(writers)]
+
+    def _commit(self, add=(), remove=(), pending_delete=None):
+        removed = {record['path'] for record in remove}
+        files = [r for r in self._manifest['files'] if r['path'] not in removed]
+        self._manifest['files'] = files + list(add)
+        self._manifest['pending_delete'] = pending_delete
+        self._save_manifest()
+
+    def _finish_pending(self, store):
+        end = self._manifest.get('pending_delete')
+        if end:
+            store.delete_entries(keep_summary=True, start=DATED, end=end)
+            self._commit()
+
+    def roll(self, store=None, before_month=None):
+        """Move entries from months before before_month (default: this month) out of
+        the hot store into the archive; returns the number of entries moved.
+
+        The manifest records the pending delete before the hot rows are
+        removed, so an interrupted roll finishes on the next run instead of
+        archiving the same rows twice.
+        """
+        store = store or get_store()
+        self._finish_pending(store)
+        before_month = before_month or date.today().strftime("%Y-%m")
+        filters = {'start': DATED, 'end': month_start(before_month)}
+        records = self.write_entries(store.iter_entries(**filters))
+        if not records:
+            return 0
+        self._commit(add=records, pending_delete=filters['end'])
+        store.delete_entries(keep_summary=True, **filters)
+        self._commit()
+        return sum(record['rows'] for record in records)
+
+    def compact(self, target_rows=DEFAULT_TARGET_ROWS, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        """Merge each month's files smaller than target_rows into one HSN-sorted file.
+
+        A lone file is rewritten too if it is not sorted yet (fresh from a
+        roll), since sorting is what makes row-group statistics useful.
+        Returns {month: number of files merged}.
+        """
+        pa = _require_pyarrow()
+        by_month = {}
+        for record in self._manifest['files']:
+            if record['rows'] < target_rows or not record.get('sorted'):
+                by_month.setdefault(record['month'], []).append(record)
+
+        merged = {}
+        for month, records in sorted(by_month.items()):
+            if len(records) < 2 and records[0].get('sorted'):
+                continue
+            paths = [os.path.join(self.root, record['path']) for record in records]
+            table = pa.parquet.ParquetDataset(paths, schema=_schema()).read()
+            table = table.sort_by([('HSN', 'ascending'), ('Timestamp', 'ascending')])
+            writer = _PartWriter(self.root, month)
+            writer.write(table, row_group_size=row_group_size)
+            self._commit(add=[writer.close(sorted_by_hsn=True)], remove=records,
+                         pending_delete=self._manifest.get('pending_delete'))
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Could not remove compacted archive file {path}: {e}")
+            merged[month] = len(records)
+        return merged
+
+    def _filter(self, start=None, end=None, user=None, hsn_prefix=None, slab=None, chapters=None):
+        ds = _require_pyarrow().dataset
+        expr = None
+
+        def both(a, b):
+            return b if a is None else a & b
+
+        if start:
+            expr = both(expr, ds.field('Timestamp') >= start)
+        if end:
+            expr = both(expr, ds.field('Timestamp') < end)
+        if user:
+            expr = both(expr, ds.field('UserEmail') == user)
+        if slab:
+            expr = both(expr, ds.field('TaxSlab') == slab)
+        if hsn_prefix:
+            expr = both(expr, (ds.field('HSN') >= hsn_prefix) & (ds.field('HSN') < _prefix_end(hsn_prefix)))
+        if chapters:
+            # Ranges rather than string functions, so row-group statistics prune
+            any_chapter = None
+            for c in chapters:
+                clause = (ds.field('HSN') >= c) & (ds.field('HSN') < _prefix_end(c))
+                any_chapter = clause if any_chapter is None else any_chapter | clause
+            expr = both(expr, any_chapter)
+        return expr
+
+    def scan(self, columns=None, start=None, end=None, chapters=None, hsn_prefix=None, **filters):
+        """Arrow table of archived rows; start/end are ISO timestamps (end exclusive)"""
+        ds = _require_pyarrow().dataset
+        records = self.select_files(start_month=start[:7] if start else None,
+                                    end_month=end[:7] if end else None,
+                                    chapters=chapters, hsn_prefix=hsn_prefix)
+        paths = [os.path.join(self.root, record['path']) for record in records]
+        dataset = ds.dataset(paths, schema=_schema(), format="parquet")
+        expr = self._filter(start=start, end=end, chapters=chapters, hsn_prefix=hsn_prefix, **filters)
+        return dataset.to_table(columns=columns, filter=expr)
+
+    def count(self, **filters):
+        """Number of archived rows matching iter_entries-style filters"""
+        if not any(filters.values()):
+            return self.row_count()
+        return self.scan(columns=['HSN'], **filters).num_rows
+
+    def iter_entries(self, batch_size=DEFAULT_BATCH_SIZE, start=None, end=None, hsn_prefix=None, **filters):
+        """Yield archived entries as storage-style dicts, oldest month first"""
+        ds = _require_pyarrow().dataset
+        records = self.select_files(start_month=start[:7] if start else None,
+                                    end_month=end[:7] if end else None, hsn_prefix=hsn_prefix)
+        expr = self._filter(start=start, end=end, hsn_prefix=hsn_prefix, **filters)
+        for record in records:
+            dataset = ds.dataset(os.path.join(self.root, record['path']), schema=_schema(), format="parquet")
+            for batch in dataset.to_batches(filter=expr, batch_size=batch_size):
+                for entry in batch.to_pylist():
+                    for field in MONEY_FIELDS:
+                        value = entry[field]
+                        entry[field] = '' if value is None else format_paise(value)
+                    if entry['Qty'] is None:
+                        entry['Qty'] = ''
+                    yield entry
+
+    def hsn_summary(self, start_month=None, end_month=None, chapters=None, **filters):
+        """Totals per HSN code over the months (inclusive) as a list of dicts, money in paise"""
+        start = month_start(start_month) if start_month else None
+        end = month_start(next_month(end_month)) if end_month else None
+        table = self.scan(columns=['HSN'] + SUMMARY_FIELDS, start=start, end=end,
+                          chapters=chapters, **filters)
+        grouped = table.group_by('HSN').aggregate(
+            [('HSN', 'count')] + [(field, 'sum') for field in SUMMARY_FIELDS])
+        rows = []
+        for row in grouped.sort_by('HSN').to_pylist():
+            summary = {'HSN': row['HSN'], 'Entries': row['HSN_count']}
+            for field in SUMMARY_FIELDS:
+                summary[field] = row[f'{field}_sum'] or 0
+            rows.append(summary)
+        return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Maintain and query the columnar entry archive")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    roll = sub.add_parser("roll", help="move closed months out of the entry store")
+    roll.add_argument("--before", metavar="YYYY-MM", help="archive months before this one (default: current month)")
+    compact = sub.add_parser("compact", help="merge small files within each month")
+    compact.add_argument("--target-rows", type=int, default=DEFAULT_TARGET_ROWS)
+    sub.add_parser("list", help="show the archived files")
+    summary = sub.add_parser("summary", help="totals per HSN code")
+    summary.add_argument("--year", type=int)
+    summary.add_argument("--from", dest="start_month", metavar="YYYY-MM")
+    summary.add_argument("--to", dest="end_month", metavar="YYYY-MM")
+    summary.add_argument("--chapter", action="append", help="HSN chapter (repeatable)")
+    args = parser.parse_args()
+
+    archive = EntryArchive(args.root)
+    started = time.perf_counter()
+    if args.command == "roll":
+        print(f"Archived {archive.roll(before_month=args.before)} entries")
+    elif args.command == "compact":
+        for month, count in archive.compact(target_rows=args.target_rows).items():
+            print(f"{month}: merged {count} files")
+    elif args.command == "list":
+        for record in archive.files:
+            print(f"{record['path']}  {record['rows']:>10,} rows  {record['bytes']:>12,} bytes  "
+                  f"HSN {record['hsn_min']}..{record['hsn_max']}")
+        print(f"{len(archive.files)} files, {archive.row_count():,} rows")
+    else:
+        start_month = args.start_month or (f"{args.year}-01" if args.year else None)
+        end_month = args.end_month or (f"{args.year}-12" if args.year else None)
+        rows = archive.hsn_summary(start_month, end_month, chapters=args.chapter)
+        print(f"{'HSN':10s} {'Entries':>8s} {'Taxable':>16s} {'CGST':>14s} {'SGST':>14s}")
+        for row in rows:
+            print(f"{row['HSN']:10s} {row['Entries']:8,} {format_paise(row['BaseValue']):>16s} "
+                  f"{format_paise(row['CGST']):>14s} {format_paise(row['SGST']):>14s}")
+    print(f"Done in {time.perf_counter() - started:.2f} s")
@@ -0,0 +1,197 @@
+"""Merge a downloaded entries CSV into the local store without duplicating entries.
+
+Every entry is keyed by a content hash of its fields (entry_hash).  The
+saved entries are read once into a hash index of {hash: count}; the remote
+file is then streamed, and each remote entry either uses up one matching
+local occurrence or is new and gets appended.  That makes a merge a
+multiset union: a distinct entry ends up max(local, remote) times, so
+merging the same file again adds nothing and two machines converge on the
+same entries.  Whatever is left in the index afterwards exists only
+locally, which is how a sync knows the remote copy needs uploading.
+
+    python entry_merge.py merge hsn_data.csv
+    python entry_merge.py dedupe saved_data/records.csv -o records.csv
+"""
+import csv
+import hashlib
+import time
+
+from storage import ENTRY_FIELDS
+
+MERGE_BATCH = 5_000
+_QTY = ENTRY_FIELDS.index('Qty')
+
+
+def _canonical_qty(qty):
+    # The SQLite store gives Qty back as a float, CSV files as typed text
+    try:
+        return repr(float(qty))
+    except (TypeError, ValueError):
+        return str(qty or '').strip()
+
+
+def _values_hash(values):
+    values[_QTY] = _canonical_qty(values[_QTY])
+    key = "\x1f".join(values).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def entry_hash(entry):
+    """Stable 64-bit content hash of an entry's ENTRY_FIELDS"""
+    return _values_hash([str(entry.get(field) or '').strip() for field in ENTRY_FIELDS])
+
+
+def build_index(entries):
+    """{entry_hash: occurrences} of entries"""
+    index = {}
+    for entry in entries:
+        h = entry_hash(entry)
+        index[h] = index.get(h, 0) + 1
+    return index
+
+
+def merge_into(index, remote_entries, append_many, batch_size=MERGE_BATCH):
+    """Stream remote_entries against index, passing new ones to append_many in batches.
+
+    Matched hashes are used up from index, so afterwards it holds only the
+    entries the remote side lacks.  Returns (remote entries read, entries added).
+    """
+    remote = added = 0
+    batch = []
+    for entry in remote_entries:
+        remote += 1
+        h = entry_hash(entry)
+        count = index.get(h)
+        if count:
+            if count == 1:
+                del index[h]
+            else:
+                index[h] = count - 1
+            continue
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            append_many(batch)
+            added += len(batch)
+            batch = []
+    if batch:
+        append_many(batch)
+        added += len(batch)
+    return remote, added
+
+
+def _snapshot_rows(path):
+    """Rows of a CSV written by write_entries_csv (header exactly ENTRY_FIELDS), else None"""
+    f = open(path, newline='', encoding='utf-8-sig')
+    reader = csv.reader(f)
+    if next(reader, None) != ENTRY_FIELDS:
+        f.close()
+        return None
+
+    def rows():
+        with f:
+            yield from reader
+    return rows()
+
+
+def _merge_snapshot(index, rows, append_many, batch_size=MERGE_BATCH):
+    """merge_into() for raw snapshot rows: rows are hashed as read and only
+    normalized when they miss the index, which is the rare case"""
+    from entry_reader import normalize_entry
+
+    remote = added = invalid = 0
+    batch = []
+    for row in rows:
+        if len(row) != len(ENTRY_FIELDS):
+            invalid += 1
+            continue
+        h = _values_hash([cell.strip() for cell in row])
+        if h not in index:
+            try:
+                entry = normalize_entry(dict(zip(ENTRY_FIELDS, row)))
+            except ValueError:
+                invalid += 1
+                continue
+            h = entry_hash(entry)
+        remote += 1
+        count = index.get(h)
+        if count:
+            if count == 1:
+                del index[h]
+            else:
+                index[h] = count - 1
+            continue
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            append_many(batch)
+            added += len(batch)
+            batch = []
+    if batch:
+        append_many(batch)
+        added += len(batch)
+    return remote, added, invalid
+
+
+def merge_csv(path, store=None):
+    """Merge the entries in the CSV at path into the saved entries (default store).
+
+    Returns a dict of counts: local, remote, added, local_only (entries the
+    file lacks; nonzero means it is out of date), invalid and seconds.
+    """
+    import storage
+    from entry_reader import EntryReader
+
+    started = time.perf_counter()
+    if store is None:
+        store, local_entries = storage.get_store(), storage.iter_entries()
+    else:
+        local_entries = store.iter_entries()
+    index = build_index(local_entries)
+    local = sum(index.values())
+    rows = _snapshot_rows(path)
+    if rows is not None:
+        remote, added, invalid = _merge_snapshot(index, rows, store.append_many)
+    else:
+        # Older layouts go through the full reader
+        reader = EntryReader(path)
+        remote, added = merge_into(index, reader, store.append_many)
+        invalid = reader.counts['invalid']
+        for error in reader.errors:
+            print(f"Skipped {error}")
+    return {'local': local, 'remote': remote, 'added': added, 'local_only': sum(index.values()),
+            'invalid': invalid, 'seconds': time.perf_counter() - started}
+
+
+def dedupe(entries):
+    """entries with exact repeats dropped, first occurrence kept"""
+    seen = set()
+    for entry in entries:
+        h = entry_hash(entry)
+        if h not in seen:
+            seen.add(h)
+            yield entry
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge or deduplicate entries CSV files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge = sub.add_parser("merge", help="add the entries of a CSV the saved entries don't have yet")
+    merge.add_argument("csv")
+    clean = sub.add_parser("dedupe", help="write a CSV with exact duplicate entries removed")
+    clean.add_argument("csv")
+    clean.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        result = merge_csv(args.csv)
+        print(f"Merged {args.csv}: {result['added']} of {result['remote']} entries added, "
+              f"{result['local_only']} of {result['local']} local entries missing from it "
+              f"({result['seconds']:.2f} s)")
+    else:
+        from entry_reader import EntryReader
+        from storage import write_entries_csv
+
+        reader = EntryReader(args.csv)
+        written = write_entries_csv(dedupe(reader), args.output)
+        print(f"{args.csv}: {reader.report()}; wrote {written} distinct entries to {args.output}")
@@ -0,0 +1,191 @@
+"""Streaming reader for entries CSVs written by every version of the app.
+
+save_entry appended rows as the entry dict grew, so one file can hold
+several layouts without a header between them:
+
+    v7       HSN, QtyType, Qty, BaseValue, TaxSlab, CGST, SGST
+    v10      HSN, Description, QtyType, Qty, BaseValue, TaxSlab, CGST, SGST, TotalTax, FinalAmount
+    v11      v10 + UserEmail
+    v12      v11 + Timestamp (the current ENTRY_FIELDS)
+    records  HSN, Taxable Value, Tax Slab, CGST%, SGST%, CGST Amt, SGST Amt (saved_data/records.csv)
+
+A header row switches to name-based mapping until the next header.  Each
+row is detected on its own and normalized to ENTRY_FIELDS with exact
+two-decimal amounts, in one pass and constant memory.
+
+    python entry_reader.py data/entries.csv tax.csv saved_data/records.csv
+"""
+import csv
+
+from storage import ENTRY_FIELDS, MONEY_FIELDS
+from tax_logic import format_paise, to_paise
+
+V7 = "v7"
+V10 = "v10"
+V11 = "v11"
+V12 = "v12"
+RECORDS = "records"
+HEADER = "header"      # rows under a header that is not one of the layouts above
+INVALID = "invalid"
+VERSIONS = (V7, V10, V11, V12, RECORDS, HEADER, INVALID)
+
+LAYOUTS = {
+    V7: ['HSN', 'QtyType', 'Qty', 'BaseValue', 'TaxSlab', 'CGST', 'SGST'],
+    V10: ENTRY_FIELDS[:10],
+    V11: ENTRY_FIELDS[:11],
+    V12: ENTRY_FIELDS[:12],
+    RECORDS: ['HSN', 'BaseValue', 'TaxSlab', 'CGSTRate', 'SGSTRate', 'CGST', 'SGST'],
+}
+_BY_LENGTH = {10: V10, 11: V11, 12: V12}
+
+# Column names of other layouts' headers, mapped to entry fields
+HEADER_ALIASES = {'Taxable Value': 'BaseValue', 'Tax Slab': 'TaxSlab',
+                  'CGST%': 'CGSTRate', 'SGST%': 'SGSTRate',
+                  'CGST Amt': 'CGST', 'SGST Amt': 'SGST'}
+
+MAX_ERRORS = 20
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def detect_version(row):
+    """Layout of a headerless row, or INVALID"""
+    if len(row) == 7:
+        # Both 7-column layouts: v7 has a unit name second, records a number
+        # second and a slab without "%" third
+        if _is_number(row[1]) and not row[2].endswith('%'):
+            return RECORDS
+        return V7
+    return _BY_LENGTH.get(len(row), INVALID)
+
+
+def header_version(fields):
+    """Layout a header row names, or HEADER for some other set of columns"""
+    for version, layout in LAYOUTS.items():
+        if fields == layout:
+            return version
+    return HEADER
+
+
+def normalize_entry(raw):
+    """Entry dict in the current layout from a partial one; raises ValueError on bad amounts"""
+    entry = {field: (raw.get(field) or '').strip() for field in ENTRY_FIELDS}
+    slab = entry['TaxSlab']
+    if slab and not slab.endswith('%'):
+        entry['TaxSlab'] = slab + '%'
+
+    paise = {field: to_paise(entry[field]) for field in MONEY_FIELDS if entry[field] != ''}
+    if 'TotalTax' not in paise and 'CGST' in paise:
+        paise['TotalTax'] = paise['CGST'] + paise.get('SGST', 0)
+    if 'FinalAmount' not in paise and 'TotalTax' in paise:
+        paise['FinalAmount'] = paise.get('BaseValue', 0) + paise['TotalTax']
+    for field, value in paise.items():
+        entry[field] = format_paise(value)
+    return entry
+
+
+class EntryReader:
+    """Iterate normalized entries from one CSV, counting rows per layout version.
+
+    Rows that can't be read are skipped and counted as INVALID (the first
+    MAX_ERRORS are kept in .errors), or raise ValueError with strict=True.
+    """
+
+    def __init__(self, path, strict=False):
+        self.path = path
+        self.strict = strict
+        self.counts = dict.fromkeys(VERSIONS, 0)
+        self.errors = []
+
+    def _reject(self, line, row, reason):
+        self.counts[INVALID] += 1
+        message = f"{self.path}:{line}: {reason}: {row}"
+        if self.strict:
+            raise ValueError(message)
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+
+    def __iter__(self):
+        header = None
+        header_layout = None
+        with open(self.path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            for row in reader:
+                line = reader.line_num
+                row = [cell.strip() for cell in row]
+                if not any(row):
+                    continue
+                if row[0] == 'HSN':
+                    header = [HEADER_ALIASES.get(name, name) for name in row]
+                    header_layout = header_version(header)
+                    continue
+
+                if header is not None:
+                    if len(row) != len(header):
+                        self._reject(line, row, f"{len(row)} columns under a {len(header)}-column header")
+                        continue
+                    version, raw = header_layout, dict(zip(header, row))
+                else:
+                    version = detect_version(row)
+                    if version == INVALID:
+                        self._reject(line, row, f"unrecognised {len(row)}-column row")
+                        continue
+                    raw = dict(zip(LAYOUTS[version], row))
+
+                try:
+                    entry = normalize_entry(raw)
+                except ValueError as e:
+                    self._reject(line, row, str(e))
+                    continue
+                self.counts[version] += 1
+                yield entry
+
+    def rows(self):
+        """Rows read so far, including invalid ones"""
+        return sum(self.counts.values())
+
+    def report(self):
+        """One-line summary of the rows seen per version"""
+        parts = [f"{version}={count}" for version, count in self.counts.items() if count]
+        return f"{self.rows()} rows ({', '.join(parts) or 'empty'})"
+
+
+def read_entries(path, strict=False):
+    """Normalized entries from path; see EntryReader"""
+    return iter(EntryReader(path, strict=strict))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from storage import write_entries_csv
+
+    parser = argparse.ArgumentParser(description="Report (and optionally normalize) entries CSV layouts")
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("-o", "--output", help="write all entries, normalized, to this CSV")
+    parser.add_argument("--strict", action="store_true", help="stop at the first unreadable row")
+    args = parser.parse_args()
+
+    readers = [EntryReader(path, strict=args.strict) for path in args.csv]
+
+    def all_entries():
+        for reader in readers:
+            yield from reader
+
+    if args.output:
+        written = write_entries_csv(all_entries(), args.output)
+    else:
+        for _ in all_entries():
+            pass
+    for reader in readers:
+        print(f"{reader.path}: {reader.report()}")
+        for error in reader.errors:
+            print(f"  {error}")
+    if args.output:
+        print(f"Wrote {written} entries to {args.output}")
@@ -0,0 +1,173 @@
+"""Running totals of saved entries per month, user, HSN code, slab and unit.
+
+Every save adds the entry to its group, so HSN-wise GST summaries read
+one row per group instead of every entry.  The SQLite store keeps the
+groups in a ``summary`` table updated in the same transaction as the
+insert; the CSV store keeps an Aggregates object in a JSON sidecar.
+Both can be rebuilt from the entries.
+
+    python entry_summary.py --by HSN,TaxSlab --from 2025-04 --to 2026-03
+"""
+import json
+import os
+
+from tax_logic import to_paise
+
+SUMMARY_VERSION = 1
+
+# Month is the YYYY-MM of the entry's Timestamp ('' for undated legacy rows)
+GROUP_FIELDS = ('Month', 'UserEmail', 'HSN', 'TaxSlab', 'QtyType')
+TOTAL_FIELDS = ('Entries', 'Qty', 'BaseValue', 'CGST', 'SGST', 'TotalTax', 'FinalAmount')
+MONEY_TOTALS = ('BaseValue', 'CGST', 'SGST', 'TotalTax', 'FinalAmount')
+
+
+def check_group_by(group_by):
+    group_by = tuple(group_by)
+    unknown = [field for field in group_by if field not in GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(unknown)}; choose from {', '.join(GROUP_FIELDS)}")
+    return group_by
+
+
+def entry_key(entry):
+    return ((entry.get('Timestamp') or '')[:7], entry.get('UserEmail') or '', str(entry.get('HSN') or ''),
+            entry.get('TaxSlab') or '', entry.get('QtyType') or '')
+
+
+def entry_totals(entry):
+    """[1, qty, money in paise...] for an entry with storage-style string amounts"""
+    qty = entry.get('Qty')
+    totals = [1, float(qty) if qty not in ('', None) else 0.0]
+    for field in MONEY_TOTALS:
+        value = entry.get(field)
+        totals.append(to_paise(value) if value not in ('', None) else 0)
+    return totals
+
+
+def matches_group(key, start_month=None, end_month=None, user=None, hsn_prefix=None, slab=None):
+    month, key_user, hsn, key_slab, _ = key
+    if start_month and month < start_month:
+        return False
+    if end_month and month > end_month:
+        return False
+    if user and key_user != user:
+        return False
+    if hsn_prefix and not hsn.startswith(hsn_prefix):
+        return False
+    if slab and key_slab != slab:
+        return False
+    return True
+
+
+class Aggregates:
+    """Totals keyed by (Month, UserEmail, HSN, TaxSlab, QtyType)"""
+
+    def __init__(self):
+        self.groups = {}
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add_totals(self, key, totals, sign=1):
+        current = self.groups.get(key)
+        if current is None:
+            current = self.groups[key] = [0, 0.0, 0, 0, 0, 0, 0]
+        for i, value in enumerate(totals):
+            current[i] += sign * value
+        if current[0] <= 0:
+            del self.groups[key]
+
+    def add(self, entry, sign=1):
+        self.add_totals(entry_key(entry), entry_totals(entry), sign)
+
+    def add_many(self, entries, sign=1):
+        for entry in entries:
+            self.add(entry, sign)
+        return self
+
+    def query(self, group_by=('HSN',), **filters):
+        """Summary rows (dicts of the group_by fields and TOTAL_FIELDS) in group order.
+
+        Filters: start_month/end_month (YYYY-MM, inclusive), user, hsn_prefix, slab.
+        """
+        group_by = check_group_by(group_by)
+        positions = [GROUP_FIELDS.index(field) for field in group_by]
+        merged = {}
+        for key, totals in self.groups.items():
+            if not matches_group(key, **filters):
+                continue
+            out_key = tuple(key[i] for i in positions)
+            current = merged.get(out_key)
+            if current is None:
+                merged[out_key] = list(totals)
+            else:
+                for i, value in enumerate(totals):
+                    current[i] += value
+        return [dict(zip(group_by + TOTAL_FIELDS, key + tuple(totals)))
+                for key, totals in sorted(merged.items())]
+
+    def save(self, path, source_stat=None):
+        """Write the groups to a JSON sidecar, tagged with (size, mtime_ns) of the entries file"""
+        state = {
+            'version': SUMMARY_VERSION,
+            'source': list(source_stat) if source_stat else None,
+            'groups': [list(key) + totals for key, totals in self.groups.items()],
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, source_stat=None):
+        """Groups from a sidecar, or None if it is missing, unreadable or out of date"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('version') != SUMMARY_VERSION:
+            return None
+        if source_stat is not None and state.get('source') != list(source_stat):
+            return None
+        aggregates = cls()
+        width = len(GROUP_FIELDS)
+        for group in state['groups']:
+            aggregates.groups[tuple(group[:width])] = group[width:]
+        return aggregates
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from storage import rebuild_summary, summarize
+    from tax_logic import format_paise
+
+    parser = argparse.ArgumentParser(description="HSN-wise totals of saved entries")
+    parser.add_argument("--by", default="HSN", help=f"comma-separated fields from {','.join(GROUP_FIELDS)}")
+    parser.add_argument("--month", help="a single YYYY-MM month")
+    parser.add_argument("--from", dest="start_month", metavar="YYYY-MM")
+    parser.add_argument("--to", dest="end_month", metavar="YYYY-MM")
+    parser.add_argument("--user")
+    parser.add_argument("--hsn", dest="hsn_prefix", help="HSN code prefix")
+    parser.add_argument("--slab")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the totals from the entries first")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"Rebuilt {rebuild_summary()} summary groups")
+    group_by = tuple(field.strip() for field in args.by.split(",") if field.strip())
+    rows = summarize(group_by, start_month=args.month or args.start_month,
+                     end_month=args.month or args.end_month, user=args.user,
+                     hsn_prefix=args.hsn_prefix, slab=args.slab)
+    widths = [max([len(field)] + [len(str(row[field])) for row in rows]) for field in group_by]
+    print("  ".join(f"{field:{w}s}" for field, w in zip(group_by, widths)) +
+          f"  {'Entries':>8s} {'Qty':>12s} {'Taxable':>16s} {'CGST':>14s} {'SGST':>14s}")
+    for row in rows:
+        print("  ".join(f"{str(row[field]):{w}s}" for field, w in zip(group_by, widths)) +
+              f"  {row['Entries']:8,} {row['Qty']:12,.2f} {format_paise(row['BaseValue']):>16s} "
+              f"{format_paise(row['CGST']):>14s} {format_paise(row['SGST']):>14s}")
+    print(f"{len(rows)} groups")
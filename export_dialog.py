@@ -0,0 +1,98 @@
+from PyQt5.QtWidgets import (QDialog, QLabel, QComboBox, QLineEdit, QCheckBox, QDateEdit,
+                             QListWidget, QListWidgetItem, QDialogButtonBox, QGridLayout, QVBoxLayout)
+from PyQt5.QtCore import Qt, QDate
+from export_engine import FORMAT_CSV, FORMAT_CSV_GZ, FORMAT_XLSX
+from storage import ENTRY_FIELDS
+from tax_logic import SLABS
+from hsn_index import normalize_code
+
+# (label, format, file dialog filter)
+FORMAT_CHOICES = [
+    ("CSV", FORMAT_CSV, "CSV Files (*.csv)"),
+    ("CSV, gzip compressed", FORMAT_CSV_GZ, "Compressed CSV (*.csv.gz)"),
+    ("Excel workbook", FORMAT_XLSX, "Excel Files (*.xlsx)"),
+]
+
+class ExportDialog(QDialog):
+    """Choose the rows, columns and format of an export"""
+
+    def __init__(self, parent=None, user=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Entries")
+        self.initUI(user)
+
+    def initUI(self, user):
+        layout = QVBoxLayout()
+        grid = QGridLayout()
+
+        today = QDate.currentDate()
+        self.from_check = QCheckBox("From:")
+        self.from_date = QDateEdit(today.addDays(1 - today.day()))
+        self.from_date.setCalendarPopup(True)
+        grid.addWidget(self.from_check, 0, 0)
+        grid.addWidget(self.from_date, 0, 1)
+
+        self.to_check = QCheckBox("To (inclusive):")
+        self.to_date = QDateEdit(today)
+        self.to_date.setCalendarPopup(True)
+        grid.addWidget(self.to_check, 1, 0)
+        grid.addWidget(self.to_date, 1, 1)
+
+        grid.addWidget(QLabel("User:"), 2, 0)
+        self.user_input = QLineEdit(user or "")
+        self.user_input.setPlaceholderText("All users")
+        grid.addWidget(self.user_input, 2, 1)
+
+        grid.addWidget(QLabel("HSN starts with:"), 3, 0)
+        self.hsn_input = QLineEdit()
+        self.hsn_input.setPlaceholderText("All codes")
+        grid.addWidget(self.hsn_input, 3, 1)
+
+        grid.addWidget(QLabel("Tax slab:"), 4, 0)
+        self.slab_combo = QComboBox()
+        self.slab_combo.addItem("All slabs", None)
+        for slab in SLABS:
+            self.slab_combo.addItem(slab, slab)
+        grid.addWidget(self.slab_combo, 4, 1)
+
+        grid.addWidget(QLabel("Format:"), 5, 0)
+        self.format_combo = QComboBox()
+        for label, fmt, _ in FORMAT_CHOICES:
+            self.format_combo.addItem(label, fmt)
+        grid.addWidget(self.format_combo, 5, 1)
+        layout.addLayout(grid)
+
+        layout.addWidget(QLabel("Columns:"))
+        self.column_list = QListWidget()
+        for field in ENTRY_FIELDS:
+            item = QListWidgetItem(field)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.column_list.addItem(item)
+        layout.addWidget(self.column_list)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def file_filter(self):
+        return FORMAT_CHOICES[self.format_combo.currentIndex()][2]
+
+    def options(self):
+        """(format, columns, filters) for export_engine.export"""
+        filters = {}
+        if self.from_check.isChecked():
+            filters['start'] = self.from_date.date().toString(Qt.ISODate)
+        if self.to_check.isChecked():
+            filters['end'] = self.to_date.date().addDays(1).toString(Qt.ISODate)
+        if self.user_input.text().strip():
+            filters['user'] = self.user_input.text().strip()
+        if normalize_code(self.hsn_input.text()):
+            filters['hsn_prefix'] = normalize_code(self.hsn_input.text())
+        if self.slab_combo.currentData():
+            filters['slab'] = self.slab_combo.currentData()
+        columns = [self.column_list.item(i).text() for i in range(self.column_list.count())
+                   if self.column_list.item(i).checkState() == Qt.Checked]
+        return self.format_combo.currentData(), columns, filters
@@ -0,0 +1,172 @@
+"""Streaming export of saved entries to CSV, gzip CSV or XLSX.
+
+Entries are read from the store (archived months included) one at a time,
+filtered and projected to the chosen columns, and written through a
+streaming writer, so memory stays flat however many rows are exported.
+The file is written under a temporary name and renamed when complete.
+
+    python export_engine.py out.xlsx --from 2025-04-01 --to 2026-04-01 --hsn 39
+"""
+import csv
+import gzip
+import os
+import time
+
+from storage import ENTRY_FIELDS, MONEY_FIELDS, count_entries, iter_entries
+
+FORMAT_CSV = "csv"
+FORMAT_CSV_GZ = "csv.gz"
+FORMAT_XLSX = "xlsx"
+FORMATS = (FORMAT_CSV, FORMAT_CSV_GZ, FORMAT_XLSX)
+
+XLSX_MAX_ROWS = 1_048_576      # per sheet, including the header row
+PROGRESS_EVERY = 5_000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def format_for(path):
+    """Export format implied by a file name"""
+    name = path.lower()
+    if name.endswith((".csv.gz", ".gz")):
+        return FORMAT_CSV_GZ
+    if name.endswith(".xlsx"):
+        return FORMAT_XLSX
+    return FORMAT_CSV
+
+
+def check_columns(columns):
+    if not columns:
+        return list(ENTRY_FIELDS)
+    unknown = [c for c in columns if c not in ENTRY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return list(columns)
+
+
+class CSVExportWriter:
+    def __init__(self, path, columns, compress=False):
+        if compress:
+            self._file = gzip.open(path, 'wt', newline='', encoding='utf-8', compresslevel=6)
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, values):
+        self._writer.writerow(values)
+
+    def close(self):
+        self._file.close()
+
+
+class XLSXExportWriter:
+    """openpyxl write-only workbook; rows go straight to the file, new sheet every XLSX_MAX_ROWS"""
+
+    def __init__(self, path, columns):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.columns = columns
+        self._numeric = [c in MONEY_FIELDS or c == 'Qty' for c in columns]
+        self._workbook = Workbook(write_only=True)
+        self._sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheets += 1
+        title = "Entries" if self._sheets == 1 else f"Entries {self._sheets}"
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self.columns)
+        self._rows = 1
+
+    def write(self, values):
+        if self._rows >= XLSX_MAX_ROWS:
+            self._new_sheet()
+        row = []
+        for value, numeric in zip(values, self._numeric):
+            if numeric and value not in ('', None):
+                value = float(value)
+            row.append(value)
+        self._sheet.append(row)
+        self._rows += 1
+
+    def close(self):
+        self._workbook.save(self.path)
+
+
+def open_writer(path, fmt, columns):
+    if fmt == FORMAT_XLSX:
+        return XLSXExportWriter(path, columns)
+    if fmt in (FORMAT_CSV, FORMAT_CSV_GZ):
+        return CSVExportWriter(path, columns, compress=fmt == FORMAT_CSV_GZ)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export(dest, fmt=None, columns=None, progress=None, cancelled=None, **filters):
+    """Export entries matching filters (start, end, user, hsn_prefix, slab) to dest.
+
+    progress(done, total) is called every PROGRESS_EVERY rows and at the
+    end; a true cancelled() stops the export with ExportCancelled and
+    leaves no partial file.  Returns (rows written, seconds).
+    """
+    started = time.perf_counter()
+    fmt = fmt or format_for(dest)
+    columns = check_columns(columns)
+    total = count_entries(**filters) if progress else 0
+
+    directory = os.path.dirname(dest)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{dest}.{os.getpid()}.tmp"
+    writer = open_writer(tmp_path, fmt, columns)
+    count = 0
+    try:
+        for entry in iter_entries(**filters):
+            writer.write([entry.get(column, '') for column in columns])
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled(f"Export cancelled after {count} rows")
+                if progress:
+                    progress(count, max(total, count))
+        writer.close()
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            writer.close()
+        except Exception:
+            pass
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if progress:
+        progress(count, count)
+    return count, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export saved entries")
+    parser.add_argument("dest", help="output file (.csv, .csv.gz or .xlsx)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file name")
+    parser.add_argument("--columns", help=f"comma-separated subset of {','.join(ENTRY_FIELDS)}")
+    parser.add_argument("--from", dest="start", help="ISO date/time, inclusive")
+    parser.add_argument("--to", dest="end", help="ISO date/time, exclusive")
+    parser.add_argument("--user")
+    parser.add_argument("--hsn", dest="hsn_prefix", help="HSN code prefix")
+    parser.add_argument("--slab")
+    args = parser.parse_args()
+
+    def report(done, total):
+        print(f"\r{done:,}/{total:,} rows", end="", file=sys.stderr)
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    rows, seconds = export(args.dest, args.format, columns, progress=report, start=args.start,
+                           end=args.end, user=args.user, hsn_prefix=args.hsn_prefix, slab=args.slab)
+    print(file=sys.stderr)
+    print(f"Exported {rows:,} entries to {args.dest} in {seconds:.2f} s")
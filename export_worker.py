@@ -0,0 +1,29 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from export_engine import export, ExportCancelled
+
+class ExportWorker(QThread):
+    """Run export_engine.export() off the UI thread"""
+    progress = pyqtSignal(int, int)          # rows done, rows expected
+    exported = pyqtSignal(int, str, float)   # rows written, destination, seconds
+    failed = pyqtSignal(str)
+
+    def __init__(self, dest, fmt=None, columns=None, filters=None, parent=None):
+        super().__init__(parent)
+        self.dest = dest
+        self.fmt = fmt
+        self.columns = columns
+        self.filters = filters or {}
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            rows, seconds = export(self.dest, self.fmt, self.columns, progress=self.progress.emit,
+                                   cancelled=lambda: self._cancelled, **self.filters)
+            self.exported.emit(rows, self.dest, seconds)
+        except ExportCancelled as e:
+            self.failed.emit(str(e))
+        except Exception as e:
+            self.failed.emit(f"Export failed: {str(e)}")
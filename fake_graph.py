@@ -0,0 +1,248 @@
+"""Local stand-in for the parts of Microsoft Graph that onedrive_sync uses.
+
+Emulates app-folder simple upload/download, item metadata and the upload
+session protocol (createUploadSession, ranged chunk PUTs, status and
+cancel), keeps files in memory, and can inject failures into chunk
+uploads.  Point the app at it with GRAPH_BASE_URL:
+
+    python fake_graph.py --port 8765
+    GRAPH_BASE_URL=http://127.0.0.1:8765/v1.0 python main.py
+
+or use FakeGraph() in a script, which serves on a free port in a thread.
+"""
+import json
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+APPROOT_PREFIX = "/v1.0/me/drive/special/approot:/"
+UPLOAD_PREFIX = "/upload/"
+MAX_CHUNK = 60 * 1024 * 1024
+_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+# Failures that inject() can queue for the next chunk PUTs
+FAIL_503 = "503"                  # reject the chunk with Service Unavailable
+FAIL_429 = "429"                  # throttle with Retry-After: 0
+FAIL_AFTER_COMMIT = "commit-500"  # store the chunk, then answer 500 (the response is "lost")
+FAIL_DISCONNECT = "disconnect"    # close the connection without answering
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like Graph
+    wbufsize = 64 * 1024            # headers and body in one write; flushed after each request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.graph.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body=None, headers=None):
+        data = b""
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode("utf-8")
+        elif body is not None:
+            data = body
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if isinstance(body, (dict, list)):
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _authorized(self):
+        expected = self.server.graph.token
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Bearer ") or (expected and header != f"Bearer {expected}"):
+            self._send(401, {"error": {"code": "InvalidAuthenticationToken"}})
+            return False
+        return True
+
+    def _route(self, method):
+        graph = self.server.graph
+        graph._count(method, self.client_address)
+        path = urlsplit(self.path).path
+        if path.startswith(APPROOT_PREFIX):
+            if not self._authorized():
+                return
+            name, _, action = path[len(APPROOT_PREFIX):].partition(":")
+            graph._approot(self, method, unquote(name), action.lstrip("/"))
+        elif path.startswith(UPLOAD_PREFIX):
+            # Upload URLs are pre-authorized and must not carry a token
+            if "Authorization" in self.headers:
+                self._send(401, {"error": {"code": "unauthenticated",
+                                           "message": "Authorization header not allowed on uploadUrl"}})
+                return
+            graph._upload(self, method, path[len(UPLOAD_PREFIX):])
+        else:
+            self._send(404, {"error": {"code": "itemNotFound"}})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class FakeGraph:
+    """In-memory Graph app folder served over HTTP on host:port (0 picks a free port)"""
+
+    def __init__(self, host="127.0.0.1", port=0, token=None, verbose=False):
+        self.token = token
+        self.verbose = verbose
+        self.files = {}
+        self.sessions = {}
+        self.requests = {}
+        self.connections = set()
+        self._faults = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.graph = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1.0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def inject(self, fault, count=1):
+        """Make the next count chunk PUTs fail with fault (FAIL_503, FAIL_429, ...)"""
+        with self._lock:
+            self._faults.extend([fault] * count)
+
+    def _count(self, method, client_address):
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            self.connections.add(client_address)
+
+    def _approot(self, handler, method, name, action):
+        if action == "content" and method == "PUT":
+            with self._lock:
+                self.files[name] = handler._body()
+            handler._send(201, self._item(name))
+        elif action == "content" and method == "GET":
+            if name not in self.files:
+                handler._send(404, {"error": {"code": "itemNotFound"}})
+            else:
+                handler._send(200, self.files[name], {"Content-Type": "application/octet-stream"})
+        elif action == "" and method == "GET":
+            if name not in self.files:
+                handler._send(404, {"error": {"code": "itemNotFound"}})
+            else:
+                handler._send(200, self._item(name))
+        elif action == "createUploadSession" and method == "POST":
+            handler._body()
+            session_id = uuid.uuid4().hex
+            expires = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+            with self._lock:
+                self.sessions[session_id] = {"name": name, "data": bytearray(), "expires": expires}
+            host, port = handler.server.server_address[:2]
+            handler._send(200, {"uploadUrl": f"http://{host}:{port}{UPLOAD_PREFIX}{session_id}",
+                                "expirationDateTime": expires})
+        else:
+            handler._send(405, {"error": {"code": "invalidRequest"}})
+
+    def _item(self, name):
+        return {"id": name, "name": name, "size": len(self.files[name])}
+
+    def _upload(self, handler, method, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            handler._body()
+            handler._send(404, {"error": {"code": "itemNotFound"}})
+            return
+        status = {"expirationDateTime": session["expires"],
+                  "nextExpectedRanges": [f"{len(session['data'])}-"]}
+        if method == "GET":
+            handler._send(200, status)
+            return
+        if method == "DELETE":
+            with self._lock:
+                self.sessions.pop(session_id, None)
+            handler._send(204)
+            return
+
+        body = handler._body()
+        with self._lock:
+            fault = self._faults.pop(0) if self._faults else None
+        if fault == FAIL_DISCONNECT:
+            handler.close_connection = True
+            handler.connection.shutdown(2)
+            return
+        if fault == FAIL_503:
+            handler._send(503, {"error": {"code": "serviceNotAvailable"}}, {"Retry-After": "0"})
+            return
+        if fault == FAIL_429:
+            handler._send(429, {"error": {"code": "activityLimitReached"}}, {"Retry-After": "0"})
+            return
+
+        match = _RANGE_RE.fullmatch(handler.headers.get("Content-Range", ""))
+        if not match:
+            handler._send(400, {"error": {"code": "invalidRange"}})
+            return
+        start, end, total = (int(g) for g in match.groups())
+        if end - start + 1 != len(body) or len(body) > MAX_CHUNK or end >= total:
+            handler._send(400, {"error": {"code": "invalidRange"}})
+            return
+        with self._lock:
+            if start != len(session["data"]):
+                handler._send(416, {"error": {"code": "invalidRange"}, **status})
+                return
+            session["data"].extend(body)
+            done = len(session["data"]) == total
+            if done:
+                self.files[session["name"]] = bytes(session["data"])
+                del self.sessions[session_id]
+        if fault == FAIL_AFTER_COMMIT:
+            handler._send(500, {"error": {"code": "generalException"}})
+        elif done:
+            handler._send(201, self._item(session["name"]))
+        else:
+            handler._send(202, {"expirationDateTime": session["expires"],
+                                "nextExpectedRanges": [f"{len(session['data'])}-"]})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a fake Microsoft Graph app folder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="only accept this bearer token")
+    args = parser.parse_args()
+
+    graph = FakeGraph(args.host, args.port, token=args.token, verbose=True)
+    print(f"Fake Graph at {graph.base_url} (set GRAPH_BASE_URL to this)")
+    try:
+        graph._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,282 @@
+"""HSN-wise summary (GSTR-1 table 12) from the saved entries.
+
+Entries are grouped by HSN code, UQC (unit quantity code, mapped from the
+QtyType) and rate, and written per return period in the portal's JSON
+format or the offline tool's hsn CSV layout.
+
+By default the groups come from the running summary totals (see
+entry_summary), so the cost is per group, not per entry.  With
+``--source entries`` the entries themselves are scanned: on the SQLite
+store each month is read by its own worker process through the timestamp
+index; the CSV store is read in one streaming pass.  Either way only one
+month's groups are held in memory and each period file is written as soon
+as its month is done.
+
+    python gstr1_export.py --from 2025-04 --to 2026-03 --gstin 27ABCDE1234F1Z5 -o gstr1/
+    python gstr1_export.py --from 2025-04 --to 2026-03 --combined --format csv -o fy2025.csv
+"""
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import storage
+from entry_archive import month_start, next_month
+from entry_summary import Aggregates
+
+FORMAT_JSON = "json"
+FORMAT_CSV = "csv"
+SOURCE_SUMMARY = "summary"
+SOURCE_ENTRIES = "entries"
+
+# QtyType values used by the app -> GST unit quantity codes
+UQC_CODES = {
+    "Units": "UNT",
+    "Kilograms": "KGS",
+    "Liters": "LTR",
+    "Litres": "LTR",
+    "Meters": "MTR",
+    "Metres": "MTR",
+    "Pieces": "PCS",
+    "Numbers": "NOS",
+}
+UQC_NAMES = {"UNT": "UNITS", "KGS": "KILOGRAMS", "LTR": "LITRES", "MTR": "METERS",
+             "PCS": "PIECES", "NOS": "NUMBERS", "OTH": "OTHERS"}
+OTHER_UQC = "OTH"
+
+CSV_HEADER = ['HSN', 'Description', 'UQC', 'Total Quantity', 'Total Value', 'Rate',
+              'Taxable Value', 'Integrated Tax Amount', 'Central Tax Amount',
+              'State/UT Tax Amount', 'Cess Amount']
+
+GROUP_BY = ('HSN', 'QtyType', 'TaxSlab')
+
+# Slab labels without a number; the portal reports them at rate 0
+ZERO_RATE_SLABS = {'exempt', 'exempted', 'nil', 'nil rated', 'nil-rated', 'non-gst', 'non gst'}
+
+
+def uqc_for(qty_type):
+    return UQC_CODES.get((qty_type or '').strip().title(), OTHER_UQC)
+
+
+def rate_for(slab):
+    """Numeric rate of a slab label: "18%" -> 18, "0.25%" -> 0.25, "Exempt" -> 0.
+    Raises ValueError for a label that isn't a rate."""
+    text = str(slab).strip()
+    if text.lower() in ZERO_RATE_SLABS:
+        return 0
+    try:
+        rate = float(text.rstrip('%').strip() or 0)
+    except ValueError:
+        raise ValueError(f"unknown tax slab {slab!r}") from None
+    if not math.isfinite(rate):
+        raise ValueError(f"unknown tax slab {slab!r}")
+    return int(rate) if rate.is_integer() else rate
+
+
+def return_period(month):
+    """Portal period (MMYYYY) of a YYYY-MM month"""
+    return f"{month[5:7]}{month[:4]}"
+
+
+def months_between(start_month, end_month):
+    months = []
+    month = start_month
+    while month <= end_month:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def merge_groups(rows, errors=None):
+    """Summary rows (GROUP_BY + totals) -> {(hsn, uqc, rate): [qty, value, taxable, cgst, sgst]}.
+    A row whose slab isn't a rate is left out and reported in errors (printed if None)."""
+    groups = {}
+    for row in rows:
+        try:
+            key = (row['HSN'], uqc_for(row['QtyType']), rate_for(row['TaxSlab']))
+        except ValueError as e:
+            message = f"HSN {row['HSN']}: {e}"
+            if errors is None:
+                print(f"Skipped {message}")
+            else:
+                errors.append(message)
+            continue
+        totals = groups.get(key)
+        if totals is None:
+            totals = groups[key] = [0.0, 0, 0, 0, 0]
+        totals[0] += row['Qty']
+        totals[1] += row['FinalAmount']
+        totals[2] += row['BaseValue']
+        totals[3] += row['CGST']
+        totals[4] += row['SGST']
+    return groups
+
+
+def hsn_records(groups, descriptions=None):
+    """Portal "hsn" data items, in HSN order"""
+    descriptions = descriptions or {}
+    records = []
+    for num, (key, totals) in enumerate(sorted(groups.items()), 1):
+        hsn, uqc, rate = key
+        qty, value, taxable, cgst, sgst = totals
+        records.append({
+            'num': num,
+            'hsn_sc': hsn,
+            'desc': (descriptions.get(hsn) or '')[:30],
+            'uqc': uqc,
+            'qty': round(qty, 2),
+            'val': value / 100,
+            'txval': taxable / 100,
+            'iamt': 0,
+            'camt': cgst / 100,
+            'samt': sgst / 100,
+            'csamt': 0,
+            'rt': rate,
+        })
+    return records
+
+
+def write_json(path, records, gstin, period):
+    document = {'gstin': gstin or '', 'fp': period, 'hsn': {'data': records}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=1)
+
+
+def write_csv(path, records):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for r in records:
+            writer.writerow([r['hsn_sc'], r['desc'], f"{r['uqc']}-{UQC_NAMES.get(r['uqc'], 'OTHERS')}",
+                             f"{r['qty']:.2f}", f"{r['val']:.2f}", r['rt'], f"{r['txval']:.2f}",
+                             "0.00", f"{r['camt']:.2f}", f"{r['samt']:.2f}", "0.00"])
+
+
+def _rows_for_month(db_path, archive_dir, month):
+    """Worker: GROUP_BY summary rows of one month, read from the entries"""
+    filters = {'start': month_start(month), 'end': month_start(next_month(month))}
+    aggregates = Aggregates()
+    if os.path.exists(os.path.join(archive_dir, "_manifest.json")):
+        from entry_archive import EntryArchive
+        aggregates.add_many(EntryArchive(archive_dir).iter_entries(**filters))
+    store = storage.SQLiteEntryStore(db_path)
+    try:
+        aggregates.add_many(store.iter_entries(**filters))
+    finally:
+        store.close()
+    return aggregates.query(GROUP_BY)
+
+
+def monthly_rows(months, source=SOURCE_SUMMARY, workers=None):
+    """Yield (month, summary rows) for each month in order"""
+    if source == SOURCE_SUMMARY:
+        rows = storage.summarize(('Month',) + GROUP_BY, start_month=months[0], end_month=months[-1])
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row['Month'], []).append(row)
+        for month in months:
+            yield month, by_month.get(month, [])
+    elif storage.STORAGE_BACKEND == storage.BACKEND_CSV:
+        # A flat file can't be read by month, so one pass with per-month groups
+        start, end = month_start(months[0]), month_start(next_month(months[-1]))
+        by_month = {}
+        for entry in storage.iter_entries(start=start, end=end):
+            by_month.setdefault(entry['Timestamp'][:7], Aggregates()).add(entry)
+        for month in months:
+            yield month, by_month[month].query(GROUP_BY) if month in by_month else []
+    else:
+        storage.get_store()  # creates and migrates the database before workers open it
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_rows_for_month, [storage.DB_PATH] * len(months),
+                               [storage.ARCHIVE_DIR] * len(months), months)
+            yield from zip(months, results)
+
+
+def export_gstr1(dest, start_month, end_month, fmt=FORMAT_JSON, gstin=None, combined=False,
+                 source=SOURCE_SUMMARY, workers=None, descriptions=None, errors=None):
+    """Write the HSN summary for each month (one file per period in the dest directory),
+    or for the whole range with combined (dest is the file).  Returns the paths written.
+    Groups that can't be exported (see merge_groups) go to errors, or are printed."""
+    if fmt not in (FORMAT_JSON, FORMAT_CSV):
+        raise ValueError(f"Unknown format: {fmt}")
+    months = months_between(start_month, end_month)
+    if not months:
+        raise ValueError(f"Empty period: {start_month} to {end_month}")
+
+    def merged(month, rows):
+        skipped = []
+        groups = merge_groups(rows, skipped)
+        for message in skipped:
+            if errors is None:
+                print(f"Skipped {month} {message}")
+            else:
+                errors.append(f"{month} {message}")
+        return groups
+
+    def write(path, groups, period):
+        records = hsn_records(groups, descriptions)
+        if fmt == FORMAT_JSON:
+            write_json(path, records, gstin, period)
+        else:
+            write_csv(path, records)
+        return path
+
+    if combined:
+        directory = os.path.dirname(dest)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        groups = {}
+        for month, rows in monthly_rows(months, source, workers):
+            for key, totals in merged(month, rows).items():
+                current = groups.setdefault(key, [0.0, 0, 0, 0, 0])
+                for i, value in enumerate(totals):
+                    current[i] += value
+        return [write(dest, groups, return_period(end_month))]
+
+    os.makedirs(dest, exist_ok=True)
+    paths = []
+    for month, rows in monthly_rows(months, source, workers):
+        if not rows:
+            continue
+        period = return_period(month)
+        path = os.path.join(dest, f"GSTR1_HSN_{period}.{fmt}")
+        paths.append(write(path, merged(month, rows), period))
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from datetime import date
+
+    parser = argparse.ArgumentParser(description="Export the GSTR-1 HSN-wise summary")
+    parser.add_argument("--from", dest="start_month", metavar="YYYY-MM",
+                        default=date.today().strftime("%Y-%m"))
+    parser.add_argument("--to", dest="end_month", metavar="YYYY-MM", help="default: same as --from")
+    parser.add_argument("-o", "--output", default="gstr1",
+                        help="directory for the per-period files, or the file with --combined")
+    parser.add_argument("--format", choices=[FORMAT_JSON, FORMAT_CSV], default=FORMAT_JSON)
+    parser.add_argument("--gstin", default=os.getenv("GSTIN", ""))
+    parser.add_argument("--combined", action="store_true", help="one summary over the whole range")
+    parser.add_argument("--source", choices=[SOURCE_SUMMARY, SOURCE_ENTRIES], default=SOURCE_SUMMARY)
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="processes for --source entries on the SQLite store (default: CPU count)")
+    parser.add_argument("--no-descriptions", action="store_true", help="don't load the HSN master")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    descriptions = None
+    if not args.no_descriptions:
+        from bulk_invoice import load_master
+        descriptions = load_master()
+    errors = []
+    paths = export_gstr1(args.output, args.start_month, args.end_month or args.start_month,
+                         fmt=args.format, gstin=args.gstin, combined=args.combined,
+                         source=args.source, workers=args.workers, descriptions=descriptions,
+                         errors=errors)
+    for message in errors:
+        print(f"Skipped {message}")
+    for path in paths:
+        print(f"Wrote {path}")
+    print(f"{len(paths)} files in {time.perf_counter() - started:.2f} s")
@@ -0,0 +1,273 @@
+"""Compiled on-disk cache of the HSN master workbook.
+
+Parsing HSN_SAC.xlsx with openpyxl takes the better part of a second, so the
+codes and descriptions are compiled once into a flat binary file (``.hsnc``)
+that is memory-mapped on later launches.  The cache records the size, mtime
+and SHA-256 of the workbook it was built from and is rebuilt only when the
+workbook changes.
+
+File layout (little endian)::
+
+    header        see _HEADER
+    code offsets  (count + 1) x uint32, byte offsets into the code blob
+    desc offsets  (count + 1) x uint32, byte offsets into the description blob
+    code blob     UTF-8 codes, each terminated by NUL
+    desc blob     UTF-8 descriptions, each terminated by NUL
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+CACHE_SUFFIX = ".hsnc"
+MAGIC = b"HSNC"
+VERSION = 1
+
+# magic, version, reserved, count, source size, source mtime (ns),
+# source sha256, code blob length, description blob length
+_HEADER = struct.Struct("<4sHHIqq32sII")
+
+
+def cache_path_for(xlsx_path):
+    """Return the cache path that sits beside the given workbook"""
+    return os.path.splitext(xlsx_path)[0] + CACHE_SUFFIX
+
+
+def user_cache_dir():
+    """Per-user directory for caches that cannot live beside the workbook"""
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "HSNTaxCalculator", "cache")
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "hsn_tax_calculator")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _offsets(blob_parts):
+    offsets = array("I", [0])
+    pos = 0
+    for part in blob_parts:
+        pos += len(part) + 1
+        offsets.append(pos)
+    return offsets
+
+
+def _to_le(arr):
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(raw):
+    arr = array("I")
+    arr.frombytes(raw)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def write_cache(cache_path, codes, descriptions, source_path=None):
+    """Write codes and descriptions to a cache file atomically"""
+    if len(codes) != len(descriptions):
+        raise ValueError("codes and descriptions must have the same length")
+
+    code_parts = [str(c).encode("utf-8") for c in codes]
+    desc_parts = [("" if d is None else str(d)).encode("utf-8") for d in descriptions]
+    code_blob = b"\0".join(code_parts) + b"\0" if code_parts else b""
+    desc_blob = b"\0".join(desc_parts) + b"\0" if desc_parts else b""
+
+    if source_path:
+        st = os.stat(source_path)
+        size, mtime_ns, sha = st.st_size, st.st_mtime_ns, _file_sha256(source_path)
+    else:
+        size, mtime_ns, sha = -1, -1, b"\0" * 32
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(codes), size, mtime_ns, sha,
+                          len(code_blob), len(desc_blob))
+
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(_to_le(_offsets(code_parts)))
+        f.write(_to_le(_offsets(desc_parts)))
+        f.write(code_blob)
+        f.write(desc_blob)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def build_cache(xlsx_path, cache_path=None):
+    """Parse the workbook and compile it into a cache file"""
+    import pandas as pd
+
+    df = pd.read_excel(xlsx_path, dtype={'HSN_CD': str})
+    codes = df['HSN_CD'].astype(str).tolist()
+    descriptions = df['HSN_Description'].fillna('').astype(str).tolist()
+    return write_cache(cache_path or cache_path_for(xlsx_path), codes, descriptions, xlsx_path)
+
+
+class HSNCache:
+    """Read-only, memory-mapped view of a compiled HSN cache file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _parse(self):
+        if len(self._mm) < _HEADER.size:
+            raise ValueError(f"Truncated HSN cache: {self.path}")
+        (magic, version, _, count, self.source_size, self.source_mtime_ns,
+         self.source_sha256, code_len, desc_len) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} HSN cache: {self.path}")
+
+        pos = _HEADER.size
+        width = (count + 1) * 4
+        self._code_offsets = _from_le(self._mm[pos:pos + width])
+        pos += width
+        self._desc_offsets = _from_le(self._mm[pos:pos + width])
+        pos += width
+        self._code_base = pos
+        self._desc_base = pos + code_len
+        if self._desc_base + desc_len != len(self._mm):
+            raise ValueError(f"Corrupt HSN cache: {self.path}")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if not self._mm.closed:
+            self._mm.close()
+
+    def code(self, i):
+        start = self._code_base + self._code_offsets[i]
+        end = self._code_base + self._code_offsets[i + 1] - 1
+        return self._mm[start:end].decode("utf-8")
+
+    def description(self, i):
+        start = self._desc_base + self._desc_offsets[i]
+        end = self._desc_base + self._desc_offsets[i + 1] - 1
+        return self._mm[start:end].decode("utf-8")
+
+    def _strings(self, base, offsets):
+        if not self.count:
+            return []
+        blob = self._mm[base:base + offsets[-1] - 1]
+        return blob.decode("utf-8").split("\0")
+
+    def codes(self):
+        """All codes, in workbook order"""
+        return self._strings(self._code_base, self._code_offsets)
+
+    def descriptions(self):
+        """All descriptions, aligned with codes()"""
+        return self._strings(self._desc_base, self._desc_offsets)
+
+    def matches_source(self, xlsx_path):
+        """True if the cache was built from the workbook as it is on disk now"""
+        st = os.stat(xlsx_path)
+        if st.st_size != self.source_size:
+            return False
+        if st.st_mtime_ns == self.source_mtime_ns:
+            return True
+        # Copies and PyInstaller extraction change the mtime but not the bytes
+        return _file_sha256(xlsx_path) == self.source_sha256
+
+
+def _open_if_fresh(cache_path, xlsx_path):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        cache = HSNCache(cache_path)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable HSN cache {cache_path}: {e}")
+        return None
+    if xlsx_path is None or cache.matches_source(xlsx_path):
+        return cache
+    cache.close()
+    return None
+
+
+def candidate_paths(xlsx_path):
+    """Cache locations to try, in order: beside the workbook, then the user cache dir"""
+    name = os.path.basename(cache_path_for(xlsx_path))
+    return [cache_path_for(xlsx_path), os.path.join(user_cache_dir(), name)]
+
+
+def open_cache(xlsx_path):
+    """Return an up to date HSNCache for the workbook, building it if needed.
+
+    If the workbook is missing but a cache was shipped in its place (as in a
+    frozen fast-start bundle) that cache is used as is.
+    """
+    have_source = os.path.exists(xlsx_path)
+    paths = candidate_paths(xlsx_path)
+    for path in paths:
+        cache = _open_if_fresh(path, xlsx_path if have_source else None)
+        if cache is not None:
+            return cache
+
+    if not have_source:
+        raise FileNotFoundError(f"Excel file not found at: {xlsx_path}")
+
+    # A frozen bundle's own directory is a temporary extraction; don't write there
+    targets = paths[1:] if getattr(sys, 'frozen', False) else paths
+    for path in targets:
+        try:
+            build_cache(xlsx_path, path)
+            return HSNCache(path)
+        except OSError as e:
+            print(f"Could not write HSN cache {path}: {e}")
+    raise OSError(f"Could not write an HSN cache for {xlsx_path}")
+
+
+def load_table(xlsx_path):
+    """Return (codes, descriptions) for the workbook, via the compiled cache"""
+    with open_cache(xlsx_path) as cache:
+        return cache.codes(), cache.descriptions()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Compile HSN_SAC.xlsx into a binary cache")
+    parser.add_argument("xlsx", nargs="?", default="HSN_SAC.xlsx")
+    parser.add_argument("-o", "--output", help="cache file to write (default: beside the workbook)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_cache(args.xlsx, args.output)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with HSNCache(path) as cache:
+        count = len(cache.codes())
+    loaded = time.perf_counter() - start
+    print(f"Wrote {path}: {count} codes (build {built * 1000:.0f} ms, load {loaded * 1000:.1f} ms)")
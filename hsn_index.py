@@ -0,0 +1,74 @@
+from bisect import bisect_left
+
+# Sorts after any character that can appear in an HSN code
+_PREFIX_END = "\U0010ffff"
+
+def normalize_code(text):
+    """Strip the dots and spaces people type into HSN codes ("3917.40" -> "391740")"""
+    return "".join(ch for ch in str(text) if ch.isalnum())
+
+class HSNCodeIndex:
+    """Sorted index over HSN codes for prefix and longest-prefix lookups.
+
+    Codes are kept in a sorted list so "all codes starting with P" is two
+    bisects, and every code is in a dict so the longest known prefix of a
+    code is at most len(code) dict probes.  Results are rows in the list
+    the index was built from (workbook order), so they can be used directly
+    with HSNListModel.
+    """
+
+    def __init__(self, codes):
+        order = sorted(range(len(codes)), key=codes.__getitem__)
+        self._keys = [codes[i] for i in order]
+        self._rows = order
+        self._exact = {}
+        for row, code in enumerate(codes):
+            self._exact.setdefault(code, row)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, code):
+        return code in self._exact
+
+    def row_for(self, code):
+        """Row of code, or -1 if it is not in the master"""
+        return self._exact.get(code, -1)
+
+    def prefix_range(self, prefix):
+        """(lo, hi) slice of the sorted keys that start with prefix"""
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + _PREFIX_END, lo)
+        return lo, hi
+
+    def count_prefix(self, prefix):
+        lo, hi = self.prefix_range(prefix)
+        return hi - lo
+
+    def with_prefix(self, prefix, limit=None):
+        """Rows of all codes starting with prefix, in code order"""
+        lo, hi = self.prefix_range(prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._rows[lo:hi]
+
+    def longest_prefix(self, code):
+        """Row of the longest known code that code starts with, or -1.
+
+        For "39174000" that is the subheading itself if it exists, else the
+        heading 3917, else the chapter 39.
+        """
+        for n in range(len(code), 0, -1):
+            row = self._exact.get(code[:n])
+            if row is not None:
+                return row
+        return -1
+
+    def ancestors(self, code):
+        """Rows of the known proper prefixes of code, shortest first (chapter, heading, ...)"""
+        rows = []
+        for n in range(1, len(code)):
+            row = self._exact.get(code[:n])
+            if row is not None:
+                rows.append(row)
+        return rows
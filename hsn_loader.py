@@ -1,34 +1,48 @@
-import pandas as pd
 import os
 import sys
+from hsn_cache import load_table
+from hsn_search import DescriptionIndex, load_index
 
-def load_hsn_codes():
+# Sample data used when the HSN master cannot be loaded
+SAMPLE_CODES = ['0101', '0102', '0201', '0202', '0301']
+SAMPLE_DESCRIPTIONS = [
+    'Live horses',
+    'Live bovine animals',
+    'Meat of bovine animals, fresh',
+    'Meat of bovine animals, frozen',
+    'Live fish'
+]
+
+def hsn_workbook_path():
+    # Get the correct path whether running as script or executable
+    if getattr(sys, 'frozen', False):
+        # Running as executable
+        return os.path.join(sys._MEIPASS, "HSN_SAC.xlsx")
+    # Running as script
+    return "HSN_SAC.xlsx"
+
+def load_hsn_table():
+    """Return parallel (codes, descriptions) lists for the HSN master"""
     try:
-        # Get the correct path whether running as script or executable
-        if getattr(sys, 'frozen', False):
-            # Running as executable
-            base_path = sys._MEIPASS
-            file_path = os.path.join(base_path, "HSN_SAC.xlsx")
-        else:
-            # Running as script
-            file_path = "HSN_SAC.xlsx"
-            
-        # Try to load the Excel file
-        if os.path.exists(file_path):
-            df = pd.read_excel(file_path)
-            codes = df['HSN_CD'].astype(str).tolist()
-            return codes, df.set_index('HSN_CD')['HSN_Description'].to_dict()
-        else:
-            raise FileNotFoundError(f"Excel file not found at: {file_path}")
+        # Load through the compiled cache; the workbook is only parsed
+        # when the cache is missing or stale
+        return load_table(hsn_workbook_path())
     except Exception as e:
         print(f"Error loading HSN data: {e}")
         # Return sample data as fallback
-        sample_codes = ['0101', '0102', '0201', '0202', '0301']
-        sample_map = {
-            '0101': 'Live horses',
-            '0102': 'Live bovine animals',
-            '0201': 'Meat of bovine animals, fresh',
-            '0202': 'Meat of bovine animals, frozen',
-            '0301': 'Live fish'
-        }
-        return sample_codes, sample_map
\ No newline at end of file
+        return list(SAMPLE_CODES), list(SAMPLE_DESCRIPTIONS)
+
+def load_hsn_codes():
+    codes, descriptions = load_hsn_table()
+    return codes, dict(zip(codes, descriptions))
+
+def load_hsn_search_index(descriptions):
+    """Return the description search index matching load_hsn_table()'s descriptions"""
+    try:
+        index = load_index(hsn_workbook_path())
+        if len(index) == len(descriptions):
+            return index
+    except Exception as e:
+        print(f"Error loading HSN search index: {e}")
+    # Sample data or an unreadable cache: index what we have in memory
+    return DescriptionIndex(descriptions)
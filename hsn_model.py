@@ -0,0 +1,71 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QComboBox, QListView
+
+class HSNListModel(QAbstractListModel):
+    """List model over the HSN code and description arrays.
+
+    Row text is formatted on demand in data(), so a 20k row master costs
+    two list references instead of 20k item strings.
+    """
+    CodeRole = Qt.UserRole
+    DescriptionRole = Qt.UserRole + 1
+
+    def __init__(self, codes=None, descriptions=None, parent=None):
+        super().__init__(parent)
+        self._codes = codes or []
+        self._descriptions = descriptions or []
+        self._rows = None
+
+    @classmethod
+    def from_map(cls, codes, hsn_map, parent=None):
+        return cls(codes, [hsn_map.get(code, '') for code in codes], parent)
+
+    def set_table(self, codes, descriptions):
+        """Replace the model contents with new parallel code/description lists"""
+        self.beginResetModel()
+        self._codes = codes
+        self._descriptions = descriptions
+        self._rows = None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._codes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return f"{self._codes[row]} - {self._descriptions[row]}"
+        if role == self.CodeRole:
+            return self._codes[row]
+        if role == self.DescriptionRole:
+            return self._descriptions[row]
+        return None
+
+    def code(self, row):
+        return self._codes[row] if 0 <= row < len(self._codes) else ''
+
+    def description(self, row):
+        return self._descriptions[row] if 0 <= row < len(self._descriptions) else ''
+
+    def codes(self):
+        return self._codes
+
+    def row_for_code(self, code):
+        """Row of the first occurrence of code, or -1"""
+        if self._rows is None:
+            self._rows = {}
+            for row, c in enumerate(self._codes):
+                self._rows.setdefault(c, row)
+        return self._rows.get(code, -1)
+
+def attach_to_combo(combo, model):
+    """Show an HSNListModel in a combo box without per-row size calculations"""
+    combo.setModel(model)
+    # The default size policy asks every row for its text to size the combo
+    combo.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+    combo.setMinimumContentsLength(40)
+    # Uniform rows let the popup scroll without measuring each item
+    combo.view().setUniformItemSizes(True)
+    combo.view().setLayoutMode(QListView.Batched)
@@ -0,0 +1,238 @@
+"""Ranked full-text search over HSN descriptions.
+
+Descriptions are tokenized, lightly stemmed and stored in an inverted index
+(term -> doc ids and term frequencies) that is scored with BM25.  The index
+is persisted beside the compiled HSN cache (``.hsnx``) and tagged with the
+workbook hash so it is rebuilt together with the cache.
+"""
+import math
+import os
+import pickle
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
+from hsn_cache import open_cache, user_cache_dir
+
+INDEX_SUFFIX = ".hsnx"
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset([
+    "a", "an", "and", "as", "at", "by", "for", "from", "in", "into", "is", "its",
+    "not", "of", "on", "or", "the", "thereof", "therefor", "to", "whether", "with",
+])
+
+
+def stem(token):
+    """Strip common English suffixes so "bottles"/"bottle" and "fittings"/"fitting" meet"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith("es") and token[-3] in "sxz":
+        return token[:-2]
+    if token.endswith("ches") or token.endswith("shes"):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    if token.endswith("ing") and len(token) > 5:
+        return token[:-3]
+    if token.endswith("ed") and len(token) > 4:
+        return token[:-2]
+    return token
+
+
+def tokenize(text):
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem"""
+    return [stem(t) for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+class DescriptionIndex:
+    """BM25-ranked inverted index over a list of descriptions"""
+
+    def __init__(self, descriptions=None):
+        self.source_sha256 = None
+        self._vocab = []
+        self._postings = []
+        self._doc_len = array("H")
+        self._avgdl = 0.0
+        if descriptions is not None:
+            self._build(descriptions)
+
+    def _build(self, descriptions):
+        postings = {}
+        doc_len = array("H")
+        for doc, text in enumerate(descriptions):
+            terms = tokenize(text)
+            doc_len.append(min(len(terms), 0xFFFF))
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("H"))
+                entry[0].append(doc)
+                entry[1].append(min(tf, 0xFFFF))
+
+        self._vocab = sorted(postings)
+        self._postings = [postings[t] for t in self._vocab]
+        self._doc_len = doc_len
+        self._avgdl = (sum(doc_len) / len(doc_len)) if doc_len else 0.0
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def _term_id(self, term):
+        i = bisect_left(self._vocab, term)
+        if i < len(self._vocab) and self._vocab[i] == term:
+            return i
+        return -1
+
+    def _expand_prefix(self, prefix, limit):
+        """Term ids of up to limit vocabulary terms starting with prefix"""
+        lo = bisect_left(self._vocab, prefix)
+        ids = []
+        for i in range(lo, min(lo + limit, len(self._vocab))):
+            if not self._vocab[i].startswith(prefix):
+                break
+            ids.append(i)
+        return ids
+
+    def _score_term(self, term_id, scores, seen):
+        ids, tfs = self._postings[term_id]
+        n = len(self._doc_len)
+        idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+        doc_len = self._doc_len
+        norm = K1 * (1 - B)
+        scale = K1 * B / self._avgdl if self._avgdl else 0.0
+        for doc, tf in zip(ids, tfs):
+            if doc in seen:
+                continue
+            seen.add(doc)
+            score = idf * tf * (K1 + 1) / (tf + norm + scale * doc_len[doc])
+            scores[doc] = scores.get(doc, 0.0) + score
+
+    def search(self, query, limit=20, prefix_last=True):
+        """Return [(doc, score)] best first.
+
+        With prefix_last the final query word also matches as a prefix, so
+        results keep up while the user is still typing it ("fitt" -> fittings).
+        """
+        words = _TOKEN_RE.findall(str(query).lower())
+        words = [w for w in words if w not in STOPWORDS]
+        if not words or not self._vocab:
+            return []
+
+        scores = {}
+        for pos, word in enumerate(words):
+            term_ids = []
+            exact = self._term_id(stem(word))
+            if exact >= 0:
+                term_ids.append(exact)
+            if prefix_last and pos == len(words) - 1:
+                term_ids.extend(i for i in self._expand_prefix(word, 50) if i != exact)
+            # A document scores once per query word, through its best-ranked form
+            seen = set()
+            for term_id in term_ids:
+                self._score_term(term_id, scores, seen)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def save(self, path):
+        state = {
+            "version": INDEX_VERSION,
+            "source_sha256": self.source_sha256,
+            "vocab": self._vocab,
+            "postings": self._postings,
+            "doc_len": self._doc_len,
+            "avgdl": self._avgdl,
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != INDEX_VERSION:
+            raise ValueError(f"Not a version {INDEX_VERSION} HSN search index: {path}")
+        index = cls()
+        index.source_sha256 = state["source_sha256"]
+        index._vocab = state["vocab"]
+        index._postings = state["postings"]
+        index._doc_len = state["doc_len"]
+        index._avgdl = state["avgdl"]
+        return index
+
+
+def index_path_for(cache_path):
+    return os.path.splitext(cache_path)[0] + INDEX_SUFFIX
+
+
+def load_index(xlsx_path):
+    """Return the search index for the workbook, rebuilding it when the cache changed"""
+    with open_cache(xlsx_path) as cache:
+        sha = cache.source_sha256
+        paths = [index_path_for(cache.path),
+                 os.path.join(user_cache_dir(), os.path.basename(index_path_for(cache.path)))]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                index = DescriptionIndex.load(path)
+            except Exception as e:
+                print(f"Ignoring unreadable HSN search index {path}: {e}")
+                continue
+            if index.source_sha256 == sha and len(index) == len(cache):
+                return index
+
+        index = DescriptionIndex(cache.descriptions())
+        index.source_sha256 = sha
+
+    # A frozen bundle's own directory is a temporary extraction; don't write there
+    targets = paths[1:] if getattr(sys, 'frozen', False) else paths
+    for path in targets:
+        try:
+            index.save(path)
+            break
+        except OSError as e:
+            print(f"Could not write HSN search index {path}: {e}")
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the HSN description search index")
+    parser.add_argument("xlsx", nargs="?", default="HSN_SAC.xlsx")
+    parser.add_argument("query", nargs="*", help="optional query to run against the index")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = load_index(args.xlsx)
+    print(f"Loaded index over {len(index)} descriptions in {(time.perf_counter() - start) * 1000:.0f} ms")
+    if args.query:
+        with open_cache(args.xlsx) as cache:
+            start = time.perf_counter()
+            results = index.search(" ".join(args.query), limit=10)
+            elapsed = (time.perf_counter() - start) * 1000
+            for doc, score in results:
+                print(f"{score:6.2f}  {cache.code(doc)} - {cache.description(doc)}")
+            print(f"{len(results)} results in {elapsed:.2f} ms")
@@ -0,0 +1,17 @@
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from hsn_index import HSNCodeIndex
+
+class HSNLoadWorker(QThread):
+    """Load the HSN master and build its lookup indexes off the UI thread"""
+    # codes, descriptions, HSNCodeIndex, DescriptionIndex, seconds spent loading
+    loaded = pyqtSignal(object, object, object, object, float)
+
+    def run(self):
+        start = time.perf_counter()
+        # Imported here so the cache and workbook readers load on this thread, not before the first paint
+        from hsn_loader import load_hsn_table, load_hsn_search_index
+        codes, descriptions = load_hsn_table()
+        index = HSNCodeIndex(codes)
+        search_index = load_hsn_search_index(descriptions)
+        self.loaded.emit(codes, descriptions, index, search_index, time.perf_counter() - start)
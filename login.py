@@ -1,8 +1,7 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox
 from PyQt5.QtGui import QPainter, QColor
 from PyQt5.QtCore import Qt, pyqtSignal
-import keyring
-import webbrowser
+from credentials import get_service
 from crypto_utils import encrypt_pin, decrypt_pin
 
 class LoginWindow(QWidget):
@@ -98,9 +97,13 @@ class LoginWindow(QWidget):
             return
             
         try:
-            stored_pin = keyring.get_password("HSNApp", email)
+            credentials = get_service()
+            stored_pin = credentials.get_user_pin(email)
+            if not stored_pin or decrypt_pin(stored_pin) != pin:
+                # The cached PIN may be stale if it was reset in another instance
+                stored_pin = credentials.get_user_pin(email, fresh=True)
             if stored_pin and decrypt_pin(stored_pin) == pin:
-                keyring.set_password("HSNApp", "current_user", email)
+                credentials.set_current_user(email)
                 QMessageBox.information(self, "Success", "Login successful!")
                 self.login_successful.emit(email, email.split('@')[0])
             else:
@@ -121,14 +124,15 @@ class LoginWindow(QWidget):
             return
             
         try:
-            # Check if user already exists
-            if keyring.get_password("HSNApp", email):
+            # Check if user already exists (bypassing the cache, another instance may have signed up)
+            credentials = get_service()
+            if credentials.get_user_pin(email, fresh=True):
                 QMessageBox.warning(self, "Error", "User already exists")
                 return
                 
             # Store encrypted PIN
-            keyring.set_password("HSNApp", email, encrypt_pin(pin))
-            keyring.set_password("HSNApp", "current_user", email)
+            credentials.set_user_pin(email, encrypt_pin(pin))
+            credentials.set_current_user(email)
             
             QMessageBox.information(self, "Success", "Account created successfully!")
             self.login_successful.emit(email, email.split('@')[0])
@@ -142,11 +146,12 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Error", "Please enter your email")
             return
             
-        if keyring.get_password("HSNApp", email):
+        credentials = get_service()
+        if credentials.get_user_pin(email, fresh=True):
             # In a real app, you would send a reset email
             # For this demo, we'll just reset the PIN
             try:
-                keyring.delete_password("HSNApp", email)
+                credentials.delete_user(email)
                 QMessageBox.information(self, "PIN Reset", "Your PIN has been reset. Please sign up again.")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"PIN reset failed: {str(e)}")
@@ -155,11 +160,12 @@ class LoginWindow(QWidget):
             
     def onedrive_login(self):
         # Open Microsoft login page
+        import webbrowser
         webbrowser.open("https://login.microsoftonline.com/common/oauth2/v2.0/authorize")
         QMessageBox.information(self, "Microsoft Login", "Please sign in with your Microsoft account in the browser.")
         
         # In a real app, you would implement OAuth flow
         # For this demo, we'll just simulate a successful login
         email = self.email_input.text() or "user@outlook.com"
-        keyring.set_password("HSNApp", "current_user", email)
+        get_service().set_current_user(email)
         self.login_successful.emit(email, email.split('@')[0])
\ No newline at end of file
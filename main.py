@@ -1,16 +1,23 @@
 import sys
 import os
-import shutil
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QComboBox, 
                              QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, 
-                             QMessageBox, QFileDialog, QDesktopWidget, QStatusBar)
-from PyQt5.QtGui import QPainter, QColor
-from PyQt5.QtCore import Qt
-from hsn_loader import load_hsn_codes
-from tax_logic import calculate_tax
-from storage import save_entry
+                             QMessageBox, QFileDialog, QDesktopWidget, QStatusBar, QCompleter,
+                             QProgressBar)
+from PyQt5.QtGui import QPainter, QColor, QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QModelIndex
+from hsn_worker import HSNLoadWorker
+from hsn_model import HSNListModel, attach_to_combo
+from hsn_index import HSNCodeIndex, normalize_code
+from hsn_search import DescriptionIndex
+from tax_logic import calculate_tax_paise, to_paise, format_paise
 from login import LoginWindow
-from onedrive_sync import upload_to_onedrive, download_from_onedrive
+from sync_worker import SyncWorker
+
+# storage, the export and summary dialogs and everything behind them (sqlite3,
+# openpyxl, requests, msal, ...) are imported on first use, keeping them off
+# the path to the first window; see benchmarks/bench_startup.py
 
 class HSNApp(QMainWindow):
     def __init__(self):
@@ -26,12 +33,39 @@ class HSNApp(QMainWindow):
         # Show login window first
         self.show_login()
         
-        # Load HSN data
-        self.hsn_codes, self.hsn_map = load_hsn_codes()
+        # HSN data arrives from a background worker
+        self.hsn_model = HSNListModel()
+        self.hsn_index = HSNCodeIndex([])
+        self.search_index = DescriptionIndex([])
         
         # Initialize UI
         self.initUI()
         
+        # Load HSN data without blocking the first paint
+        self.load_hsn_data()
+        
+    def load_hsn_data(self):
+        """Start loading the HSN master on a worker thread"""
+        self.hsn_load_started = time.perf_counter()
+        self.hsn_worker = HSNLoadWorker(self)
+        self.hsn_worker.loaded.connect(self.on_hsn_loaded)
+        self.hsn_worker.start()
+        
+    def on_hsn_loaded(self, codes, descriptions, index, search_index, load_seconds):
+        """Populate the HSN dropdown once the worker has the data"""
+        self.hsn_model.set_table(codes, descriptions)
+        self.hsn_index = index
+        self.search_index = search_index
+        self.hsn_search.setEnabled(True)
+        self.hsn_combo.setCurrentIndex(0)
+        self.hsn_combo.setEnabled(True)
+        self.calc_button.setEnabled(True)
+        
+        total_ms = (time.perf_counter() - self.hsn_load_started) * 1000
+        self.load_status.setText(
+            f"HSN catalogue: {len(codes)} codes loaded in {load_seconds * 1000:.0f} ms "
+            f"(ready in {total_ms:.0f} ms)")
+        
     def show_login(self):
         """Show login window and handle login result"""
         self.login_window = LoginWindow()
@@ -43,6 +77,11 @@ class HSNApp(QMainWindow):
         self.user_email = email
         self.user_name = name
         self.statusBar.showMessage(f"Logged in as: {name} ({email})")
+        # Uploads need the Microsoft login; jobs queued earlier (including
+        # ones parked for sign-in) run now, with the cached sign-in only
+        self.sync_worker.queue.unpark()
+        if not self.sync_worker.isRunning():
+            self.sync_worker.start()
         
     def center_screen(self):
         """Center window on screen"""
@@ -60,6 +99,19 @@ class HSNApp(QMainWindow):
             self.statusBar.showMessage(f"Logged in as: {self.user_name} ({self.user_email})")
         else:
             self.statusBar.showMessage("Not logged in")
+        self.load_status = QLabel("Loading HSN catalogue...")
+        self.statusBar.addPermanentWidget(self.load_status)
+        self.export_progress = QProgressBar()
+        self.export_progress.setMaximumWidth(200)
+        self.export_progress.setFormat("Export %p%")
+        self.export_progress.hide()
+        self.statusBar.addPermanentWidget(self.export_progress)
+        self.export_worker = None
+        self.sync_status = QLabel()
+        self.statusBar.addPermanentWidget(self.sync_status)
+        self.sync_worker = SyncWorker(parent=self)
+        self.sync_worker.status.connect(self.on_sync_status)
+        self.on_sync_status(len(self.sync_worker.queue), -1.0, "")
         
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -71,10 +123,26 @@ class HSNApp(QMainWindow):
         self.hsn_label.setStyleSheet("font-weight: bold; font-size: 14px;")
         layout.addWidget(self.hsn_label)
         
+        # Type-ahead search by HSN digits or description words
+        self.hsn_search = QLineEdit()
+        self.hsn_search.setStyleSheet("padding: 8px; font-size: 14px;")
+        self.hsn_search.setPlaceholderText("Type HSN digits or description words, e.g. 3917 or PET bottles")
+        self.hsn_search.setEnabled(False)
+        self.completion_model = QStandardItemModel(self)
+        self.hsn_completer = QCompleter(self.completion_model, self)
+        self.hsn_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.hsn_completer.setMaxVisibleItems(15)
+        self.hsn_search.setCompleter(self.hsn_completer)
+        layout.addWidget(self.hsn_search)
+        
+        self.hsn_hint = QLabel()
+        self.hsn_hint.setStyleSheet("color: #555; font-size: 12px;")
+        layout.addWidget(self.hsn_hint)
+        
         self.hsn_combo = QComboBox()
-        for code in self.hsn_codes:
-            desc = self.hsn_map.get(code, '')
-            self.hsn_combo.addItem(f"{code} - {desc}")
+        attach_to_combo(self.hsn_combo, self.hsn_model)
+        self.hsn_combo.setPlaceholderText("Loading catalogue...")
+        self.hsn_combo.setEnabled(False)
         self.hsn_combo.setStyleSheet("padding: 8px; font-size: 14px;")
         layout.addWidget(self.hsn_combo)
         
@@ -133,6 +201,7 @@ class HSNApp(QMainWindow):
         self.calc_button = QPushButton("Calculate Tax")
         self.calc_button.setStyleSheet("padding: 10px; background-color: #4CAF50; color: white; font-size: 14px;")
         self.calc_button.clicked.connect(self.calculate_tax)
+        self.calc_button.setEnabled(False)
         button_layout.addWidget(self.calc_button)
         
         self.save_button = QPushButton("Save Entry")
@@ -145,6 +214,11 @@ class HSNApp(QMainWindow):
         self.export_button.clicked.connect(self.export_csv)
         button_layout.addWidget(self.export_button)
         
+        self.summary_button = QPushButton("HSN Summary")
+        self.summary_button.setStyleSheet("padding: 10px; background-color: #795548; color: white; font-size: 14px;")
+        self.summary_button.clicked.connect(self.show_summary)
+        button_layout.addWidget(self.summary_button)
+        
         # OneDrive sync button
         self.sync_button = QPushButton("Sync to OneDrive")
         self.sync_button.setStyleSheet("padding: 10px; background-color: #0078d4; color: white; font-size: 14px;")
@@ -162,54 +236,116 @@ class HSNApp(QMainWindow):
         
         # Connect signals
         self.hsn_combo.currentIndexChanged.connect(self.update_description)
+        self.hsn_search.textEdited.connect(self.update_completions)
+        self.hsn_search.returnPressed.connect(self.jump_to_code)
+        self.hsn_completer.activated[QModelIndex].connect(self.on_completion_activated)
         
         # Initial update
         self.update_description()
         
+    def update_completions(self, text):
+        """Offer codes matching the typed digits, or descriptions matching the typed words"""
+        self.completion_model.clear()
+        prefix = normalize_code(text)
+        if not prefix:
+            self.hsn_hint.clear()
+            return
+        if not prefix.isdigit():
+            self.update_description_completions(text)
+            return
+            
+        self.show_completions(self.hsn_index.with_prefix(prefix, limit=50))
+        matches = self.hsn_index.count_prefix(prefix)
+        known = self.hsn_index.longest_prefix(prefix)
+        if matches:
+            self.hsn_hint.setText(f"{matches} codes start with {prefix}")
+        elif known >= 0:
+            self.hsn_hint.setText(f"No code starts with {prefix}; closest is "
+                                  f"{self.hsn_model.code(known)} - {self.hsn_model.description(known)}")
+        else:
+            self.hsn_hint.setText(f"No code starts with {prefix}")
+        
+    def update_description_completions(self, text):
+        """Offer the best ranked descriptions for the typed words"""
+        start = time.perf_counter()
+        results = self.search_index.search(text, limit=50)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.show_completions([row for row, _ in results])
+        if results:
+            self.hsn_hint.setText(f"Best {len(results)} matches for \"{text.strip()}\" ({elapsed_ms:.1f} ms)")
+        else:
+            self.hsn_hint.setText(f"No description matches \"{text.strip()}\"")
+            
+    def show_completions(self, rows):
+        for row in rows:
+            item = QStandardItem(self.hsn_model.data(self.hsn_model.index(row), Qt.DisplayRole))
+            item.setData(row, Qt.UserRole)
+            self.completion_model.appendRow(item)
+        if rows:
+            self.hsn_completer.complete()
+        
+    def on_completion_activated(self, index):
+        row = index.data(Qt.UserRole)
+        if row is not None:
+            self.hsn_combo.setCurrentIndex(row)
+            
+    def jump_to_code(self):
+        """Select the typed code (or the longest known code it starts with) or the best description match"""
+        text = self.hsn_search.text()
+        code = normalize_code(text)
+        if code.isdigit():
+            row = self.hsn_index.longest_prefix(code)
+        else:
+            results = self.search_index.search(text, limit=1)
+            row = results[0][0] if results else -1
+        if row >= 0:
+            self.hsn_combo.setCurrentIndex(row)
+            
     def update_description(self):
-        hsn_code = self.hsn_combo.currentText().split(" - ")[0]
-        desc = self.hsn_map.get(hsn_code, '')
-        self.desc_value.setText(desc)
+        row = self.hsn_combo.currentIndex()
+        self.desc_value.setText(self.hsn_model.description(row))
         
     def calculate_tax(self):
         try:
-            value = float(self.value_input.text() or 0)
+            value = to_paise(self.value_input.text() or 0)
             qty = float(self.qty_input.text() or 1)
             tax_slab = self.tax_combo.currentText()
-            hsn_code = self.hsn_combo.currentText().split(" - ")[0]
+            row = self.hsn_combo.currentIndex()
+            hsn_code = self.hsn_model.code(row)
+            description = self.hsn_model.description(row)
             qty_type = self.qty_type_combo.currentText()
             
-            # Calculate tax
-            cgst, sgst = calculate_tax(value, tax_slab)
+            # Calculate tax exactly in integer paise
+            cgst, sgst = calculate_tax_paise(value, tax_slab)
             total_tax = cgst + sgst
             final_amount = value + total_tax
             
             # Store current calculation
             self.current_entry = {
                 'HSN': hsn_code,
-                'Description': self.hsn_map.get(hsn_code, ''),
+                'Description': description,
                 'QtyType': qty_type,
                 'Qty': qty,
-                'BaseValue': value,
+                'BaseValue': format_paise(value),
                 'TaxSlab': tax_slab,
-                'CGST': cgst,
-                'SGST': sgst,
-                'TotalTax': total_tax,
-                'FinalAmount': final_amount,
+                'CGST': format_paise(cgst),
+                'SGST': format_paise(sgst),
+                'TotalTax': format_paise(total_tax),
+                'FinalAmount': format_paise(final_amount),
                 'UserEmail': self.user_email or 'anonymous'
             }
             
             # Format result
             result = f"""
             <b>HSN Code:</b> {hsn_code}<br>
-            <b>Description:</b> {self.hsn_map.get(hsn_code, '')}<br>
+            <b>Description:</b> {description}<br>
             <b>Quantity:</b> {qty} {qty_type}<br>
-            <b>Taxable Value:</b> ₹{value:.2f}<br>
+            <b>Taxable Value:</b> ₹{format_paise(value)}<br>
             <b>Tax Rate:</b> {tax_slab}<br>
-            <b>CGST:</b> ₹{cgst:.2f}<br>
-            <b>SGST:</b> ₹{sgst:.2f}<br>
-            <b>Total Tax:</b> ₹{total_tax:.2f}<br>
-            <b>Final Amount:</b> ₹{final_amount:.2f}
+            <b>CGST:</b> ₹{format_paise(cgst)}<br>
+            <b>SGST:</b> ₹{format_paise(sgst)}<br>
+            <b>Total Tax:</b> ₹{format_paise(total_tax)}<br>
+            <b>Final Amount:</b> ₹{format_paise(final_amount)}
             """
             
             self.result_label.setText(result)
@@ -223,44 +359,128 @@ class HSNApp(QMainWindow):
             return
             
         try:
+            from storage import save_entry
             path = save_entry(self.current_entry)
+            if self.user_email:
+                self.sync_worker.request_sync()
             QMessageBox.information(self, "Success", f"Entry saved to {path}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save entry: {str(e)}")
     
     def export_csv(self):
+        # The same button cancels an export that is running
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.export_worker.cancel()
+            return
         try:
-            if not os.path.exists("data/entries.csv"):
+            from storage import has_entries
+            from export_dialog import ExportDialog
+            from export_worker import ExportWorker
+            if not has_entries():
                 QMessageBox.warning(self, "No Data", "No entries to export.")
                 return
-                
-            file_path, _ = QFileDialog.getSaveFileName(self, "Export CSV", "", "CSV Files (*.csv)")
-            if file_path:
-                shutil.copy("data/entries.csv", file_path)
-                QMessageBox.information(self, "Success", f"Data exported to {file_path}")
+            
+            dialog = ExportDialog(self)
+            if not dialog.exec_():
+                return
+            fmt, columns, filters = dialog.options()
+            if not columns:
+                QMessageBox.warning(self, "No Columns", "Choose at least one column to export.")
+                return
+            
+            file_path, _ = QFileDialog.getSaveFileName(self, "Export Entries", "", dialog.file_filter())
+            if not file_path:
+                return
+            if not file_path.lower().endswith("." + fmt):
+                file_path += "." + fmt
+            
+            self.export_worker = ExportWorker(file_path, fmt, columns, filters, self)
+            self.export_worker.progress.connect(self.on_export_progress)
+            self.export_worker.exported.connect(self.on_export_finished)
+            self.export_worker.failed.connect(self.on_export_failed)
+            self.export_worker.finished.connect(self.on_export_stopped)
+            self.export_progress.setRange(0, 0)
+            self.export_progress.show()
+            self.export_button.setText("Cancel Export")
+            self.export_worker.start()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
     
+    def on_export_progress(self, done, total):
+        self.export_progress.setRange(0, max(total, 1))
+        self.export_progress.setValue(done)
+    
+    def on_export_finished(self, count, file_path, seconds):
+        QMessageBox.information(self, "Success", f"{count} entries exported to {file_path} in {seconds:.1f} s")
+    
+    def on_export_failed(self, message):
+        QMessageBox.warning(self, "Export", message)
+    
+    def on_export_stopped(self):
+        self.export_progress.hide()
+        self.export_button.setText("Export CSV")
+    
+    def show_summary(self):
+        try:
+            from storage import has_entries
+            from summary_dialog import SummaryDialog
+            if not has_entries():
+                QMessageBox.warning(self, "No Data", "No entries saved yet.")
+                return
+            SummaryDialog(self).exec_()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not open the summary: {str(e)}")
+    
     def sync_to_onedrive(self):
-        """Sync data to OneDrive"""
+        """Queue an upload of the entries to OneDrive; the sync worker does it in the background"""
         if not self.user_email:
             QMessageBox.warning(self, "Not Logged In", "Please login with Microsoft to use OneDrive sync")
             return
             
         try:
-            if not os.path.exists("data/entries.csv"):
+            from storage import has_entries
+            if not has_entries():
                 QMessageBox.warning(self, "No Data", "No entries to sync.")
                 return
                 
-            # Upload to OneDrive
-            success = upload_to_onedrive("data/entries.csv", "hsn_data.csv")
+            # The one place sync may prompt for sign-in; the worker then
+            # finds the account in the token cache
+            from onedrive_sync import get_access_token
+            if not get_access_token():
+                QMessageBox.warning(self, "Sync Failed", "Could not sign in to OneDrive.")
+                return
             
-            if success:
-                QMessageBox.information(self, "Success", "Data synced to OneDrive successfully!")
-            else:
-                QMessageBox.warning(self, "Sync Failed", "Failed to sync data to OneDrive.")
+            # Due at once, even if an earlier attempt is backing off or parked
+            self.sync_worker.request_sync(delay=0)
+            if not self.sync_worker.isRunning():
+                self.sync_worker.start()
+            self.statusBar.showMessage("OneDrive sync queued", 5000)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"OneDrive sync failed: {str(e)}")
+    
+    def on_sync_status(self, depth, last_seconds, error):
+        text = f"Sync: {depth} queued" if depth else "Sync: up to date"
+        if last_seconds >= 0:
+            text += f", last {last_seconds * 1000:.0f} ms"
+        if self.sync_worker.queue.parked():
+            text += " (sign in with Sync to OneDrive)"
+        elif error:
+            text += " (offline or failing, will retry)"
+        self.sync_status.setText(text)
+        self.sync_status.setToolTip(error)
+        
+    def closeEvent(self, event):
+        # Don't let Qt destroy worker threads that are still running
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        if self.hsn_worker.isRunning():
+            self.hsn_worker.wait()
+        # Queued sync jobs are on disk and resume next time
+        if self.sync_worker.isRunning():
+            self.sync_worker.stop()
+            self.sync_worker.wait()
+        super().closeEvent(event)
         
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -290,4 +510,14 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = HSNApp()
     window.show()
+    # benchmarks/bench_bundle.py: record when the event loop first runs with the window up, then exit
+    probe = os.getenv("HSN_STARTUP_PROBE")
+    if probe:
+        from PyQt5.QtCore import QTimer
+        def record_startup():
+            with open(probe, "w") as f:
+                f.write(repr(time.time()))
+            window.close()
+            app.quit()
+        QTimer.singleShot(0, record_startup)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,18 +1,16 @@
 import sys
 from PyQt5.QtWidgets import QApplication
 from login import LoginWindow
-from main import HSNApp
-import keyring
+from credentials import get_service
 
 def is_logged_in():
-    email = keyring.get_password("HSNApp", "current_user")
-    pin = keyring.get_password("HSNApp", email) if email else None
-    return bool(email and pin)
+    return get_service().is_logged_in()
 
 def launch_app():
     app = QApplication(sys.argv)
     
     if is_logged_in():
+        from main import HSNApp
         window = HSNApp()
         window.show()
     else:
@@ -21,6 +19,7 @@ def launch_app():
         login_window.show()
         
     def show_main_app():
+        from main import HSNApp
         login_window.close()
         main_window = HSNApp()
         main_window.show()
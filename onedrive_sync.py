@@ -1,31 +1,121 @@
+import json
 import os
+import random
+import threading
+import time
 import requests
 import webbrowser
-from msal import PublicClientApplication
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from crypto_utils import encrypt_bytes, decrypt_bytes
 
 # Load environment variables
 load_dotenv()
 
-def get_access_token():
-    """Get Microsoft Graph API access token using MSAL"""
+# Point at fake_graph.py (e.g. http://127.0.0.1:8765/v1.0) to test without Microsoft
+GRAPH_BASE_URL = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0").rstrip("/")
+
+# Files up to this size go in one PUT; larger ones through an upload session
+SIMPLE_UPLOAD_MAX = 4 * 1024 * 1024
+# Upload session chunks must be multiples of 320 KiB
+CHUNK_UNIT = 320 * 1024
+CHUNK_SIZE = 32 * CHUNK_UNIT   # 10 MiB
+MAX_RETRIES = 6
+UPLOAD_STATE_PATH = "data/sync/upload_sessions.json"
+
+# MSAL token cache, encrypted with the app's keyring key
+TOKEN_CACHE_PATH = os.getenv("TOKEN_CACHE_PATH", "data/msal_token_cache.bin")
+# A fixed bearer token skips MSAL entirely; only meant for testing against fake_graph.py
+GRAPH_ACCESS_TOKEN = os.getenv("GRAPH_ACCESS_TOKEN")
+
+_state_lock = threading.Lock()
+_app = None
+_token_cache = None
+_app_lock = threading.Lock()
+_http = None
+_http_lock = threading.Lock()
+
+def _load_token_cache(path=TOKEN_CACHE_PATH):
+    from msal import SerializableTokenCache
+
+    cache = SerializableTokenCache()
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                cache.deserialize(decrypt_bytes(f.read()).decode("utf-8"))
+        except Exception as e:
+            print(f"Ignoring unreadable token cache {path}: {e}")
+    return cache
+
+def _save_token_cache(path=TOKEN_CACHE_PATH):
+    """Write the token cache back if MSAL changed it"""
+    if _token_cache is None or not _token_cache.has_state_changed:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encrypt_bytes(_token_cache.serialize().encode("utf-8")))
+        os.replace(tmp_path, path)
+        _token_cache.has_state_changed = False
+    except Exception as e:
+        print(f"Could not save token cache {path}: {e}")
+
+def get_msal_app():
+    """The process-wide MSAL client, backed by the persistent token cache"""
+    global _app, _token_cache
+    with _app_lock:
+        if _app is None:
+            # msal is only needed for real sign-in, not with GRAPH_ACCESS_TOKEN
+            from msal import PublicClientApplication
+            _token_cache = _load_token_cache()
+            _app = PublicClientApplication(client_id=os.getenv("CLIENT_ID"),
+                                           authority="https://login.microsoftonline.com/common",
+                                           token_cache=_token_cache)
+        return _app
+
+def http_session():
+    """Shared requests.Session, so calls reuse pooled keep-alive connections"""
+    global _http
+    with _http_lock:
+        if _http is None:
+            _http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _http.mount("https://", adapter)
+            _http.mount("http://", adapter)
+        return _http
+
+def get_access_token(interactive=True):
+    """Get Microsoft Graph API access token using MSAL.
+
+    With interactive=False only the token cache is tried, so background
+    work never opens a browser; None means the user has to sign in.
+    """
+    if GRAPH_ACCESS_TOKEN:
+        return GRAPH_ACCESS_TOKEN
     try:
-        client_id = os.getenv("CLIENT_ID")
-        authority = "https://login.microsoftonline.com/common"  # Use common endpoint
         scopes = os.getenv("SCOPES", "User.Read Files.ReadWrite.AppFolder").split()
         
-        app = PublicClientApplication(client_id=client_id, authority=authority)
+        app = get_msal_app()
         
-        # Try to get token silently first (from cache)
+        # Try to get token silently first (from the persistent cache, refreshing if needed)
         accounts = app.get_accounts()
         if accounts:
             result = app.acquire_token_silent(scopes=scopes, account=accounts[0])
             if result:
+                _save_token_cache()
                 return result.get("access_token")
         
+        if not interactive:
+            return None
+        
         # If silent acquisition fails, use interactive login with browser
         # This will open the default web browser for authentication
         result = app.acquire_token_interactive(scopes=scopes)
+        _save_token_cache()
         if "access_token" in result:
             return result["access_token"]
         else:
@@ -36,23 +126,30 @@ def get_access_token():
         print(f"Error getting access token: {str(e)}")
         return None
 
-def upload_to_onedrive(local_path, onedrive_filename):
+def approot_item_url(onedrive_filename):
+    """Graph URL of a file in the app folder (append /content, /createUploadSession, ...)"""
+    return f"{GRAPH_BASE_URL}/me/drive/special/approot:/{quote(onedrive_filename)}:"
+
+def upload_to_onedrive(local_path, onedrive_filename, token=None, content_type="text/csv"):
     """Upload a file to OneDrive App folder"""
     try:
-        token = get_access_token()
+        if os.path.getsize(local_path) > SIMPLE_UPLOAD_MAX:
+            return upload_large_file(local_path, onedrive_filename, token=token)
+            
+        token = token or get_access_token()
         if not token:
             return False
             
         headers = {
             "Authorization": f"Bearer {token}",
-            "Content-Type": "text/csv"
+            "Content-Type": content_type
         }
         
         # Upload to app folder
-        url = f"https://graph.microsoft.com/v1.0/me/drive/special/approot:/{onedrive_filename}:/content"
+        url = f"{approot_item_url(onedrive_filename)}/content"
         
         with open(local_path, "rb") as f:
-            response = requests.put(url, headers=headers, data=f)
+            response = http_session().put(url, headers=headers, data=f)
             
         if response.status_code in (200, 201):
             return True
@@ -64,10 +161,188 @@ def upload_to_onedrive(local_path, onedrive_filename):
         print(f"Error uploading to OneDrive: {str(e)}")
         return False
 
-def download_from_onedrive(onedrive_filename, local_path):
+def _load_sessions(state_path):
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_session(state_path, onedrive_filename, session):
+    """Record (or with session=None, forget) the upload session for a file"""
+    with _state_lock:
+        sessions = _load_sessions(state_path)
+        if session is None:
+            sessions.pop(onedrive_filename, None)
+        else:
+            sessions[onedrive_filename] = session
+        directory = os.path.dirname(state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sessions, f, indent=1)
+        os.replace(tmp_path, state_path)
+
+def _next_offset(ranges):
+    """First missing byte from a nextExpectedRanges list like ["26-"] or ["0-99", "200-"]"""
+    return min(int(r.split("-")[0]) for r in ranges) if ranges else None
+
+def _session_offset(upload_url):
+    """Byte offset the session expects next, or None if the session is gone"""
+    response = http_session().get(upload_url, timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return _next_offset(response.json().get("nextExpectedRanges", []))
+
+def _backoff(attempt, retry_after=None):
+    """Exponential backoff with full jitter, or the server's Retry-After"""
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return random.uniform(0, min(60.0, 0.5 * 2 ** attempt))
+
+def _create_session(local_path, onedrive_filename, token, stat):
+    response = http_session().post(f"{approot_item_url(onedrive_filename)}/createUploadSession",
+                                   headers={"Authorization": f"Bearer {token}"},
+                                   json={"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+                                   timeout=30)
+    response.raise_for_status()
+    body = response.json()
+    return {
+        "uploadUrl": body["uploadUrl"],
+        "expirationDateTime": body.get("expirationDateTime"),
+        "local_path": os.path.abspath(local_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+def upload_large_file(local_path, onedrive_filename, token=None, chunk_size=CHUNK_SIZE,
+                      state_path=UPLOAD_STATE_PATH, max_retries=MAX_RETRIES):
+    """Upload a file through a Graph upload session, resuming an earlier session if one
+    was interrupted.
+
+    The session URL is saved in state_path, so a crash or lost connection
+    continues from the last byte the server has.  After any failure the
+    offset is re-read from the server rather than assumed, so a retried
+    chunk is never appended twice.
+    """
+    if chunk_size % CHUNK_UNIT:
+        raise ValueError(f"chunk_size must be a multiple of {CHUNK_UNIT} bytes")
+    try:
+        stat = os.stat(local_path)
+        session = _load_sessions(state_path).get(onedrive_filename)
+        offset = None
+        if session is not None:
+            unchanged = (session.get("local_path") == os.path.abspath(local_path)
+                         and session.get("size") == stat.st_size
+                         and session.get("mtime_ns") == stat.st_mtime_ns)
+            if unchanged:
+                offset = _session_offset(session["uploadUrl"])
+            else:
+                # The file changed since the session started; its bytes are stale
+                try:
+                    http_session().delete(session["uploadUrl"], timeout=30)
+                except requests.RequestException:
+                    pass
+            if offset is None:
+                session = None
+                _save_session(state_path, onedrive_filename, None)
+
+        if session is None:
+            token = token or get_access_token()
+            if not token:
+                return False
+            session = _create_session(local_path, onedrive_filename, token, stat)
+            _save_session(state_path, onedrive_filename, session)
+            offset = 0
+
+        attempt = 0
+        with open(local_path, "rb") as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                end = offset + len(chunk) - 1
+                # The upload URL is pre-authorized; Graph rejects an Authorization header here
+                headers = {"Content-Length": str(len(chunk)),
+                           "Content-Range": f"bytes {offset}-{end}/{stat.st_size}"}
+                retry_after = None
+                try:
+                    response = http_session().put(session["uploadUrl"], headers=headers, data=chunk, timeout=120)
+                    status = response.status_code
+                    retry_after = response.headers.get("Retry-After")
+                except requests.RequestException as e:
+                    print(f"Upload chunk at {offset} failed: {e}")
+                    status = None
+
+                if status in (200, 201):
+                    _save_session(state_path, onedrive_filename, None)
+                    return True
+                if status == 202:
+                    attempt = 0
+                    next_offset = _next_offset(response.json().get("nextExpectedRanges", []))
+                    offset = end + 1 if next_offset is None else next_offset
+                    continue
+                if status == 404:
+                    print("Upload session expired; starting a new one next time")
+                    _save_session(state_path, onedrive_filename, None)
+                    return False
+                if status is not None and status not in (416, 429) and status < 500:
+                    print(f"Upload failed: {status}")
+                    print(response.text)
+                    return False
+
+                # Lost connection, throttling, server error or a range conflict:
+                # wait, then ask the server where to continue
+                attempt += 1
+                if attempt > max_retries:
+                    print(f"Upload of {onedrive_filename} paused at byte {offset}; it will resume next time")
+                    return False
+                if status != 416:
+                    time.sleep(_backoff(attempt, retry_after))
+                try:
+                    server_offset = _session_offset(session["uploadUrl"])
+                except requests.RequestException as e:
+                    print(f"Could not read upload session status: {e}")
+                    continue
+                if server_offset is None:
+                    # Everything arrived but the final response was lost, or the session expired
+                    _save_session(state_path, onedrive_filename, None)
+                    return _remote_size(onedrive_filename, token) == stat.st_size
+                offset = server_offset
+    except Exception as e:
+        print(f"Error uploading to OneDrive: {str(e)}")
+        return False
+
+def remote_item(onedrive_filename, token=None):
+    """Metadata of a file in the app folder, or None if it doesn't exist; raises on other failures"""
+    token = token or get_access_token()
+    if not token:
+        raise RuntimeError("No OneDrive access token")
+    response = http_session().get(approot_item_url(onedrive_filename),
+                                  headers={"Authorization": f"Bearer {token}"}, timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def _remote_size(onedrive_filename, token=None):
+    token = token or get_access_token()
+    if not token:
+        return None
+    response = http_session().get(approot_item_url(onedrive_filename),
+                                  headers={"Authorization": f"Bearer {token}"}, timeout=30)
+    if response.status_code != 200:
+        return None
+    return response.json().get("size")
+
+def download_from_onedrive(onedrive_filename, local_path, token=None):
     """Download a file from OneDrive App folder"""
     try:
-        token = get_access_token()
+        token = token or get_access_token()
         if not token:
             return False
             
@@ -76,14 +351,20 @@ def download_from_onedrive(onedrive_filename, local_path):
         }
         
         # Download from app folder
-        url = f"https://graph.microsoft.com/v1.0/me/drive/special/approot:/{onedrive_filename}:/content"
+        url = f"{approot_item_url(onedrive_filename)}/content"
         
-        response = requests.get(url, headers=headers)
+        response = http_session().get(url, headers=headers, stream=True)
         
         if response.status_code == 200:
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, "wb") as f:
-                f.write(response.content)
+            directory = os.path.dirname(local_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Stream to a temporary file so large downloads don't sit in memory
+            tmp_path = f"{local_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                for block in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(block)
+            os.replace(tmp_path, local_path)
             return True
         else:
             print(f"Download failed: {response.status_code}")
@@ -91,4 +372,4 @@ def download_from_onedrive(onedrive_filename, local_path):
             return False
     except Exception as e:
         print(f"Error downloading from OneDrive: {str(e)}")
-        return False
\ No newline at end of file
+        return False
@@ -6,6 +6,7 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QComboBox,
                              QMessageBox, QFileDialog, QDesktopWidget)
 from PyQt5.QtGui import QPainter, QColor
 from PyQt5.QtCore import Qt
+from hsn_model import HSNListModel, attach_to_combo
 
 # Load HSN codes from Excel
 def load_hsn_codes():
@@ -60,6 +61,7 @@ class HSNApp(QMainWindow):
         
         # Load HSN data
         self.hsn_codes, self.hsn_map = load_hsn_codes()
+        self.hsn_model = HSNListModel.from_map(self.hsn_codes, self.hsn_map)
         
         self.initUI()
         
@@ -82,9 +84,7 @@ class HSNApp(QMainWindow):
         layout.addWidget(self.hsn_label)
         
         self.hsn_combo = QComboBox()
-        for code in self.hsn_codes:
-            desc = self.hsn_map.get(code, '')
-            self.hsn_combo.addItem(f"{code} - {desc}")
+        attach_to_combo(self.hsn_combo, self.hsn_model)
         self.hsn_combo.setStyleSheet("padding: 8px; font-size: 14px;")
         layout.addWidget(self.hsn_combo)
         
@@ -171,16 +171,17 @@ class HSNApp(QMainWindow):
         self.update_description()
         
     def update_description(self):
-        hsn_code = self.hsn_combo.currentText().split(" - ")[0]
-        desc = self.hsn_map.get(hsn_code, '')
-        self.desc_value.setText(desc)
+        row = self.hsn_combo.currentIndex()
+        self.desc_value.setText(self.hsn_model.description(row))
         
     def calculate_tax(self):
         try:
             value = float(self.value_input.text() or 0)
             qty = float(self.qty_input.text() or 1)
             tax_slab = self.tax_combo.currentText()
-            hsn_code = self.hsn_combo.currentText().split(" - ")[0]
+            row = self.hsn_combo.currentIndex()
+            hsn_code = self.hsn_model.code(row)
+            description = self.hsn_model.description(row)
             qty_type = self.qty_type_combo.currentText()
             
             # Calculate tax
@@ -191,7 +192,7 @@ class HSNApp(QMainWindow):
             # Store current calculation
             self.current_entry = {
                 'HSN': hsn_code,
-                'Description': self.hsn_map.get(hsn_code, ''),
+                'Description': description,
                 'QtyType': qty_type,
                 'Qty': qty,
                 'BaseValue': value,
@@ -205,7 +206,7 @@ class HSNApp(QMainWindow):
             # Format result
             result = f"""
             <b>HSN Code:</b> {hsn_code}<br>
-            <b>Description:</b> {self.hsn_map.get(hsn_code, '')}<br>
+            <b>Description:</b> {description}<br>
             <b>Quantity:</b> {qty} {qty_type}<br>
             <b>Taxable Value:</b> ₹{value:.2f}<br>
             <b>Tax Rate:</b> {tax_slab}<br>
@@ -239,8 +240,10 @@ class HSNApp(QMainWindow):
                 
             file_path, _ = QFileDialog.getSaveFileName(self, "Export CSV", "", "CSV Files (*.csv)")
             if file_path:
-                import shutil
-                shutil.copy("data/entries.csv", file_path)
+                # Normalize the mixed row layouts on the way out
+                from entry_reader import read_entries
+                from storage import write_entries_csv
+                write_entries_csv(read_entries("data/entries.csv"), file_path)
                 QMessageBox.information(self, "Success", f"Data exported to {file_path}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
@@ -1,12 +1,662 @@
+import atexit
+import csv
+import itertools
 import os
-import pandas as pd
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from tax_logic import to_paise, format_paise
+from entry_summary import (Aggregates, GROUP_FIELDS, SUMMARY_VERSION, TOTAL_FIELDS,
+                           check_group_by)
+
+ENTRIES_PATH = "data/entries.csv"
+DB_PATH = "data/entries.db"
+SYNC_SNAPSHOT_PATH = "data/sync/hsn_data.csv"
+ARCHIVE_DIR = "data/archive"
+ENTRY_FIELDS = ['HSN', 'Description', 'QtyType', 'Qty', 'BaseValue', 'TaxSlab',
+                'CGST', 'SGST', 'TotalTax', 'FinalAmount', 'UserEmail', 'Timestamp']
+MONEY_FIELDS = ('BaseValue', 'CGST', 'SGST', 'TotalTax', 'FinalAmount')
+
+# "sqlite" (default) or "csv"
+BACKEND_SQLITE = "sqlite"
+BACKEND_CSV = "csv"
+STORAGE_BACKEND = os.getenv("HSN_STORAGE_BACKEND", BACKEND_SQLITE)
+
+# When EntryWriter makes appended rows durable
+FLUSH_EACH = "entry"          # flush and fsync after every entry
+FLUSH_INTERVAL = "interval"   # fsync at most every `interval` seconds
+FLUSH_GROUP = "group"         # fsync once per `group_size` entries (group commit)
+FLUSH_POLICIES = (FLUSH_EACH, FLUSH_INTERVAL, FLUSH_GROUP)
+
+class EntryWriter:
+    """Long-lived, buffered CSV appender with a fixed entry schema.
+
+    The file is opened once; rows go through a write buffer and are made
+    durable according to the flush policy.  With FLUSH_INTERVAL a
+    background thread also syncs pending rows when no further entries
+    arrive.  close() (or leaving a with block) always syncs.
+    """
+
+    def __init__(self, path=ENTRIES_PATH, policy=FLUSH_EACH, interval=1.0, group_size=100,
+                 fields=ENTRY_FIELDS, buffer_size=64 * 1024):
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy: {policy}")
+        self.path = path
+        self.policy = policy
+        self.interval = interval
+        self.group_size = group_size
+        self.fields = list(fields)
+        self._known = set(self.fields)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", newline="", encoding="utf-8", buffering=buffer_size)
+        self._csv = csv.writer(self._file)
+        # Header only for an empty file, not merely a missing one
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._csv.writerow(self.fields)
+            self._sync()
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if policy == FLUSH_INTERVAL:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def write(self, entry):
+        """Append one entry dict; keys must come from the writer's fields"""
+        unknown = entry.keys() - self._known
+        if unknown:
+            raise ValueError(f"Unknown entry fields: {', '.join(sorted(unknown))}")
+        row = [entry.get(field, '') for field in self.fields]
+        with self._lock:
+            self._csv.writerow(row)
+            self._pending += 1
+            if self.policy == FLUSH_EACH:
+                self._sync()
+            elif self.policy == FLUSH_GROUP and self._pending >= self.group_size:
+                self._sync()
+            elif self.policy == FLUSH_INTERVAL and time.monotonic() - self._last_sync >= self.interval:
+                self._sync()
+
+    def write_many(self, entries):
+        for entry in entries:
+            self.write(entry)
+
+    def flush(self, fsync=True):
+        """Push buffered rows to the OS, and to disk if fsync"""
+        with self._lock:
+            if fsync:
+                self._sync()
+            else:
+                self._file.flush()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if self._pending and not self._file.closed:
+                    self._sync()
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+def read_csv_entries(path):
+    """Yield normalized entry dicts from an entries CSV of any layout (see entry_reader)"""
+    from entry_reader import read_entries
+    return read_entries(path)
+
+def _matches(entry, start=None, end=None, user=None, hsn_prefix=None, slab=None):
+    timestamp = entry.get('Timestamp', '')
+    if start and timestamp < start:
+        return False
+    if end and timestamp >= end:
+        return False
+    if user and entry.get('UserEmail') != user:
+        return False
+    if hsn_prefix and not str(entry.get('HSN', '')).startswith(hsn_prefix):
+        return False
+    if slab and entry.get('TaxSlab') != slab:
+        return False
+    return True
+
+def write_entries_csv(entries, dest):
+    """Stream entries to dest as a CSV with an ENTRY_FIELDS header; returns the row count"""
+    directory = os.path.dirname(dest)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(dest, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ENTRY_FIELDS)
+        for entry in entries:
+            writer.writerow([entry.get(field, '') for field in ENTRY_FIELDS])
+            count += 1
+    return count
+
+class CSVEntryStore:
+    """Entries kept in the flat data/entries.csv file.
+
+    Summary totals live in a JSON sidecar tagged with the file's size and
+    mtime, so a sidecar left behind by a crash is detected and rebuilt.
+    The UI thread and the sync thread (entry_merge) both write, so changes
+    to the file and the totals are serialized by a lock.
+    """
+    backend = BACKEND_CSV
+
+    def __init__(self, path=ENTRIES_PATH):
+        self.path = path
+        self.summary_path = os.path.splitext(path)[0] + ".summary.json"
+        self._writer = None
+        self._aggregates = None
+        # Reentrant: delete_entries and rebuild_summary go through _get_aggregates
+        self._lock = threading.RLock()
+
+    def _get_writer(self):
+        if self._writer is None or self._writer.closed:
+            self._writer = EntryWriter(self.path, policy=FLUSH_EACH)
+        return self._writer
+
+    def _source_stat(self):
+        if not os.path.exists(self.path):
+            return None
+        st = os.stat(self.path)
+        return st.st_size, st.st_mtime_ns
+
+    def _get_aggregates(self):
+        with self._lock:
+            if self._aggregates is None:
+                self._aggregates = Aggregates.load(self.summary_path, self._source_stat())
+                if self._aggregates is None:
+                    self.rebuild_summary()
+            return self._aggregates
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        with self._lock:
+            aggregates = self._get_aggregates()
+            writer = self._get_writer()
+            for entry in entries:
+                writer.write(entry)
+                aggregates.add(entry)
+
+    def iter_entries(self, **filters):
+        if self._writer is not None and not self._writer.closed:
+            self._writer.flush(fsync=False)
+        if not os.path.exists(self.path):
+            return
+        for entry in read_csv_entries(self.path):
+            if _matches(entry, **filters):
+                yield entry
+
+    def count(self, **filters):
+        return sum(1 for _ in self.iter_entries(**filters))
+
+    def has_entries(self):
+        """True once the file has a readable entry; stops at the first one"""
+        entries = self.iter_entries()
+        try:
+            return next(entries, None) is not None
+        finally:
+            entries.close()
+
+    def delete_entries(self, keep_summary=False, **filters):
+        """Remove entries matching the filters by rewriting the file; returns the count removed.
+
+        keep_summary leaves them in the totals, for entries moved to the archive.
+        """
+        if not filters or not os.path.exists(self.path):
+            return 0
+        removed = 0
+
+        def keep():
+            nonlocal removed
+            for entry in read_csv_entries(self.path):
+                if _matches(entry, **filters):
+                    removed += 1
+                    if not keep_summary:
+                        aggregates.add(entry, sign=-1)
+                else:
+                    yield entry
+
+        with self._lock:
+            aggregates = self._get_aggregates()
+            self._close_writer()
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            write_entries_csv(keep(), tmp_path)
+            os.replace(tmp_path, self.path)
+            aggregates.save(self.summary_path, self._source_stat())
+        return removed
+
+    def summary_is_current(self):
+        return Aggregates.load(self.summary_path, self._source_stat()) is not None
+
+    def rebuild_summary(self, extra_entries=()):
+        """Recompute the totals from the file plus extra_entries (archived ones); returns the group count"""
+        with self._lock:
+            self._aggregates = Aggregates().add_many(itertools.chain(extra_entries, self.iter_entries()))
+            self._aggregates.save(self.summary_path, self._source_stat())
+            return len(self._aggregates)
+
+    def summary(self, group_by=('HSN',), **filters):
+        with self._lock:
+            return self._get_aggregates().query(group_by, **filters)
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def close(self):
+        with self._lock:
+            self._close_writer()
+            if self._aggregates is not None:
+                self._aggregates.save(self.summary_path, self._source_stat())
+
+class SQLiteEntryStore:
+    """Entries in a SQLite database (WAL mode) indexed by HSN, slab, user and time.
+
+    Money columns are stored as integer paise.  Each iter_entries() call
+    reads through its own connection, so exports and reports can run on
+    worker threads while the UI keeps appending.
+    """
+    backend = BACKEND_SQLITE
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            HSN TEXT NOT NULL,
+            Description TEXT,
+            QtyType TEXT,
+            Qty REAL,
+            BaseValue INTEGER,
+            TaxSlab TEXT,
+            CGST INTEGER,
+            SGST INTEGER,
+            TotalTax INTEGER,
+            FinalAmount INTEGER,
+            UserEmail TEXT,
+            Timestamp TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_hsn ON entries(HSN);
+        CREATE INDEX IF NOT EXISTS idx_entries_slab ON entries(TaxSlab);
+        CREATE INDEX IF NOT EXISTS idx_entries_user ON entries(UserEmail);
+        CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(Timestamp);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS summary (
+            Month TEXT NOT NULL,
+            UserEmail TEXT NOT NULL,
+            HSN TEXT NOT NULL,
+            TaxSlab TEXT NOT NULL,
+            QtyType TEXT NOT NULL,
+            Entries INTEGER NOT NULL,
+            Qty REAL NOT NULL,
+            BaseValue INTEGER NOT NULL,
+            CGST INTEGER NOT NULL,
+            SGST INTEGER NOT NULL,
+            TotalTax INTEGER NOT NULL,
+            FinalAmount INTEGER NOT NULL,
+            PRIMARY KEY (Month, UserEmail, HSN, TaxSlab, QtyType)
+        ) WITHOUT ROWID;
+    """
+    _INSERT = (f"INSERT INTO entries ({', '.join(ENTRY_FIELDS)}) "
+               f"VALUES ({', '.join('?' for _ in ENTRY_FIELDS)})")
+    _UPSERT_SUMMARY = (
+        f"INSERT INTO summary ({', '.join(GROUP_FIELDS + TOTAL_FIELDS)}) "
+        f"VALUES ({', '.join('?' for _ in GROUP_FIELDS + TOTAL_FIELDS)}) "
+        f"ON CONFLICT ({', '.join(GROUP_FIELDS)}) DO UPDATE SET "
+        + ", ".join(f"{field} = {field} + excluded.{field}" for field in TOTAL_FIELDS))
+    # Summary groups of the entries table, in GROUP_FIELDS + TOTAL_FIELDS order
+    _GROUP_ENTRIES = (
+        "SELECT substr(Timestamp, 1, 7), UserEmail, HSN, TaxSlab, QtyType, COUNT(*), "
+        "TOTAL(Qty), TOTAL(BaseValue), TOTAL(CGST), TOTAL(SGST), TOTAL(TotalTax), TOTAL(FinalAmount) "
+        "FROM entries{where} GROUP BY 1, 2, 3, 4, 5")
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        with self._conn:
+            self._conn.executescript(self._SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    @staticmethod
+    def _to_row(entry):
+        row = []
+        for field in ENTRY_FIELDS:
+            value = entry.get(field, '')
+            if field in MONEY_FIELDS:
+                value = None if value in ('', None) else to_paise(value)
+            elif field == 'Qty':
+                value = None if value in ('', None) else float(value)
+            else:
+                value = '' if value is None else str(value)
+            row.append(value)
+        return row
+
+    @staticmethod
+    def _to_entry(row):
+        entry = dict(zip(ENTRY_FIELDS, row))
+        for field in MONEY_FIELDS:
+            value = entry[field]
+            entry[field] = '' if value is None else format_paise(value)
+        if entry['Qty'] is None:
+            entry['Qty'] = ''
+        return entry
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    @staticmethod
+    def _summary_delta(rows):
+        """Aggregates of rows from _to_row()"""
+        delta = Aggregates()
+        index = {field: i for i, field in enumerate(ENTRY_FIELDS)}
+        for row in rows:
+            key = (row[index['Timestamp']][:7], row[index['UserEmail']], row[index['HSN']],
+                   row[index['TaxSlab']], row[index['QtyType']])
+            totals = [1, row[index['Qty']] or 0.0]
+            totals.extend(row[index[field]] or 0 for field in MONEY_FIELDS)
+            delta.add_totals(key, totals)
+        return delta
+
+    def _upsert_summary(self, groups, sign=1):
+        self._conn.executemany(self._UPSERT_SUMMARY,
+                               (key + tuple(sign * value for value in totals) for key, totals in groups))
+        if sign < 0:
+            self._conn.execute("DELETE FROM summary WHERE Entries <= 0")
+
+    def _insert(self, entries):
+        """Insert entries and update their summary groups; the caller holds the transaction"""
+        rows = [self._to_row(entry) for entry in entries]
+        delta = self._summary_delta(rows)
+        self._conn.executemany(self._INSERT, rows)
+        self._upsert_summary(delta.groups.items())
+
+    def append_many(self, entries):
+        """Insert entries and update their summary groups in one transaction"""
+        entries = list(entries)
+        with self._lock, self._conn:
+            self._insert(entries)
+
+    @staticmethod
+    def _where(start=None, end=None, user=None, hsn_prefix=None, slab=None):
+        clauses, params = [], []
+        if start:
+            clauses.append("Timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("Timestamp < ?")
+            params.append(end)
+        if user:
+            clauses.append("UserEmail = ?")
+            params.append(user)
+        if hsn_prefix:
+            # A range instead of LIKE so the HSN index is used
+            clauses.append("HSN >= ? AND HSN < ?")
+            params.extend([hsn_prefix, hsn_prefix[:-1] + chr(ord(hsn_prefix[-1]) + 1)])
+        if slab:
+            clauses.append("TaxSlab = ?")
+            params.append(slab)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_entries(self, batch_size=10_000, **filters):
+        """Yield entry dicts in insertion order, optionally filtered by
+        start/end (ISO timestamps, end exclusive), user, hsn_prefix and slab"""
+        where, params = self._where(**filters)
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(ENTRY_FIELDS)} FROM entries{where} ORDER BY id",
+                                  params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._to_entry(row)
+        finally:
+            conn.close()
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM entries{where}", params).fetchone()[0]
+
+    def has_entries(self):
+        with self._lock:
+            return self._conn.execute("SELECT EXISTS (SELECT 1 FROM entries)").fetchone()[0] == 1
+
+    def delete_entries(self, keep_summary=False, **filters):
+        """Remove entries matching the filters; returns the count removed.
+
+        keep_summary leaves them in the totals, for entries moved to the archive.
+        """
+        where, params = self._where(**filters)
+        if not where:
+            return 0
+        with self._lock, self._conn:
+            if not keep_summary:
+                groups = self._conn.execute(self._GROUP_ENTRIES.format(where=where), params).fetchall()
+                self._upsert_summary(((row[:5], row[5:]) for row in groups), sign=-1)
+            return self._conn.execute(f"DELETE FROM entries{where}", params).rowcount
+
+    def summary_is_current(self):
+        return self.get_meta('summary_version') == str(SUMMARY_VERSION)
+
+    def rebuild_summary(self, extra_entries=()):
+        """Recompute the totals from the entries table plus extra_entries (archived ones);
+        returns the group count"""
+        extra = Aggregates().add_many(extra_entries)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM summary")
+            self._conn.execute(f"INSERT INTO summary ({', '.join(GROUP_FIELDS + TOTAL_FIELDS)}) "
+                               + self._GROUP_ENTRIES.format(where=""))
+            self._upsert_summary(extra.groups.items())
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('summary_version', ?)",
+                               (str(SUMMARY_VERSION),))
+            return self._conn.execute("SELECT COUNT(*) FROM summary").fetchone()[0]
+
+    def summary(self, group_by=('HSN',), start_month=None, end_month=None, user=None,
+                hsn_prefix=None, slab=None):
+        """Summary rows like Aggregates.query(), read from the summary table"""
+        group_by = check_group_by(group_by)
+        clauses, params = [], []
+        for clause, value in (("Month >= ?", start_month), ("Month <= ?", end_month),
+                              ("UserEmail = ?", user), ("TaxSlab = ?", slab)):
+            if value:
+                clauses.append(clause)
+                params.append(value)
+        if hsn_prefix:
+            clauses.append("HSN >= ? AND HSN < ?")
+            params.extend([hsn_prefix, hsn_prefix[:-1] + chr(ord(hsn_prefix[-1]) + 1)])
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        columns = list(group_by) + [f"SUM({field})" for field in TOTAL_FIELDS]
+        sql = f"SELECT {', '.join(columns)} FROM summary{where}"
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        names = group_by + TOTAL_FIELDS
+        return [dict(zip(names, row)) for row in rows if row[len(group_by)]]
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_csv(self, csv_path, batch_size=10_000, migrated_from=None, log=None):
+        """Bulk-import an entries CSV of any layout; returns the number of rows imported.
+
+        The whole file goes in one transaction, together with the
+        'migrated_from' mark when one is given, so an import that fails
+        part way leaves nothing behind and is simply run again.  log, if
+        given, gets the reader's per-layout report and each skipped row.
+        """
+        from entry_reader import EntryReader, INVALID
+
+        reader = EntryReader(csv_path)
+        entries = iter(reader)
+        imported = 0
+        with self._lock, self._conn:
+            for batch in iter(lambda: list(itertools.islice(entries, batch_size)), []):
+                self._insert(batch)
+                imported += len(batch)
+            if migrated_from is not None:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                                   (migrated_from,))
+        if log is not None:
+            log(f"{csv_path}: {reader.report()}")
+            for error in reader.errors:
+                log(f"  skipped {error}")
+        elif reader.counts[INVALID]:
+            print(f"Skipped {reader.counts[INVALID]} unreadable rows of {csv_path}")
+        return imported
+
+    def migrate_once(self, csv_path=ENTRIES_PATH):
+        """Import the legacy entries CSV the first time the database is opened"""
+        if self.get_meta('migrated_from') is not None:
+            return 0
+        if not os.path.exists(csv_path):
+            self.set_meta('migrated_from', csv_path)
+            return 0
+        return self.migrate_csv(csv_path, migrated_from=csv_path)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The process-wide entry store for the configured backend"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if STORAGE_BACKEND == BACKEND_CSV:
+                _store = CSVEntryStore(ENTRIES_PATH)
+            else:
+                _store = SQLiteEntryStore(DB_PATH)
+                _store.migrate_once(ENTRIES_PATH)
+            if not _store.summary_is_current():
+                _store.rebuild_summary(_archived_entries())
+            atexit.register(_store.close)
+        return _store
 
 def save_entry(entry):
-    path = "data/entries.csv"
-    os.makedirs("data", exist_ok=True)
-    df = pd.DataFrame([entry])
-    if os.path.exists(path):
-        df.to_csv(path, mode='a', header=False, index=False)
+    entry = dict(entry)
+    if not entry.get('Timestamp'):
+        entry['Timestamp'] = datetime.now().isoformat(timespec='seconds')
+    store = get_store()
+    store.append(entry)
+    return store.path
+
+def _archive():
+    """The closed-month archive (see entry_archive), or None if nothing was archived"""
+    if not os.path.exists(os.path.join(ARCHIVE_DIR, "_manifest.json")):
+        return None
+    from entry_archive import EntryArchive
+    return EntryArchive(ARCHIVE_DIR)
+
+def _archived_entries():
+    archive = _archive()
+    return archive.iter_entries() if archive is not None else ()
+
+def iter_entries(**filters):
+    """Saved entries, archived months first, then the hot store"""
+    archive = _archive()
+    if archive is None:
+        return get_store().iter_entries(**filters)
+    return itertools.chain(archive.iter_entries(**filters), get_store().iter_entries(**filters))
+
+def count_entries(**filters):
+    """Number of saved entries matching the filters, archived ones included"""
+    archive = _archive()
+    archived = archive.count(**filters) if archive is not None else 0
+    return archived + get_store().count(**filters)
+
+def has_entries():
+    """Whether anything was saved, without counting every entry"""
+    archive = _archive()
+    return get_store().has_entries() or (archive is not None and archive.row_count() > 0)
+
+def summarize(group_by=('HSN',), **filters):
+    """Totals of all saved entries (archived ones included) per group, money in paise.
+
+    group_by is any of entry_summary.GROUP_FIELDS; filters are start_month
+    and end_month (YYYY-MM, inclusive), user, hsn_prefix and slab.
+    """
+    return get_store().summary(group_by, **filters)
+
+def rebuild_summary():
+    """Recompute the running totals from every saved entry; returns the group count"""
+    return get_store().rebuild_summary(_archived_entries())
+
+def export_entries(dest, **filters):
+    """Write saved entries to a CSV file; returns the row count"""
+    return write_entries_csv(iter_entries(**filters), dest)
+
+def snapshot_for_sync(path=SYNC_SNAPSHOT_PATH):
+    """CSV snapshot of all entries for uploading; returns its path"""
+    export_entries(path)
+    return path
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HSN entry store maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import entries CSV files into the SQLite store")
+    migrate.add_argument("csv", nargs="*", default=[ENTRIES_PATH])
+    migrate.add_argument("--db", default=DB_PATH)
+    export = sub.add_parser("export", help="export all entries to a CSV file")
+    export.add_argument("dest")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        store = SQLiteEntryStore(args.db)
+        for path in args.csv:
+            print(f"{path}: imported {store.migrate_csv(path, log=print)} entries")
+        store.set_meta('migrated_from', ",".join(args.csv))
+        store.close()
     else:
-        df.to_csv(path, index=False)
-    return path
\ No newline at end of file
+        print(f"Exported {export_entries(args.dest)} entries to {args.dest}")
@@ -0,0 +1,119 @@
+from PyQt5.QtWidgets import (QDialog, QLabel, QComboBox, QPushButton, QVBoxLayout, QHBoxLayout,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox)
+from PyQt5.QtCore import Qt
+from storage import summarize
+from tax_logic import format_paise
+
+# Grouping choices offered in the dialog
+GROUPINGS = [
+    ("HSN", ('HSN',)),
+    ("HSN and slab", ('HSN', 'TaxSlab')),
+    ("HSN, unit and slab", ('HSN', 'QtyType', 'TaxSlab')),
+    ("Month", ('Month',)),
+    ("Month and HSN", ('Month', 'HSN')),
+    ("User", ('UserEmail',)),
+]
+COLUMN_TITLES = {'Month': "Month", 'UserEmail': "User", 'HSN': "HSN", 'TaxSlab': "Slab",
+                 'QtyType': "Unit", 'Entries': "Entries", 'Qty': "Quantity",
+                 'BaseValue': "Taxable Value", 'CGST': "CGST", 'SGST': "SGST", 'TotalTax': "Total Tax"}
+AMOUNT_COLUMNS = ('BaseValue', 'CGST', 'SGST', 'TotalTax')
+
+class AmountItem(QTableWidgetItem):
+    """Shows exact rupees but sorts by the paise value"""
+
+    def __init__(self, paise):
+        super().__init__(format_paise(paise))
+        self.setData(Qt.UserRole, paise)
+
+    def __lt__(self, other):
+        return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+
+class SummaryDialog(QDialog):
+    """HSN-wise totals of saved entries, read from the running summary"""
+
+    def __init__(self, parent=None, user=None):
+        super().__init__(parent)
+        self.setWindowTitle("HSN Summary")
+        self.resize(900, 500)
+        self.user = user
+        self.initUI()
+        self.load_months()
+        self.refresh()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Month:"))
+        self.month_combo = QComboBox()
+        controls.addWidget(self.month_combo)
+        controls.addWidget(QLabel("Group by:"))
+        self.group_combo = QComboBox()
+        for label, _ in GROUPINGS:
+            self.group_combo.addItem(label)
+        controls.addWidget(self.group_combo)
+        controls.addStretch()
+        self.refresh_button = QPushButton("Refresh")
+        controls.addWidget(self.refresh_button)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        self.totals_label = QLabel()
+        self.totals_label.setStyleSheet("font-weight: bold; padding: 5px;")
+        layout.addWidget(self.totals_label)
+        self.setLayout(layout)
+
+        self.month_combo.currentIndexChanged.connect(self.refresh)
+        self.group_combo.currentIndexChanged.connect(self.refresh)
+        self.refresh_button.clicked.connect(self.refresh)
+
+    def load_months(self):
+        self.month_combo.blockSignals(True)
+        self.month_combo.clear()
+        self.month_combo.addItem("All months", None)
+        for row in reversed(summarize(('Month',), user=self.user)):
+            if row['Month']:
+                self.month_combo.addItem(row['Month'], row['Month'])
+        self.month_combo.blockSignals(False)
+
+    def refresh(self):
+        month = self.month_combo.currentData()
+        group_by = GROUPINGS[self.group_combo.currentIndex()][1]
+        try:
+            rows = summarize(group_by, start_month=month, end_month=month, user=self.user)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not load the summary: {str(e)}")
+            return
+
+        columns = list(group_by) + ['Entries', 'Qty'] + list(AMOUNT_COLUMNS)
+        self.table.setSortingEnabled(False)
+        self.table.clear()
+        self.table.setColumnCount(len(columns))
+        self.table.setRowCount(len(rows))
+        self.table.setHorizontalHeaderLabels([COLUMN_TITLES[c] for c in columns])
+        for r, row in enumerate(rows):
+            for c, column in enumerate(columns):
+                value = row[column]
+                if column in AMOUNT_COLUMNS:
+                    item = AmountItem(value)
+                elif column in ('Entries', 'Qty'):
+                    item = QTableWidgetItem()
+                    item.setData(Qt.DisplayRole, value)
+                else:
+                    item = QTableWidgetItem(value or "(none)")
+                if column not in group_by:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(r, c, item)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        entries = sum(row['Entries'] for row in rows)
+        taxable = sum(row['BaseValue'] for row in rows)
+        tax = sum(row['TotalTax'] for row in rows)
+        self.totals_label.setText(f"{len(rows)} groups, {entries} entries   Taxable: ₹{format_paise(taxable)}   "
+                                  f"Tax: ₹{format_paise(tax)}")
@@ -0,0 +1,314 @@
+"""Durable, coalescing queue of OneDrive sync jobs and the loop that runs them.
+
+Jobs are keyed by the OneDrive file they update, so a burst of saves
+collapses into one pending upload; the snapshot is taken when the job
+runs, not when it is queued.  Before uploading, the OneDrive copy is
+merged into the local entries (see entry_merge), so machines sharing the
+file keep each other's entries, and the upload is skipped when the copy
+already has everything.  A job is due DEBOUNCE_SECONDS after the last
+request for it (but no later than MAX_DELAY_SECONDS after the first), and
+a failed job is retried with exponential backoff and jitter.  Jobs only
+use a cached sign-in; without one a job is parked (not retried) until a
+manual sync, which may prompt for sign-in, queues it again.  The queue is
+kept in QUEUE_PATH, so work queued while offline, or left when the app
+closed, is picked up on the next run.
+
+Try it against fake_graph.py:
+
+    python fake_graph.py --port 8765 &
+    python sync_queue.py enqueue
+    GRAPH_BASE_URL=http://127.0.0.1:8765/v1.0 GRAPH_ACCESS_TOKEN=test python sync_queue.py run
+"""
+import json
+import os
+import random
+import threading
+import time
+
+QUEUE_PATH = "data/sync/queue.json"
+ENTRIES_REMOTE_NAME = "hsn_data.csv"
+ACTION_UPLOAD_ENTRIES = "upload_entries"
+
+DEBOUNCE_SECONDS = 5
+MAX_DELAY_SECONDS = 60
+BACKOFF_BASE = 2
+BACKOFF_MAX = 15 * 60
+
+
+class SignInRequired(RuntimeError):
+    """No cached OneDrive sign-in; the job waits for a manual sync"""
+
+
+def backoff_delay(attempts):
+    """Seconds before retry number attempts: exponential, half of it jittered"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class SyncQueue:
+    """Pending sync jobs by OneDrive name, saved to path after every change"""
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._jobs = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return {job['name']: job for job in json.load(f).get('jobs', [])}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable sync queue {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'jobs': list(self._jobs.values())}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def enqueue(self, action=ACTION_UPLOAD_ENTRIES, name=ENTRIES_REMOTE_NAME, delay=DEBOUNCE_SECONDS,
+                now=None):
+        """Ask for name to be synced in delay seconds; merges with a pending job for name.
+
+        delay=0 (a manual sync) makes the job due at once, even while it is
+        backing off or parked; a debounced request never shortens a backoff
+        or wakes a parked job.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None:
+                job = self._jobs[name] = {'name': name, 'action': action, 'version': 0, 'requests': 0,
+                                          'first_queued': now, 'due': now, 'attempts': 0,
+                                          'last_error': None}
+            due = min(now + delay, job['first_queued'] + MAX_DELAY_SECONDS)
+            if job['attempts'] and delay:
+                due = max(due, job['due'])
+            job.update(action=action, due=due)
+            if not delay:
+                job['parked'] = False
+            job['version'] += 1
+            job['requests'] += 1
+            self._save()
+            return dict(job)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def jobs(self):
+        with self._lock:
+            return sorted((dict(job) for job in self._jobs.values()), key=lambda job: job['due'])
+
+    def next_due(self):
+        """Time the earliest job is due, or None if the queue is empty"""
+        with self._lock:
+            return min((job['due'] for job in self._jobs.values() if not job.get('parked')), default=None)
+
+    def take_due(self, now=None):
+        """Copy of the earliest job that is due by now, or None"""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [job for job in self._jobs.values() if job['due'] <= now and not job.get('parked')]
+            return dict(min(due, key=lambda job: job['due'])) if due else None
+
+    def parked(self):
+        """Number of jobs waiting for the user to sign in"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.get('parked'))
+
+    def unpark(self):
+        """Let parked jobs try their cached sign-in again, e.g. after a login"""
+        with self._lock:
+            parked = [job for job in self._jobs.values() if job.get('parked')]
+            for job in parked:
+                job.update(parked=False, due=time.time())
+            if parked:
+                self._save()
+            return len(parked)
+
+    def complete(self, job):
+        """Drop a job that ran, unless it was requested again while running"""
+        with self._lock:
+            current = self._jobs.get(job['name'])
+            if current is None:
+                return
+            if current['version'] == job['version']:
+                del self._jobs[job['name']]
+            else:
+                current.update(attempts=0, last_error=None, first_queued=time.time())
+            self._save()
+
+    def fail(self, job, error, now=None):
+        """Reschedule a job that failed; returns the delay before the retry"""
+        now = time.time() if now is None else now
+        with self._lock:
+            current = self._jobs.get(job['name'])
+            if current is None:
+                return None
+            current['attempts'] += 1
+            delay = backoff_delay(current['attempts'])
+            current.update(due=now + delay, last_error=str(error))
+            self._save()
+            return delay
+
+    def park(self, job, error):
+        """Hold a job that needs sign-in until enqueue(delay=0) or unpark()"""
+        with self._lock:
+            current = self._jobs.get(job['name'])
+            if current is None:
+                return
+            current.update(parked=True, last_error=str(error))
+            self._save()
+
+
+def upload_entries(name):
+    """Merge the OneDrive copy of name into the saved entries, then upload
+    a fresh snapshot if the copy is missing any of them"""
+    from storage import has_entries, snapshot_for_sync
+    from onedrive_sync import download_from_onedrive, get_access_token, remote_item, upload_to_onedrive
+    from entry_merge import merge_csv
+
+    # Never prompt from the background; the manual sync signs in
+    token = get_access_token(interactive=False)
+    if not token:
+        raise SignInRequired("Not signed in to OneDrive")
+    if remote_item(name, token) is not None:
+        remote_path = os.path.join(os.path.dirname(QUEUE_PATH), f"remote_{name}")
+        if not download_from_onedrive(name, remote_path, token):
+            raise RuntimeError(f"Download of {name} failed")
+        try:
+            result = merge_csv(remote_path)
+        finally:
+            os.remove(remote_path)
+        if result['added']:
+            print(f"Merged {result['added']} entries from OneDrive {name}")
+        if not result['local_only']:
+            return
+    if not has_entries():
+        return
+    if not upload_to_onedrive(snapshot_for_sync(), name, token):
+        raise RuntimeError(f"Upload of {name} failed")
+
+
+HANDLERS = {ACTION_UPLOAD_ENTRIES: upload_entries}
+
+
+class SyncRunner:
+    """Runs due jobs from a SyncQueue until stopped; call wake() after enqueueing.
+
+    on_status(depth, last_latency, last_error) is called after every job,
+    from the thread running the loop; last_latency is the seconds the last
+    successful job took.
+    """
+
+    def __init__(self, queue, handlers=None, on_status=None):
+        self.queue = queue
+        self.handlers = handlers or HANDLERS
+        self.on_status = on_status
+        self.last_latency = None
+        self.last_synced = None
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _report(self):
+        if self.on_status:
+            self.on_status(len(self.queue), self.last_latency, self.last_error)
+
+    def run_job(self, job):
+        started = time.perf_counter()
+        try:
+            handler = self.handlers[job['action']]
+            handler(job['name'])
+        except SignInRequired as e:
+            self.last_error = f"{job['name']}: {e}"
+            self.queue.park(job, e)
+            print(f"Sync of {job['name']} is waiting for OneDrive sign-in")
+            self._report()
+            return False
+        except Exception as e:
+            self.last_error = f"{job['name']}: {e}"
+            delay = self.queue.fail(job, e)
+            if delay is not None:
+                print(f"Sync of {job['name']} failed ({e}); retrying in {delay:.1f} s")
+            self._report()
+            return False
+        self.last_latency = time.perf_counter() - started
+        self.last_synced = time.time()
+        self.last_error = None
+        self.queue.complete(job)
+        self._report()
+        return True
+
+    def run_pending(self):
+        """Run every job that is due now; returns how many succeeded"""
+        done = 0
+        while not self._stopped:
+            job = self.queue.take_due()
+            if job is None:
+                break
+            if self.run_job(job):
+                done += 1
+        return done
+
+    def run_forever(self):
+        self._report()
+        while not self._stopped:
+            self._wake.clear()
+            self.run_pending()
+            next_due = self.queue.next_due()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            self._wake.wait(timeout)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OneDrive sync queue")
+    parser.add_argument("command", choices=["status", "enqueue", "run"])
+    parser.add_argument("--queue", default=QUEUE_PATH)
+    parser.add_argument("--name", default=ENTRIES_REMOTE_NAME)
+    parser.add_argument("--wait", action="store_true", help="with run: keep retrying until the queue is empty")
+    parser.add_argument("--sign-in", action="store_true",
+                        help="with run: sign in (in the browser if needed) and retry parked jobs")
+    args = parser.parse_args()
+
+    queue = SyncQueue(args.queue)
+    if args.command == "run" and args.sign_in:
+        from onedrive_sync import get_access_token
+        if get_access_token():
+            queue.unpark()
+    if args.command == "enqueue":
+        queue.enqueue(name=args.name, delay=0)
+    elif args.command == "run":
+        runner = SyncRunner(queue)
+        while True:
+            synced = runner.run_pending()
+            if synced:
+                print(f"Synced {synced} job(s), last in {runner.last_latency * 1000:.0f} ms")
+            next_due = queue.next_due()
+            if not args.wait or next_due is None:
+                break
+            time.sleep(max(0.0, next_due - time.time()))
+    for job in queue.jobs():
+        due = max(0.0, job['due'] - time.time())
+        print(f"{job['name']}: {job['action']}, {job['requests']} request(s), due in {due:.0f} s, "
+              f"{job['attempts']} failed attempt(s)" + (", waiting for sign-in" if job.get('parked') else "")
+              + (f", last error: {job['last_error']}" if job['last_error'] else ""))
+    print(f"{len(queue)} job(s) queued")
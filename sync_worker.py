@@ -0,0 +1,27 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from sync_queue import SyncQueue, SyncRunner, DEBOUNCE_SECONDS
+
+class SyncWorker(QThread):
+    """Run the OneDrive sync queue off the UI thread until stop()"""
+    # jobs queued, seconds the last sync took (-1 before the first), last error or ""
+    status = pyqtSignal(int, float, str)
+
+    def __init__(self, queue=None, parent=None):
+        super().__init__(parent)
+        self.queue = queue if queue is not None else SyncQueue()
+        self.runner = SyncRunner(self.queue, on_status=self._emit_status)
+
+    def _emit_status(self, depth, last_latency, last_error):
+        self.status.emit(depth, -1.0 if last_latency is None else last_latency, last_error or "")
+
+    def request_sync(self, delay=DEBOUNCE_SECONDS):
+        """Queue an upload of the entries and wake the worker"""
+        self.queue.enqueue(delay=delay)
+        self._emit_status(len(self.queue), self.runner.last_latency, self.runner.last_error)
+        self.runner.wake()
+
+    def stop(self):
+        self.runner.stop()
+
+    def run(self):
+        self.runner.run_forever()
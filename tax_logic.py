@@ -1,12 +1,205 @@
+# CGST and SGST percentages for each GST slab
+SLAB_RATES = {
+    "0%": (0.0, 0.0),
+    "0.25%": (0.125, 0.125),
+    "3%": (1.5, 1.5),
+    "5%": (2.5, 2.5),
+    "12%": (6.0, 6.0),
+    "18%": (9.0, 9.0),
+    "28%": (14.0, 14.0)
+}
+SLABS = list(SLAB_RATES)
+
+# Precompiled multipliers, so a lookup is one dict access
+_SLAB_FACTORS = {slab: (cgst / 100, sgst / 100) for slab, (cgst, sgst) in SLAB_RATES.items()}
+_NO_TAX = (0.0, 0.0)
+
 def calculate_tax(base_value, slab):
-    slab_map = {
-        "0%": (0.0, 0.0),
-        "0.25%": (0.125, 0.125),
-        "3%": (1.5, 1.5),
-        "5%": (2.5, 2.5),
-        "12%": (6.0, 6.0),
-        "18%": (9.0, 9.0),
-        "28%": (14.0, 14.0)
+    cgst, sgst = _SLAB_FACTORS.get(slab, _NO_TAX)
+    return base_value * cgst, base_value * sgst
+
+def slab_codes(slabs):
+    """Map slab labels to positions in SLABS; unknown slabs map to -1.
+
+    Integer arrays are taken to be codes already.
+    """
+    import numpy as np
+
+    if hasattr(slabs, "map"):
+        # pandas Series/Index: hash lookup in C
+        import pandas as pd
+        if pd.api.types.is_integer_dtype(slabs.dtype):
+            return slabs.to_numpy(dtype=np.intp)
+        return pd.Index(SLABS).get_indexer(slabs)
+    if isinstance(slabs, np.ndarray) and slabs.dtype.kind in "iu":
+        return slabs.astype(np.intp, copy=False)
+    index = {slab: i for i, slab in enumerate(SLABS)}
+    return np.fromiter((index.get(s, -1) for s in slabs), dtype=np.intp, count=len(slabs))
+
+def _factor_table():
+    import numpy as np
+
+    # One row per slab plus a trailing all-zero row that code -1 lands on
+    table = [_SLAB_FACTORS[slab] for slab in SLABS] + [_NO_TAX]
+    return np.array(table, dtype=np.float64)
+
+def calculate_tax_batch(base_values, slabs):
+    """Vectorized calculate_tax over arrays of base values and slabs.
+
+    slabs may be slab labels ("18%") or codes from slab_codes().  Returns a
+    dict of float64 arrays: cgst, sgst, total_tax and final_amount.
+    """
+    import numpy as np
+
+    base = np.asarray(base_values, dtype=np.float64)
+    factors = _factor_table()[slab_codes(slabs)]
+    cgst = base * factors[:, 0]
+    sgst = base * factors[:, 1]
+    total_tax = cgst + sgst
+    return {
+        'cgst': cgst,
+        'sgst': sgst,
+        'total_tax': total_tax,
+        'final_amount': base + total_tax
+    }
+
+def calculate_tax_frame(df, value_col='BaseValue', slab_col='TaxSlab'):
+    """Return a copy of df with CGST, SGST, TotalTax and FinalAmount columns"""
+    result = calculate_tax_batch(df[value_col].to_numpy(), df[slab_col])
+    return df.assign(CGST=result['cgst'], SGST=result['sgst'],
+                     TotalTax=result['total_tax'], FinalAmount=result['final_amount'])
+
+# Fixed-point engine: amounts are integer paise and rates are integer
+# thousandths of a percent, so every slab (including 0.125%) is exact.
+RATE_SCALE = 100_000
+SLAB_RATES_FIXED = {slab: (round(cgst * 1000), round(sgst * 1000))
+                    for slab, (cgst, sgst) in SLAB_RATES.items()}
+
+# Rounding of each tax amount to whole paise
+ROUND_HALF_UP = "half_up"      # 0.5 paise and above goes up (away from zero)
+ROUND_HALF_EVEN = "half_even"  # banker's rounding
+ROUND_UP = "up"                # any fraction of a paisa goes up (away from zero)
+
+def to_paise(amount):
+    """Convert a rupee amount (str, int, float or Decimal) to integer paise, rounding half up"""
+    from decimal import Decimal, InvalidOperation, ROUND_HALF_UP as DECIMAL_HALF_UP
+
+    try:
+        value = Decimal(str(amount).strip() or "0")
+        if not value.is_finite():
+            raise ValueError(f"Invalid amount: {amount!r}")
+        return int(value.quantize(Decimal("0.01"), rounding=DECIMAL_HALF_UP) * 100)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+
+def parse_paise(value):
+    """to_paise for amounts read from files and requests, with a fast path for
+    plain "1234.50" strings and ints; empty, None and bools are invalid"""
+    if type(value) is str:
+        whole, _, frac = value.partition(".")
+        if whole.isascii() and whole.isdigit() and len(frac) <= 2 and frac.isascii() \
+                and (frac.isdigit() or not frac):
+            return int(whole) * 100 + int(frac.ljust(2, "0"))
+        if not value.strip():
+            raise ValueError(f"Invalid amount: {value!r}")
+    elif type(value) is int:
+        return value * 100
+    elif value is None or isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    return to_paise(value)
+
+def format_paise(paise):
+    """Render integer paise as an exact rupee string, e.g. 35000 -> "350.00" """
+    paise = int(paise)
+    sign = "-" if paise < 0 else ""
+    rupees, rem = divmod(abs(paise), 100)
+    return f"{sign}{rupees}.{rem:02d}"
+
+def format_paise_batch(paise):
+    """format_paise over an int array; returns a list of strings"""
+    import numpy as np
+
+    # p / 100 is the double nearest the exact value, so "%.2f" restores it exactly
+    return [f"{p / 100:.2f}" for p in np.asarray(paise, dtype=np.int64).tolist()]
+
+def round_to_rupee(paise):
+    """Round paise to the nearest whole rupee (50 paise and above goes up), as for GST payable"""
+    paise = int(paise)
+    rupees = (abs(paise) + 50) // 100
+    return -rupees * 100 if paise < 0 else rupees * 100
+
+def _divide(numerator, rounding):
+    """numerator / RATE_SCALE rounded to an integer, symmetric around zero"""
+    magnitude = abs(numerator)
+    if rounding == ROUND_HALF_UP:
+        q = (magnitude + RATE_SCALE // 2) // RATE_SCALE
+    elif rounding == ROUND_UP:
+        q = (magnitude + RATE_SCALE - 1) // RATE_SCALE
+    elif rounding == ROUND_HALF_EVEN:
+        q, r = divmod(magnitude, RATE_SCALE)
+        if 2 * r > RATE_SCALE or (2 * r == RATE_SCALE and q % 2):
+            q += 1
+    else:
+        raise ValueError(f"Unknown rounding mode: {rounding}")
+    return -q if numerator < 0 else q
+
+def calculate_tax_paise(base_paise, slab, rounding=ROUND_HALF_UP):
+    """Exact CGST and SGST in paise for a base value in paise"""
+    cgst, sgst = SLAB_RATES_FIXED.get(slab, (0, 0))
+    return _divide(base_paise * cgst, rounding), _divide(base_paise * sgst, rounding)
+
+def to_paise_batch(amounts):
+    """Vectorized to_paise: the same paise, rounded half up, for a float array
+    or a sequence of amount strings; raises ValueError on an invalid amount"""
+    import numpy as np
+
+    amounts = np.asarray(amounts)
+    if amounts.dtype.kind not in "fiu":
+        return np.array([parse_paise(a) for a in amounts.tolist()], dtype=np.int64)
+    values = amounts.astype(np.float64)
+    if not np.isfinite(values).all():
+        raise ValueError("Invalid amount: not a finite number")
+    paise = np.rint(values * 100)
+    # Where the value is not the double nearest a whole number of paise
+    # (1.005, 0.125), rint would round the binary value half to even; those
+    # go through to_paise, which rounds the decimal value half up
+    inexact = np.flatnonzero(paise / 100 != values)
+    paise = paise.astype(np.int64)
+    for i in inexact.tolist():
+        paise[i] = to_paise(values[i].item())
+    return paise
+
+def _divide_batch(numerator, rounding):
+    import numpy as np
+
+    magnitude = np.abs(numerator)
+    if rounding == ROUND_HALF_UP:
+        q = (magnitude + RATE_SCALE // 2) // RATE_SCALE
+    elif rounding == ROUND_UP:
+        q = (magnitude + RATE_SCALE - 1) // RATE_SCALE
+    elif rounding == ROUND_HALF_EVEN:
+        q, r = np.divmod(magnitude, RATE_SCALE)
+        q += (2 * r > RATE_SCALE) | ((2 * r == RATE_SCALE) & (q % 2 == 1))
+    else:
+        raise ValueError(f"Unknown rounding mode: {rounding}")
+    return np.where(numerator < 0, -q, q)
+
+def calculate_tax_paise_batch(base_paise, slabs, rounding=ROUND_HALF_UP):
+    """Vectorized calculate_tax_paise over int64 arrays.
+
+    Returns a dict of int64 arrays: cgst, sgst, total_tax and final_amount.
+    """
+    import numpy as np
+
+    base = np.asarray(base_paise, dtype=np.int64)
+    table = np.array([SLAB_RATES_FIXED[slab] for slab in SLABS] + [(0, 0)], dtype=np.int64)
+    rates = table[slab_codes(slabs)]
+    cgst = _divide_batch(base * rates[:, 0], rounding)
+    sgst = _divide_batch(base * rates[:, 1], rounding)
+    total_tax = cgst + sgst
+    return {
+        'cgst': cgst,
+        'sgst': sgst,
+        'total_tax': total_tax,
+        'final_amount': base + total_tax
     }
-    cgst, sgst = slab_map.get(slab, (0.0, 0.0))
-    return base_value * (cgst / 100), base_value * (sgst / 100)
\ No newline at end of file
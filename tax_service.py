@@ -0,0 +1,416 @@
+"""Local HTTP service for HSN lookup and GST computation, for ERP integration.
+
+The HSN master, its code index and the description search index are
+loaded once at startup and held in memory; every request is answered from
+them without touching the workbook.  Tax is exact (integer paise, see
+tax_logic); amounts are read with tax_logic.parse_paise, as bulk_invoice
+reads them, so both give the same tax for the same line.
+
+Single-item /tax requests that arrive together are not computed one by
+one: each one joins a pending batch, and the batch is computed with one
+vectorized call on the next turn of the event loop, so a hundred ERP
+connections posting lines at once cost one numpy pass instead of a
+hundred.  /tax/batch takes up to MAX_BATCH_ITEMS lines in one request,
+which is the fast path for whole invoices.
+
+    python tax_service.py --port 8765
+
+    GET  /health                      codes loaded, request and item counters
+    GET  /hsn/<code>                  description and parent headings of one code
+    GET  /hsn?prefix=3917&limit=50    codes starting with a prefix
+    GET  /search?q=pvc+pipes&limit=20 description search
+    POST /tax                         {"hsn": "3917", "base_value": "1000.00", "slab": "18%"}
+    POST /tax/batch                   {"items": [...], "rounding": "half_up"}
+
+Amounts are returned as exact rupee strings ("180.00").  Line items may
+carry an "id", which is echoed back.  Invalid lines in a batch get an
+"error" instead of amounts; the rest of the batch is still computed.
+
+Load test: python benchmarks/bench_tax_service.py
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from hsn_index import HSNCodeIndex, normalize_code
+from hsn_loader import load_hsn_search_index, load_hsn_table
+from tax_logic import (ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_UP, SLAB_RATES_FIXED,
+                       calculate_tax_paise, calculate_tax_paise_batch, format_paise,
+                       format_paise_batch, parse_paise)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+ROUNDING_MODES = (ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_UP)
+
+MAX_BATCH_ITEMS = 100_000
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 1000
+# Below this many lines a Python loop beats setting up the numpy arrays
+VECTOR_MIN_ITEMS = 32
+# Flush a pending /tax batch early once it is this big
+MAX_PENDING_ITEMS = 4096
+KEEPALIVE_TIMEOUT = 60
+# JSON values a line item's hsn, slab and base_value may have (None is a missing value)
+SCALAR_TYPES = (str, int, float, type(None))
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error", 501: "Not Implemented"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def normalize_slab(slab):
+    """Accept 18, 18.0, "18" and " 18 %" as well as "18%" (see bulk_invoice._normalize_slabs)"""
+    text = str(slab).replace(" ", "")
+    if not text.endswith("%"):
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        text += "%"
+    return text
+
+
+class TaxData:
+    """The HSN master and its indexes, loaded once"""
+
+    def __init__(self, codes=None, descriptions=None, search_index=None):
+        if codes is None:
+            codes, descriptions = load_hsn_table()
+        self.codes = codes
+        self.descriptions = descriptions
+        self.index = HSNCodeIndex(codes)
+        self._search_index = search_index
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = load_hsn_search_index(self.descriptions)
+        return self._search_index
+
+    def describe(self, row):
+        return {"code": self.codes[row], "description": self.descriptions[row]}
+
+    def lookup(self, code):
+        code = normalize_code(code)
+        row = self.index.row_for(code)
+        if row < 0:
+            closest = self.index.longest_prefix(code)
+            result = {"error": "unknown HSN code", "code": code}
+            if closest >= 0:
+                result["closest"] = self.describe(closest)
+            return 404, result
+        result = self.describe(row)
+        result["parents"] = [self.describe(r) for r in self.index.ancestors(code)]
+        return 200, result
+
+    def prefix(self, prefix, limit):
+        prefix = normalize_code(prefix)
+        rows = self.index.with_prefix(prefix, limit)
+        return {"prefix": prefix, "count": self.index.count_prefix(prefix),
+                "results": [self.describe(row) for row in rows]}
+
+    def search(self, query, limit):
+        results = []
+        for row, score in self.search_index.search(query, limit):
+            result = self.describe(row)
+            result["score"] = round(score, 4)
+            results.append(result)
+        return {"query": query, "results": results}
+
+    def compute(self, items, rounding=ROUND_HALF_UP):
+        """Tax a list of line-item dicts; one result dict per item, in order"""
+        if rounding not in ROUNDING_MODES:
+            raise HTTPError(400, f"rounding must be one of {', '.join(ROUNDING_MODES)}")
+        results = [None] * len(items)
+        ok_rows, bases, slabs = [], [], []
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[i] = {"error": "line item must be an object"}
+                continue
+            result = {}
+            if "id" in item:
+                result["id"] = item["id"]
+            results[i] = result
+            # Lists and objects would fail the lookups below (or hash as keys)
+            field = next((key for key in ("hsn", "slab", "base_value")
+                          if not isinstance(item.get(key, ""), SCALAR_TYPES)), None)
+            if field is not None:
+                result["error"] = f"{field} must be a string or number"
+                continue
+            code = str(item.get("hsn", ""))
+            if not code.isdigit():
+                code = normalize_code(code)
+            slab = item.get("slab", "")
+            if slab not in SLAB_RATES_FIXED:
+                slab = normalize_slab(slab)
+            row = self.index.row_for(code)
+            if row < 0:
+                result["error"] = "unknown HSN code" if code else "missing hsn"
+                continue
+            if slab not in SLAB_RATES_FIXED:
+                result["error"] = "unknown tax slab"
+                continue
+            value = item.get("base_value")
+            try:
+                base = parse_paise(value)
+            except ValueError:
+                result["error"] = f"invalid taxable value {value!r}"
+                continue
+            result["hsn"] = code
+            result["description"] = self.descriptions[row]
+            result["slab"] = slab
+            ok_rows.append(i)
+            bases.append(base)
+            slabs.append(slab)
+
+        if len(ok_rows) >= VECTOR_MIN_ITEMS:
+            taxed = calculate_tax_paise_batch(bases, slabs, rounding)
+            columns = [("base_value", format_paise_batch(bases))]
+            columns += [(key, format_paise_batch(taxed[key]))
+                        for key in ("cgst", "sgst", "total_tax", "final_amount")]
+            for key, values in columns:
+                for i, text in zip(ok_rows, values):
+                    results[i][key] = text
+        else:
+            for i, base, slab in zip(ok_rows, bases, slabs):
+                cgst, sgst = calculate_tax_paise(base, slab, rounding)
+                results[i].update(base_value=format_paise(base), cgst=format_paise(cgst),
+                                  sgst=format_paise(sgst), total_tax=format_paise(cgst + sgst),
+                                  final_amount=format_paise(base + cgst + sgst))
+        return results
+
+
+class TaxBatcher:
+    """Coalesces single-item /tax requests into one TaxData.compute call per loop turn"""
+
+    def __init__(self, data, max_pending=MAX_PENDING_ITEMS):
+        self.data = data
+        self.max_pending = max_pending
+        self._pending = {}       # rounding -> [(item, future)]
+        self._scheduled = False
+        self.batches = 0
+        self.largest = 0
+
+    def submit(self, item, rounding=ROUND_HALF_UP):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(rounding, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_pending:
+            self._flush_one(rounding)
+        elif not self._scheduled:
+            # Requests parsed in this turn of the loop join the same batch
+            self._scheduled = True
+            loop.call_soon(self.flush)
+        return future
+
+    def flush(self):
+        self._scheduled = False
+        for rounding in list(self._pending):
+            self._flush_one(rounding)
+
+    def _flush_one(self, rounding):
+        pending = self._pending.pop(rounding, [])
+        if not pending:
+            return
+        self.batches += 1
+        self.largest = max(self.largest, len(pending))
+        try:
+            results = self.data.compute([item for item, _ in pending], rounding)
+        except Exception:
+            # Don't fail every coalesced request for one bad line: redo them one by one
+            for item, future in pending:
+                self._resolve(future, lambda: self.data.compute([item], rounding)[0])
+            return
+        for (_, future), result in zip(pending, results):
+            self._resolve(future, lambda: result)
+
+    @staticmethod
+    def _resolve(future, compute):
+        if future.done():
+            return
+        try:
+            future.set_result(compute())
+        except Exception as e:
+            future.set_exception(e)
+
+
+class TaxService:
+    """asyncio HTTP/1.1 server with keep-alive over TaxData"""
+
+    def __init__(self, data=None):
+        self.data = data if data is not None else TaxData()
+        self.batcher = TaxBatcher(self.data)
+        self.started = time.time()
+        self.requests = 0
+        self.items = 0
+        self.errors = 0
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handle_connection, host, port,
+                                          limit=MAX_HEADER_BYTES, backlog=1024)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    self._write(writer, 431, {"error": "request headers too large"}, keep_alive=False)
+                    break
+                keep_alive = await self.handle_request(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Error in tax service connection: {e}")
+        finally:
+            writer.close()
+
+    async def handle_request(self, head, reader, writer):
+        """Answer one request; returns whether to keep the connection open"""
+        self.requests += 1
+        try:
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+        except ValueError:
+            self._write(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+            return False
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        try:
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                raise HTTPError(501, "chunked request bodies are not supported; send Content-Length")
+            try:
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                raise HTTPError(400, "invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(413, f"request body over {MAX_BODY_BYTES} bytes")
+            body = await reader.readexactly(length) if length else b""
+            status, payload = await self.route(method, target, body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except asyncio.IncompleteReadError:
+            return False
+        except Exception as e:
+            print(f"Error handling {target}: {e}")
+            status, payload = 500, {"error": "internal error"}
+        if status >= 400:
+            self.errors += 1
+        self._write(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+
+        if path == "/tax" or path == "/tax/batch":
+            if method != "POST":
+                raise HTTPError(405, f"{path} takes POST")
+            request = self._json(body)
+            rounding = request.get("rounding", ROUND_HALF_UP) if isinstance(request, dict) else ROUND_HALF_UP
+            if rounding not in ROUNDING_MODES:
+                raise HTTPError(400, f"rounding must be one of {', '.join(ROUNDING_MODES)}")
+            if path == "/tax":
+                self.items += 1
+                result = await self.batcher.submit(request, rounding)
+                return (400 if "error" in result else 200), result
+            items = request.get("items") if isinstance(request, dict) else request
+            if not isinstance(items, list):
+                raise HTTPError(400, 'expected {"items": [...]}')
+            if len(items) > MAX_BATCH_ITEMS:
+                raise HTTPError(413, f"at most {MAX_BATCH_ITEMS} items per batch")
+            self.items += len(items)
+            results = self.data.compute(items, rounding)
+            return 200, {"results": results, "errors": sum(1 for r in results if "error" in r)}
+
+        if method != "GET":
+            raise HTTPError(405, f"{path} takes GET")
+        if path.startswith("/hsn/"):
+            return self.data.lookup(unquote(path[len("/hsn/"):]))
+        if path == "/hsn":
+            # No prefix lists the master from the start, limit codes at a time
+            return 200, self.data.prefix(query.get("prefix", [""])[0], self._limit(query))
+        if path == "/search":
+            q = query.get("q", [""])[0]
+            if not q.strip():
+                raise HTTPError(400, "q is required")
+            return 200, self.data.search(q, self._limit(query))
+        if path == "/health":
+            return 200, self.stats()
+        raise HTTPError(404, f"no such endpoint: {path}")
+
+    def stats(self):
+        return {"status": "ok", "codes": len(self.data.codes),
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "requests": self.requests, "items": self.items, "errors": self.errors,
+                "tax_batches": self.batcher.batches, "largest_batch": self.batcher.largest}
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise HTTPError(400, f"invalid JSON: {e}")
+
+    @staticmethod
+    def _limit(query):
+        try:
+            limit = int(query.get("limit", [DEFAULT_LIMIT])[0])
+        except ValueError:
+            raise HTTPError(400, "limit must be a number")
+        return max(1, min(limit, MAX_LIMIT))
+
+    @staticmethod
+    def _write(writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, data=None):
+    started = time.perf_counter()
+    service = TaxService(data)
+    # Build the search index now rather than on the first /search
+    service.data.search_index
+    server = await service.start(host, port)
+    print(f"Loaded {len(service.data.codes):,} HSN codes in {time.perf_counter() - started:.2f} s; "
+          f"listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HSN lookup and GST computation service")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
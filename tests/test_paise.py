@@ -0,0 +1,42 @@
+"""to_paise, to_paise_batch, parse_paise and bulk_invoice agree on every amount"""
+import pandas as pd
+import pytest
+
+from bulk_invoice import process_chunk
+from tax_logic import parse_paise, to_paise, to_paise_batch
+
+# (amount, paise): half-up rounding where a float would round down or to even
+AMOUNTS = [("1.005", 101), ("0.125", 13), ("1e3", 100000), ("12.50", 1250)]
+
+
+@pytest.mark.parametrize("text, paise", AMOUNTS)
+def test_to_paise(text, paise):
+    assert to_paise(text) == paise
+
+
+@pytest.mark.parametrize("text, paise", AMOUNTS)
+def test_parse_paise(text, paise):
+    assert parse_paise(text) == paise
+
+
+def test_to_paise_batch_strings():
+    assert to_paise_batch([text for text, _ in AMOUNTS]).tolist() == [paise for _, paise in AMOUNTS]
+
+
+def test_to_paise_batch_floats():
+    values = [float(text) for text, _ in AMOUNTS]
+    assert to_paise_batch(values).tolist() == [to_paise(value) for value in values]
+
+
+def test_process_chunk():
+    chunk = pd.DataFrame({'HSN': '0402', 'QtyType': 'Units', 'Qty': '1',
+                          'BaseValue': [text for text, _ in AMOUNTS], 'TaxSlab': '18%'})
+    out = process_chunk(chunk, {'0402': 'Milk'})
+    assert out['Error'].tolist() == [''] * len(AMOUNTS)
+    assert [to_paise(value) for value in out['BaseValue']] == [paise for _, paise in AMOUNTS]
+
+
+@pytest.mark.parametrize("value", ["", " ", None, True, "abc", "nan"])
+def test_parse_paise_invalid(value):
+    with pytest.raises(ValueError):
+        parse_paise(value)
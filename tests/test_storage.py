@@ -0,0 +1,72 @@
+"""Entries saved to the CSV and SQLite stores read back the same, and merge without duplicates"""
+import pytest
+
+import entry_merge
+import storage
+
+
+def make_entry(i, hsn='0402', base='100.00'):
+    return {'HSN': hsn, 'Description': 'Milk', 'QtyType': 'Units', 'Qty': str(i + 1),
+            'BaseValue': base, 'TaxSlab': '18%', 'CGST': '9.00', 'SGST': '9.00',
+            'TotalTax': '18.00', 'FinalAmount': '118.00', 'UserEmail': 'a@example.com',
+            'Timestamp': f'2026-01-{i % 28 + 1:02d}T10:00:00'}
+
+
+@pytest.fixture(params=[storage.BACKEND_CSV, storage.BACKEND_SQLITE])
+def store(request, tmp_path):
+    if request.param == storage.BACKEND_CSV:
+        store = storage.CSVEntryStore(str(tmp_path / 'entries.csv'))
+    else:
+        store = storage.SQLiteEntryStore(str(tmp_path / 'entries.db'))
+    yield store
+    store.close()
+
+
+def test_round_trip(store):
+    entries = [make_entry(i) for i in range(5)]
+    assert not store.has_entries()
+    store.append(entries[0])
+    store.append_many(entries[1:])
+    assert store.has_entries()
+    assert store.count() == 5
+    assert [entry_merge.entry_hash(e) for e in store.iter_entries()] == \
+        [entry_merge.entry_hash(e) for e in entries]
+    assert next(store.iter_entries())['BaseValue'] == '100.00'
+
+
+def test_summary(store):
+    store.append_many([make_entry(i) for i in range(3)] + [make_entry(0, hsn='3917', base='0.50')])
+    totals = {row['HSN']: row for row in store.summary(('HSN',))}
+    assert totals['0402']['Entries'] == 3
+    assert totals['0402']['BaseValue'] == 30000
+    assert totals['3917']['BaseValue'] == 50
+
+
+def test_delete_entries(store):
+    store.append_many([make_entry(i) for i in range(4)])
+    assert store.delete_entries(start='2026-01-03') == 2
+    assert store.count() == 2
+    assert store.summary(('HSN',))[0]['Entries'] == 2
+
+
+def test_merge_adds_only_missing(store, tmp_path):
+    remote = tmp_path / 'remote.csv'
+    storage.write_entries_csv([make_entry(i) for i in range(4)], str(remote))
+    store.append_many([make_entry(0), make_entry(1)])
+
+    result = entry_merge.merge_csv(str(remote), store)
+    assert (result['local'], result['remote'], result['added'], result['local_only']) == (2, 4, 2, 0)
+    assert store.count() == 4
+
+    again = entry_merge.merge_csv(str(remote), store)
+    assert again['added'] == 0
+    assert store.count() == 4
+
+
+def test_merge_keeps_local_only(store, tmp_path):
+    remote = tmp_path / 'remote.csv'
+    storage.write_entries_csv([make_entry(0)], str(remote))
+    store.append_many([make_entry(0), make_entry(7)])
+    result = entry_merge.merge_csv(str(remote), store)
+    assert (result['added'], result['local_only']) == (0, 1)
+    assert store.count() == 2